@@ -140,6 +140,15 @@ class Settings(BaseSettings):
     def database_url_computed(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD.get_secret_value()}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    # --- Redis Configuration ---
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: SecretStr | None = None
+    REDIS_MAX_CONNECTIONS: int = 50  # par pool (sync et asyncio) et par process
+    REDIS_POOL_TIMEOUT: float = 2
+    REDIS_SOCKET_TIMEOUT: float = 2
+
     # --- Circle API Configuration ---
     CIRCLE_API_KEY: SecretStr
     WALLET_SET_ID: str
@@ -149,11 +158,117 @@ class Settings(BaseSettings):
     USDC_TOKEN_ID: str = Field(..., validation_alias="CIRCLE_USDC_TOKEN_ID")
     GAS_TOKEN_SYMBOL: str = Field("USDC-TESTNET", validation_alias="CIRCLE_GAS_TOKEN_SYMBOL")
     MIN_GAS_THRESHOLD: float = Field(1.0, validation_alias="CIRCLE_MIN_GAS_THRESHOLD")
-    
+    # Cache de la clé publique Circle et réserve de ciphertexts pré-générés
+    CIRCLE_PUBLIC_KEY_TTL_SECONDS: int = 3600
+    CIRCLE_CIPHERTEXT_POOL_SIZE: int = 16
+    # Transport HTTP partagé (keep-alive, retries, timeouts par type d'endpoint)
+    CIRCLE_HTTP_POOL_SIZE: int = 20
+    CIRCLE_HTTP_MAX_RETRIES: int = 3
+    CIRCLE_HTTP_BACKOFF_FACTOR: float = 0.3
+    CIRCLE_HTTP_BACKOFF_JITTER: float = 0.5
+    CIRCLE_CONNECT_TIMEOUT: float = 3.05
+    CIRCLE_READ_TIMEOUT_DEFAULT: float = 10
+    CIRCLE_READ_TIMEOUT_BALANCES: float = 5
+    CIRCLE_READ_TIMEOUT_TRANSFERS: float = 20
+    CIRCLE_READ_TIMEOUT_WALLETS: float = 30
+    # Cache court du solde USDC du Master Wallet (vérification de stock)
+    MASTER_BALANCE_CACHE_TTL_SECONDS: float = 5
+    # Délai après lequel un transfert sortant est supposé reflété par le solde Circle ; d'ici là,
+    # il reste décompté de chaque solde relu
+    MASTER_BALANCE_DEBIT_SETTLE_SECONDS: float = 60
+
+    # --- Export comptable des recharges (lignes lues par lot de curseur serveur) ---
+    EXPORT_BATCH_SIZE: int = 5000
+
+    # --- Reaper (réservations expirées / recharges abandonnées) ---
+    REAPER_ENABLED: bool = True
+    REAPER_INTERVAL_SECONDS: float = 30
+    REAPER_BATCH_SIZE: int = 500
+    REAPER_MAX_BATCHES_PER_RUN: int = 20
+    RECHARGE_PENDING_TIMEOUT_MINUTES: int = 60
+
+    # --- Webhooks Stripe (journal + worker) ---
+    WEBHOOK_WORKER_IN_PROCESS: bool = True
+    WEBHOOK_WORKER_BATCH_SIZE: int = 20
+    WEBHOOK_WORKER_CONCURRENCY: int = 10
+    WEBHOOK_WORKER_POLL_SECONDS: float = 2
+    WEBHOOK_WORKER_LEASE_SECONDS: float = 300
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BASE_SECONDS: float = 5
+
+    # --- Virements USDC (payout_jobs + worker) ---
+    PAYOUT_WORKER_IN_PROCESS: bool = True
+    PAYOUT_WORKER_CONCURRENCY: int = 10
+    PAYOUT_WORKER_POLL_SECONDS: float = 2
+    PAYOUT_WORKER_LEASE_SECONDS: float = 120
+    PAYOUT_MAX_ATTEMPTS: int = 10
+    PAYOUT_RETRY_BASE_SECONDS: float = 10
+
+    # --- Facturation à l'usage (charges cumulées, règlement on-chain groupé par utilisateur) ---
+    # Une fenêtre est réglée dès que son total atteint le seuil, ou quand sa plus ancienne charge a
+    # dépassé la durée de fenêtre (si le total couvre au moins le montant minimum, sinon elle attend)
+    USAGE_SETTLEMENT_THRESHOLD_USDC: float = 1.0
+    USAGE_SETTLEMENT_WINDOW_SECONDS: float = 3600
+    USAGE_SETTLEMENT_MIN_AMOUNT_USDC: float = 0.01
+    SETTLEMENT_WORKER_IN_PROCESS: bool = True
+    SETTLEMENT_WORKER_CONCURRENCY: int = 10
+    SETTLEMENT_WORKER_POLL_SECONDS: float = 30
+    SETTLEMENT_WORKER_LEASE_SECONDS: float = 120
+    SETTLEMENT_CLOSE_BATCH_SIZE: int = 1000
+    SETTLEMENT_MAX_ATTEMPTS: int = 10
+    SETTLEMENT_RETRY_BASE_SECONDS: float = 30
+
+    # --- Ingestion du journal token_usage (tampon mémoire écrit par COPY, partitions mensuelles) ---
+    USAGE_INGEST_FLUSH_ROWS: int = 5000
+    USAGE_INGEST_FLUSH_SECONDS: float = 1
+    USAGE_INGEST_MAX_BUFFERED: int = 200000  # au-delà : 503 sur l'endpoint d'ingestion
+    USAGE_INGEST_MAX_BATCH: int = 5000  # événements par requête
+    USAGE_INGEST_MAX_CLOCK_SKEW_SECONDS: float = 300  # occurred_at accepté jusqu'à ce délai dans le futur
+    # Un lot dont le COPY échoue est retenté seul (backoff), puis déposé en dead-letter (CSV) après N échecs
+    USAGE_INGEST_MAX_FLUSH_ATTEMPTS: int = 5
+    USAGE_INGEST_DEAD_LETTER_DIR: Path = Path(__file__).parent.parent / "dead_letters" / "token_usage"
+    USAGE_RETENTION_MONTHS: int = 13  # occurred_at plus ancien refusé (partition supprimée)
+
+    # --- Catalogue des tarifs des modèles (en mémoire, rechargé quand sa version change) ---
+    PRICE_CATALOG_REFRESH_SECONDS: float = 10
+
+    # --- Solde d'unités prépayées (Redis, report différé vers le grand livre units_ledger) ---
+    UNITS_WRITE_BEHIND_SECONDS: float = 5  # au plus ces secondes de débits perdues si Redis perd un solde
+    UNITS_WRITE_BEHIND_BATCH: int = 1000
+    UNITS_IDLE_TTL_SECONDS: int = 86400  # solde inactif et entièrement reporté : retiré de Redis
+    # Instantanés de solde : une lecture ne somme que les écritures postérieures au dernier
+    UNITS_SNAPSHOT_INTERVAL_SECONDS: float = 300
+    UNITS_SNAPSHOT_RETENTION_DAYS: int = 30  # le dernier instantané de chaque utilisateur est toujours gardé
+
+    # --- Hachage des mots de passe (Argon2, pool dédié) ---
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = nombre de cœurs
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Modifier ces paramètres déclenche un rehash transparent au login suivant
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # --- Rate limiting (token bucket Redis, par route) ---
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_FAIL_OPEN: bool = True  # Redis indisponible : laisser passer plutôt que tout refuser
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # true derrière un reverse proxy de confiance
+    # {route: {portée: [requêtes par minute, rafale]}}, portées : ip, user, global (JSON en variable d'env)
+    RATE_LIMIT_BUDGETS: dict[str, dict[str, list[float]]] = {
+        "/users/token": {"ip": [10, 5], "global": [6000, 200]},
+        "/users/verify-otp": {"ip": [10, 5], "global": [6000, 200]},
+        "/users/token/refresh": {"ip": [30, 10]},
+        "/recharges/init-payment": {"ip": [30, 10], "user": [10, 3], "global": [1200, 40]},
+    }
+
     # --- JWT Configuration ---
     SECRET_KEY: str = Field(..., validation_alias="SECRET_KEY")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: float = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES: float = 15  # court : la révocation Redis n'est qu'un filet
+    REFRESH_TOKEN_EXPIRE_MINUTES: float = 60 * 24 * 7
+    # Cache de l'utilisateur authentifié (LRU local + Redis)
+    USER_CACHE_LOCAL_SIZE: int = 10000
+    USER_CACHE_LOCAL_TTL_SECONDS: float = 5
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300
     
     # --- Email Configuration ---
     MAIL_HOST: str
@@ -161,6 +276,18 @@ class Settings(BaseSettings):
     MAIL_PASSWORD: SecretStr
     MAIL_PORT: int = 587
     FROM_MAIL: str
+    MAIL_USE_TLS: bool = True  # false pour le serveur SMTP local (mailpit)
+    # Pool de connexions SMTP authentifiées réutilisées par le worker d'emails
+    MAIL_SMTP_POOL_SIZE: int = 3
+    MAIL_SMTP_MAX_IDLE_SECONDS: float = 60
+    MAIL_SMTP_TIMEOUT: float = 10
+    # Outbox des emails transactionnels + worker
+    EMAIL_WORKER_IN_PROCESS: bool = True
+    EMAIL_WORKER_BATCH_SIZE: int = 50
+    EMAIL_WORKER_POLL_SECONDS: float = 1
+    EMAIL_WORKER_LEASE_SECONDS: float = 120
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: float = 10
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env",
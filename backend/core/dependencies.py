@@ -1,25 +1,31 @@
 # backend/core/dependencies
 
 from typing import Annotated
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt.exceptions import InvalidTokenError
-from backend.repositories.user_repository import UserRepository
 from backend.core.config import settings
-from backend.models.user_entity import User
-from backend.repositories.user_repository import UserRepository
-from backend.db.session import SessionDep
+from backend.models.user_entity import User, UserRole
+from backend.repositories.user_repository import AsyncUserRepository
+from backend.db.session import AsyncSessionDep
+from backend.services.user_cache import user_cache
+from backend.services.token_revocation import token_revocations
+from backend.services.units_balance import units_balance
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token") # The connection URL used by the frontend to obtain the JWT token after login
-# Todo: Rendre la fonction asynchrone
-def get_current_user(
+async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: SessionDep # Utilise directement la session
+    session: AsyncSessionDep # Session asynchrone : aucun thread du pool n'est occupé
 ) -> User:
-    """Valide le token JWT dans l'entête de la requête et identifie l'utilisateur en vérifiant qu'il est 
-    présent dans la base de données."""
+    """Valide le token JWT dans l'entête de la requête et identifie l'utilisateur.
+
+    Les tokens récents portent id, rôle et version : l'utilisateur est reconstruit à partir des
+    claims, après vérification de la liste de révocation (Redis), sans lire Postgres.
+    Les anciens tokens (email seul) passent par le cache utilisateur.
+    L'objet retourné est détaché : ne pas s'en servir pour charger wallet ou recharges."""
     credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
@@ -29,15 +35,67 @@ def get_current_user(
         secret = settings.SECRET_KEY.get_secret_value() if hasattr(settings.SECRET_KEY, "get_secret_value") else settings.SECRET_KEY
         payload = jwt.decode(token, secret, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("type", "access") != "access":
             raise credentials_exception
     except InvalidTokenError:
         raise credentials_exception
 
-    # 2. On cherche l'user via un repository léger ou directement
-    repository = UserRepository(session)
-    user = repository.get_by_email(email)
+    repository = AsyncUserRepository(session)
+
+    # 1. Token autoporteur : seule la liste de révocation est consultée
+    if payload.get("uid") is not None:
+        user_id = UUID(payload["uid"])
+        version = int(payload.get("ver", 0))
+        if await token_revocations.is_revoked(user_id, version, lambda: repository.get_token_version(user_id)):
+            raise credentials_exception
+        return User(
+            id=user_id,
+            email=email,
+            role=payload.get("role", UserRole.USER.value),
+            token_version=version,
+            nom="",
+            prenom="",
+            hashed_password="",
+        )
+
+    # 2. Ancien token : on cherche l'user dans le cache, puis via le repository en cas d'absence
+    user = await user_cache.aget_by_email(email, lambda: repository.get_by_email(email))
     
     if user is None:
         raise credentials_exception
     return user
+
+
+async def get_current_admin(
+    current_user: Annotated[User, Depends(get_current_user)]
+) -> User:
+    """Restreint une route aux administrateurs."""
+    if current_user.role != UserRole.ADMIN.value:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+
+def meter_units(units: float):
+    """
+    Dépendance de route facturée à l'appel : débite `units` du solde prépayé de l'utilisateur
+    (un aller-retour Redis) avant d'exécuter la route. 402 si le solde est insuffisant.
+        @router.post("/completions", dependencies=[Depends(meter_units(1))])
+    """
+    async def debit(current_user: Annotated[User, Depends(get_current_user)]) -> float:
+        try:
+            debited, balance = await units_balance.adebit(current_user.id, units)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Balance service unavailable, please retry",
+                headers={"Retry-After": "1"},
+            )
+        if not debited:
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail=f"Insufficient units: {balance} available, {units} required",
+            )
+        return balance
+    return debit
@@ -0,0 +1,151 @@
+# backend/core/rate_limit.py
+import logging
+import math
+import jwt
+import redis
+from collections import defaultdict
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from backend.core.config import settings
+from backend.db.redis_pool import redis_pools
+
+logger = logging.getLogger(__name__)
+
+# Token bucket sur plusieurs clés (IP, utilisateur, global) en un seul appel atomique.
+# ARGV = débit (jetons/s) et capacité de chaque clé, dans l'ordre de KEYS.
+# Un jeton n'est consommé que si toutes les clés en ont un ; sinon rien n'est consommé.
+# Retourne {0, "0"} si la requête passe, {i, attente_en_secondes} si la clé i est vide.
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local limited, wait = 0, 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    level = math.min(burst, level + math.max(0, now - ts) * rate)
+    levels[i] = level
+    if level < 1 and (1 - level) / rate > wait then
+        limited, wait = i, (1 - level) / rate
+    end
+end
+if limited > 0 then
+    return {limited, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {0, "0"}
+"""
+
+
+class RateLimitCounters:
+    """Compteurs du rate limiter pour ce worker (le middleware est instancié par Starlette)."""
+
+    def __init__(self):
+        self.allowed: dict[str, int] = defaultdict(int)
+        self.limited: dict[str, int] = defaultdict(int)
+        self.redis_errors = 0
+
+    def stats(self) -> dict:
+        return {
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+            "redis_errors": self.redis_errors,
+            "budgets": settings.RATE_LIMIT_BUDGETS,
+        }
+
+
+rate_limit_counters = RateLimitCounters()
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Contrôle d'admission des routes coûteuses (Argon2, Circle, Stripe), avant tout travail :
+    la requête est refusée (429 + Retry-After) avant la lecture du corps, l'accès à Postgres
+    ou la vérification du mot de passe.
+
+    Budgets par route et par portée (ip / user / global) dans settings.RATE_LIMIT_BUDGETS,
+    en requêtes par minute et taille de rafale. L'utilisateur est lu dans le JWT sans accès
+    à la base ; une requête sans token valide n'est comptée que par IP et globalement.
+    """
+
+    def __init__(self, app, budgets: dict[str, dict[str, list[float]]], fail_open: bool, trust_forwarded_for: bool):
+        super().__init__(app)
+        self.budgets = budgets
+        self.fail_open = fail_open
+        self.trust_forwarded_for = trust_forwarded_for
+        self.counters = rate_limit_counters
+
+    def _client_ip(self, request: Request) -> str:
+        forwarded = request.headers.get("x-forwarded-for")
+        if self.trust_forwarded_for and forwarded:
+            return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    @staticmethod
+    def _user_key(request: Request) -> str | None:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except jwt.InvalidTokenError:
+            return None
+        return payload.get("sub")
+
+    def _buckets(self, request: Request, route: str) -> list[tuple[str, str, float, float]]:
+        """(portée, clé Redis, jetons/s, capacité) pour chaque budget applicable."""
+        buckets = []
+        for scope, (per_minute, burst) in self.budgets[route].items():
+            if scope == "ip":
+                identity = self._client_ip(request)
+            elif scope == "user":
+                identity = self._user_key(request)
+                if identity is None:
+                    continue
+            else:
+                identity = "all"
+            buckets.append((scope, f"ratelimit:{route}:{scope}:{identity}", per_minute / 60, burst))
+        return buckets
+
+    async def dispatch(self, request: Request, call_next):
+        route = request.url.path.rstrip("/")
+        if request.method != "POST" or route not in self.budgets:
+            return await call_next(request)
+
+        buckets = self._buckets(request, route)
+        args = [value for _, _, rate, burst in buckets for value in (rate, burst)]
+        try:
+            script = redis_pools.async_script(TOKEN_BUCKET_SCRIPT)
+            limited, wait = await script(keys=[key for _, key, _, _ in buckets], args=args)
+        except redis.RedisError as e:
+            self.counters.redis_errors += 1
+            logger.warning(f"Rate limiter : Redis indisponible ({str(e)})")
+            if self.fail_open:
+                return await call_next(request)
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Service temporarily unavailable"},
+                headers={"Retry-After": "1"},
+            )
+
+        if int(limited) == 0:
+            self.counters.allowed[route] += 1
+            return await call_next(request)
+
+        scope = buckets[int(limited) - 1][0]
+        self.counters.limited[f"{route}:{scope}"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests"},
+            headers={"Retry-After": str(max(1, math.ceil(float(wait))))},
+        )
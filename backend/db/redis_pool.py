@@ -0,0 +1,94 @@
+# backend/db/redis_pool.py
+from typing import Annotated
+from fastapi import Depends
+import redis
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript, Script
+
+from backend.core.config import settings
+
+
+class RedisPools:
+    """
+    Pools de connexions Redis partagés par tout le process (client bloquant + client asyncio),
+    configurés depuis Settings. Ouverts dans le lifespan de l'app ; les workers et scripts
+    lancés hors de l'app les créent au premier accès.
+    """
+
+    def __init__(self):
+        self._client: redis.Redis | None = None
+        self._async_client: aioredis.Redis | None = None
+        # Scripts Lua par source : SHA1 calculé une seule fois, appels en EVALSHA
+        self._scripts: dict[str, Script] = {}
+        self._async_scripts: dict[str, AsyncScript] = {}
+
+    @staticmethod
+    def _pool_kwargs() -> dict:
+        return {
+            "host": settings.REDIS_HOST,
+            "port": settings.REDIS_PORT,
+            "db": settings.REDIS_DB,
+            "password": settings.REDIS_PASSWORD.get_secret_value() if settings.REDIS_PASSWORD else None,
+            "max_connections": settings.REDIS_MAX_CONNECTIONS,
+            # Pool plein : on attend une connexion libre au lieu d'échouer immédiatement
+            "timeout": settings.REDIS_POOL_TIMEOUT,
+            "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "health_check_interval": 30,
+            "decode_responses": True,
+        }
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis(connection_pool=redis.BlockingConnectionPool(**self._pool_kwargs()))
+        return self._client
+
+    @property
+    def async_client(self) -> aioredis.Redis:
+        if self._async_client is None:
+            self._async_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(**self._pool_kwargs()))
+        return self._async_client
+
+    def script(self, source: str) -> Script:
+        """Script Lua lié au client bloquant, créé au premier usage puis réutilisé."""
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.client.register_script(source)
+        return script
+
+    def async_script(self, source: str) -> AsyncScript:
+        """Script Lua lié au client asyncio, créé au premier usage puis réutilisé."""
+        script = self._async_scripts.get(source)
+        if script is None:
+            script = self._async_scripts[source] = self.async_client.register_script(source)
+        return script
+
+    def open(self):
+        """Crée les deux pools (appelé au démarrage de l'app, dans la boucle d'événements)."""
+        self.client
+        self.async_client
+
+    async def aclose(self):
+        self._scripts.clear()
+        self._async_scripts.clear()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client.connection_pool.disconnect()
+            self._client = None
+
+
+redis_pools = RedisPools()
+
+
+def get_redis() -> redis.Redis:
+    return redis_pools.client
+
+def get_async_redis() -> aioredis.Redis:
+    return redis_pools.async_client
+
+RedisDep = Annotated[redis.Redis, Depends(get_redis)]
+AsyncRedisDep = Annotated[aioredis.Redis, Depends(get_async_redis)]
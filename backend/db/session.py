@@ -5,6 +5,9 @@ from backend.models.recharge_entity import Recharges
 from typing import Annotated
 from fastapi import Depends
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -16,6 +19,13 @@ database_url = os.getenv("DATABASE_URL")
 
 if database_url:
     engine = create_engine(database_url, echo=True) #A SQLModel engine (underneath it's actually a SQLAlchemy engine) is what holds the connections to the database
+    # Même base, pilote asyncpg : c'est la taille de ce pool (et non le threadpool) qui borne la concurrence des routes async
+    async_engine = create_async_engine(
+        make_url(database_url).set(drivername="postgresql+asyncpg"),
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_pre_ping=True,
+    )
 else:
     raise ValueError("DATABASE_URL environment variable is not set.")
 
@@ -34,5 +44,15 @@ def get_session():
 
 SessionDep = Annotated[Session, Depends(get_session)] #This is a type alias that can be used in FastAPI path operations to automatically get a database session injected into them.
 
+"""
+Équivalent asynchrone pour les routes `async def` : les requêtes passent par asyncpg sans occuper de thread.
+expire_on_commit=False car un attribut expiré ne peut pas être rechargé implicitement en async.
+"""
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+
 if __name__ == "__main__":
     initialize_database()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,14 +6,77 @@ from fastapi.middleware.cors import CORSMiddleware
 from backend.routers import user
 from backend.routers import recharge
 from backend.routers import payment
+from backend.routers import metrics
+from backend.routers import reports
+from backend.routers import usage
+from backend.services.circle_service import CircleService, cipher_pool
+from backend.services.circle_transport import async_transport
+from backend.core.config import settings
+from backend.core.rate_limit import RateLimitMiddleware
+from backend.db.session import async_engine
+from backend.db.redis_pool import redis_pools
+from backend.services.reaper_service import run_reaper
+from backend.workers.webhook_worker import webhook_worker
+from backend.workers.payout_worker import payout_worker
+from backend.workers.email_worker import email_worker
+from backend.workers.settlement_worker import settlement_worker
+from backend.services.smtp_pool import smtp_pool
+from backend.services.usage_ingestion import usage_ingestion
+from backend.services.units_balance import units_balance
+from backend.services.units_ledger import units_ledger
+from backend.services.price_catalog import price_catalog
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # En phase de développement avec Alembic, on ne crée plus les tables ici.
     # On laisse Alembic gérer les migrations depuis le terminal.
     print("Application démarrée. Les migrations sont gérées par Alembic.")
+    # Pools Redis partagés (client bloquant + client asyncio)
+    redis_pools.open()
+    # Pré-remplit la réserve de ciphertexts Circle en arrière-plan (clé publique mise en cache)
+    CircleService()
+    cipher_pool.start()
+    # Libère en tâche de fond les réservations expirées et les recharges abandonnées
+    background_tasks = []
+    if settings.REAPER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_reaper()))
+    # Traite les webhooks Stripe journalisés (sinon : process dédié backend.workers.webhook_worker)
+    if settings.WEBHOOK_WORKER_IN_PROCESS:
+        background_tasks.append(asyncio.create_task(webhook_worker.run_forever()))
+    # Exécute les virements USDC en file (sinon : process dédiés backend.workers.payout_worker)
+    if settings.PAYOUT_WORKER_IN_PROCESS:
+        background_tasks.append(asyncio.create_task(payout_worker.run_forever()))
+    # Envoie les emails de l'outbox (sinon : process dédié backend.workers.email_worker)
+    if settings.EMAIL_WORKER_IN_PROCESS:
+        background_tasks.append(asyncio.create_task(email_worker.run_forever()))
+    # Catalogue des tarifs en mémoire, rechargé quand sa version change
+    try:
+        await asyncio.to_thread(price_catalog.refresh)
+    except Exception as e:
+        print(f"Catalogue de tarifs non chargé au démarrage : {str(e)}")
+    background_tasks.append(asyncio.create_task(price_catalog.run_forever()))
+    # Écrit par lots le journal token_usage accumulé en mémoire
+    background_tasks.append(asyncio.create_task(usage_ingestion.run_forever()))
+    # Reporte dans le grand livre les débits d'unités tenus dans Redis (un seul process à la fois)
+    background_tasks.append(asyncio.create_task(units_balance.run_forever()))
+    # Instantanés périodiques des soldes du grand livre (un seul process à la fois)
+    background_tasks.append(asyncio.create_task(units_ledger.run_forever()))
+    # Règle on-chain les charges d'usage cumulées (sinon : process dédiés backend.workers.settlement_worker)
+    if settings.SETTLEMENT_WORKER_IN_PROCESS:
+        background_tasks.append(asyncio.create_task(settlement_worker.run_forever()))
     yield
     print("Fermeture de l'application...")
+    for task in background_tasks:
+        task.cancel()
+    # Dernier flush : les événements encore en mémoire seraient perdus (un lot en échec part en dead-letter)
+    try:
+        await asyncio.to_thread(usage_ingestion.flush, True)
+    except Exception as e:
+        print(f"Échec du dernier flush token_usage : {str(e)}")
+    await async_transport.aclose()
+    await async_engine.dispose()
+    await asyncio.to_thread(smtp_pool.close)
+    await redis_pools.aclose()
 
 app = FastAPI(
     title="MicroPay API",
@@ -21,6 +85,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Contrôle d'admission des routes coûteuses (ajouté avant CORS pour que les 429 portent les en-têtes CORS)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        budgets=settings.RATE_LIMIT_BUDGETS,
+        fail_open=settings.RATE_LIMIT_FAIL_OPEN,
+        trust_forwarded_for=settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+    )
+
 # Configuration du CORS
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +110,9 @@ app.add_middleware(
 app.include_router(user.router)
 app.include_router(recharge.router) 
 app.include_router(payment.router)
+app.include_router(metrics.router)
+app.include_router(reports.router)
+app.include_router(usage.router)
 
 @app.get("/", tags=["Health"])
 async def root():
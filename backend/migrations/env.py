@@ -9,6 +9,14 @@ from models.user_entity import User
 from models.wallet_entity import Wallet
 from models.recharge_entity import Recharges
 from models.inventory_entity import InventoryReservation
+from models.webhook_event_entity import WebhookEvent
+from models.payout_job_entity import PayoutJob
+from models.email_outbox_entity import EmailOutbox
+from models.revenue_rollup_entity import RevenueRollup
+from models.usage_settlement_entity import UsageCharge, UsageSettlement
+from models.token_usage_entity import TokenUsage
+from models.model_price_entity import ModelPrice, ModelCatalogVersion
+from models.units_ledger_entity import UnitsLedgerEntry, UnitsBalanceSnapshot
 from models.wallet_entity import Wallet
 
 from dotenv import load_dotenv
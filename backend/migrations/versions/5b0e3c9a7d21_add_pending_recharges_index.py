@@ -0,0 +1,31 @@
+"""Add partial index on pending recharges
+
+Revision ID: 5b0e3c9a7d21
+Revises: d72a6128128b
+Create Date: 2026-10-18 10:03:17.558120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e3c9a7d21'
+down_revision: Union[str, None] = 'd72a6128128b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Le reaper ne parcourt que les recharges PENDING : index partiel, petit tant que le reaper suit
+    op.create_index(
+        'ix_recharges_pending_created_at', 'recharges', ['created_at'], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recharges_pending_created_at', table_name='recharges')
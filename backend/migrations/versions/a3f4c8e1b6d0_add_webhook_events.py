@@ -0,0 +1,45 @@
+"""Add webhook_events
+
+Revision ID: a3f4c8e1b6d0
+Revises: 5b0e3c9a7d21
+Create Date: 2026-10-18 11:20:45.019384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f4c8e1b6d0'
+down_revision: Union[str, None] = '5b0e3c9a7d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('webhook_events',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'PROCESSED', 'FAILED', name='webhookeventstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Seuls les événements à traiter sont indexés : l'index reste petit quand le worker suit
+    op.create_index(
+        'ix_webhook_events_due', 'webhook_events', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_events_due', table_name='webhook_events')
+    op.drop_table('webhook_events')
+    sa.Enum(name='webhookeventstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,29 @@
+"""Add users.units_credit_seq and users.units_flush_id
+
+Revision ID: a5d3e7f9b2c6
+Revises: e8b2c4f6a1d7
+Create Date: 2026-10-18 20:27:35.931604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d3e7f9b2c6'
+down_revision: Union[str, None] = 'e8b2c4f6a1d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Numéro du dernier crédit d'unités et identifiant du dernier report des débits Redis
+    op.add_column('users', sa.Column('units_credit_seq', sa.Integer(), nullable=False, server_default="0"))
+    op.add_column('users', sa.Column('units_flush_id', sa.Uuid(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'units_flush_id')
+    op.drop_column('users', 'units_credit_seq')
@@ -0,0 +1,30 @@
+"""Add composite index for paginated recharge history
+
+Revision ID: a9c4e2f7b1d3
+Revises: f3b9d2a6c8e4
+Create Date: 2026-10-18 16:08:14.227561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c4e2f7b1d3'
+down_revision: Union[str, None] = 'f3b9d2a6c8e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pagination par clé de /users/{id}/recharges ; remplace l'index simple sur user_id (préfixe)
+    op.create_index('ix_recharges_user_created_at_id', 'recharges', ['user_id', 'created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_recharges_user_id'), table_name='recharges')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_recharges_user_id'), 'recharges', ['user_id'], unique=False)
+    op.drop_index('ix_recharges_user_created_at_id', table_name='recharges')
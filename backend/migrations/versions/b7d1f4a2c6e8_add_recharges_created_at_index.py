@@ -0,0 +1,28 @@
+"""Add created_at index for recharge exports
+
+Revision ID: b7d1f4a2c6e8
+Revises: a9c4e2f7b1d3
+Create Date: 2026-10-18 16:47:30.615407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1f4a2c6e8'
+down_revision: Union[str, None] = 'a9c4e2f7b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Export par plage de dates : parcours d'index dans l'ordre (created_at, id), sans tri
+    op.create_index('ix_recharges_created_at_id', 'recharges', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recharges_created_at_id', table_name='recharges')
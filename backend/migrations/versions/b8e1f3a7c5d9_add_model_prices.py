@@ -0,0 +1,39 @@
+"""Add model_prices and model_prices_version_seq
+
+Revision ID: b8e1f3a7c5d9
+Revises: a5d3e7f9b2c6
+Create Date: 2026-10-18 21:06:58.114962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f3a7c5d9'
+down_revision: Union[str, None] = 'a5d3e7f9b2c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE model_prices_version_seq")
+    op.create_table('model_prices',
+    sa.Column('model_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('input_usdc_per_million', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('output_usdc_per_million', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('model_name')
+    )
+    op.create_index(op.f('ix_model_prices_version'), 'model_prices', ['version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_model_prices_version'), table_name='model_prices')
+    op.drop_table('model_prices')
+    op.execute("DROP SEQUENCE model_prices_version_seq")
@@ -0,0 +1,49 @@
+"""Add revenue_rollups
+
+Revision ID: c2e8a5d1f9b4
+Revises: b7d1f4a2c6e8
+Create Date: 2026-10-18 17:31:02.480137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8a5d1f9b4'
+down_revision: Union[str, None] = 'b7d1f4a2c6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_COLUMNS = ('amount_base_eur', 'service_fee_eur', 'vat_amount_eur', 'stripe_fee_eur', 'total_paid_eur')
+
+
+def upgrade() -> None:
+    op.create_table('revenue_rollups',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    # Réutilise le type enum existant de recharges.status
+    sa.Column('status', postgresql.ENUM(name='rechargestatus', create_type=False), nullable=False),
+    sa.Column('recharge_count', sa.Integer(), nullable=False),
+    sa.Column('units_granted', sa.Integer(), nullable=False),
+    sa.Column('amount_usdc_value', sa.Numeric(precision=18, scale=6), nullable=False),
+    *[sa.Column(name, sa.Numeric(precision=18, scale=4), nullable=False) for name in MONEY_COLUMNS],
+    sa.PrimaryKeyConstraint('bucket_start', 'status')
+    )
+    # Amorçage depuis l'historique existant (même requête que le backfill)
+    op.execute("""
+        INSERT INTO revenue_rollups (bucket_start, status, recharge_count, units_granted, amount_usdc_value,
+                                     amount_base_eur, service_fee_eur, vat_amount_eur, stripe_fee_eur, total_paid_eur)
+        SELECT date_trunc('hour', created_at), status, count(*), sum(units_granted), sum(amount_usdc_value),
+               sum(amount_base_eur), sum(service_fee_eur), sum(vat_amount_eur), sum(stripe_fee_eur), sum(total_paid_eur)
+        FROM recharges
+        WHERE status IN ('COMPLETED', 'FAILED')
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('revenue_rollups')
@@ -0,0 +1,74 @@
+"""Add units_ledger and units_balance_snapshots, drop users.units
+
+Revision ID: c3a9e5f1b7d2
+Revises: b8e1f3a7c5d9
+Create Date: 2026-10-18 22:14:03.527190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e5f1b7d2'
+down_revision: Union[str, None] = 'b8e1f3a7c5d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('units_ledger',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('transaction_id', sa.Uuid(), nullable=False),
+    sa.Column('entry_type', sa.Enum('RECHARGE', 'USAGE', 'ADJUSTMENT', name='unitsentrytype'), nullable=False),
+    sa.Column('account', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=20, scale=3), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transaction_id', 'account', name='uq_units_ledger_transaction_account')
+    )
+    op.create_index('ix_units_ledger_user_id_id', 'units_ledger', ['user_id', 'id'], unique=False)
+    op.create_table('units_balance_snapshots',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('as_of_entry_id', sa.BigInteger(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=20, scale=3), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'as_of_entry_id')
+    )
+    op.create_index(op.f('ix_units_balance_snapshots_as_of_entry_id'), 'units_balance_snapshots', ['as_of_entry_id'], unique=False)
+    # users.units venait du modèle sans migration : absente d'une base montée par `alembic upgrade`
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS units double precision NOT NULL DEFAULT 0")
+    # Solde d'ouverture : un ajustement par utilisateur reprend la valeur de users.units
+    # (MATERIALIZED : un seul transaction_id pour les deux jambes)
+    op.execute("""
+        WITH u AS MATERIALIZED (
+            SELECT id, units, gen_random_uuid() AS transaction_id FROM users WHERE units <> 0
+        )
+        INSERT INTO units_ledger (transaction_id, entry_type, account, user_id, amount, description, created_at)
+        SELECT u.transaction_id, 'ADJUSTMENT', leg.account,
+               CASE WHEN leg.account = 'user' THEN u.id END, leg.sign * round(u.units::numeric, 3),
+               'Solde d''ouverture (users.units)', timezone('utc', now())
+        FROM u CROSS JOIN (VALUES ('user', 1), ('system:adjustments', -1)) AS leg(account, sign)
+    """)
+    op.drop_column('users', 'units_flush_id')
+    op.drop_column('users', 'units')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('units', sa.Float(), nullable=False, server_default="0"))
+    op.add_column('users', sa.Column('units_flush_id', sa.Uuid(), nullable=True))
+    op.execute("""
+        UPDATE users u SET units = l.balance
+        FROM (SELECT user_id, sum(amount) AS balance FROM units_ledger WHERE user_id IS NOT NULL GROUP BY user_id) l
+        WHERE u.id = l.user_id
+    """)
+    op.drop_index(op.f('ix_units_balance_snapshots_as_of_entry_id'), table_name='units_balance_snapshots')
+    op.drop_table('units_balance_snapshots')
+    op.drop_index('ix_units_ledger_user_id_id', table_name='units_ledger')
+    op.drop_table('units_ledger')
+    sa.Enum(name='unitsentrytype').drop(op.get_bind(), checkfirst=True)
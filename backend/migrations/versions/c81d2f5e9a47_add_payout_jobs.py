@@ -0,0 +1,50 @@
+"""Add payout_jobs and recharges.tx_id
+
+Revision ID: c81d2f5e9a47
+Revises: a3f4c8e1b6d0
+Create Date: 2026-10-18 12:41:09.773215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81d2f5e9a47'
+down_revision: Union[str, None] = 'a3f4c8e1b6d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('payout_jobs',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('recharge_id', sa.Uuid(), nullable=False),
+    sa.Column('destination_address', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('amount_usdc', sa.Float(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'SUCCEEDED', 'FAILED', name='payoutjobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('tx_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['recharge_id'], ['recharges.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('recharge_id')
+    )
+    op.create_index(
+        'ix_payout_jobs_due', 'payout_jobs', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')")
+    )
+    op.add_column('recharges', sa.Column('tx_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('recharges', 'tx_id')
+    op.drop_index('ix_payout_jobs_due', table_name='payout_jobs')
+    op.drop_table('payout_jobs')
+    sa.Enum(name='payoutjobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,72 @@
+"""Add usage_charges and usage_settlements
+
+Revision ID: d4f6b8a0c2e1
+Revises: c2e8a5d1f9b4
+Create Date: 2026-10-18 18:52:44.615307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8a0c2e1'
+down_revision: Union[str, None] = 'c2e8a5d1f9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('usage_settlements',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('circle_wallet_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('amount_usdc', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('charge_count', sa.Integer(), nullable=False),
+    sa.Column('window_start', sa.DateTime(), nullable=False),
+    sa.Column('window_end', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'SUCCEEDED', 'FAILED', name='usagesettlementstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('tx_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_usage_settlements_user_created_at', 'usage_settlements', ['user_id', 'created_at'], unique=False)
+    op.create_index(
+        'ix_usage_settlements_due', 'usage_settlements', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')")
+    )
+    op.create_table('usage_charges',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('model_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('tokens_consumed', sa.Integer(), nullable=False),
+    sa.Column('amount_usdc', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('settlement_id', sa.Uuid(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['settlement_id'], ['usage_settlements.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_usage_charges_unsettled', 'usage_charges', ['user_id', 'created_at'], unique=False,
+        postgresql_where=sa.text('settlement_id IS NULL')
+    )
+    op.create_index('ix_usage_charges_settlement_id', 'usage_charges', ['settlement_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usage_charges_settlement_id', table_name='usage_charges')
+    op.drop_index('ix_usage_charges_unsettled', table_name='usage_charges')
+    op.drop_table('usage_charges')
+    op.drop_index('ix_usage_settlements_due', table_name='usage_settlements')
+    op.drop_index('ix_usage_settlements_user_created_at', table_name='usage_settlements')
+    op.drop_table('usage_settlements')
+    sa.Enum(name='usagesettlementstatus').drop(op.get_bind(), checkfirst=True)
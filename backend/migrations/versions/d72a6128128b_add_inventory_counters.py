@@ -0,0 +1,36 @@
+"""Add inventory_counters
+
+Revision ID: d72a6128128b
+Revises: 20fcb5ead4ff
+Create Date: 2026-10-18 09:12:41.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd72a6128128b'
+down_revision: Union[str, None] = '20fcb5ead4ff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('inventory_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reserved_usdc', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Le compteur démarre à la somme des réservations déjà présentes
+    op.execute(
+        "INSERT INTO inventory_counters (id, reserved_usdc) "
+        "SELECT 1, COALESCE(SUM(amount_usdc), 0) FROM inventory_reservations"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_counters')
@@ -0,0 +1,34 @@
+"""Replace model_prices_version_seq with the single-row model_catalog_version
+
+Revision ID: d7b3f9c1e5a8
+Revises: c3a9e5f1b7d2
+Create Date: 2026-10-19 09:41:26.380415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3f9c1e5a8'
+down_revision: Union[str, None] = 'c3a9e5f1b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('model_catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO model_catalog_version (id, version) SELECT 1, coalesce(max(version), 0) FROM model_prices")
+    op.execute("DROP SEQUENCE model_prices_version_seq")
+
+
+def downgrade() -> None:
+    op.execute("CREATE SEQUENCE model_prices_version_seq")
+    op.execute("SELECT setval('model_prices_version_seq', version + 1, false) FROM model_catalog_version")
+    op.drop_table('model_catalog_version')
@@ -0,0 +1,29 @@
+"""Restore ON DELETE CASCADE on recharges.user_id
+
+Revision ID: e2c7a9d4b6f1
+Revises: d7b3f9c1e5a8
+Create Date: 2026-10-19 14:02:51.730218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7a9d4b6f1'
+down_revision: Union[str, None] = 'd7b3f9c1e5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 4e9dff43c6d4 avait recréé la clé sans ondelete : la suppression d'un utilisateur
+    # (DELETE direct de AsyncUserRepository.delete) échouait dès qu'il avait des recharges
+    op.drop_constraint('recharges_user_id_fkey', 'recharges', type_='foreignkey')
+    op.create_foreign_key('recharges_user_id_fkey', 'recharges', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('recharges_user_id_fkey', 'recharges', type_='foreignkey')
+    op.create_foreign_key('recharges_user_id_fkey', 'recharges', 'users', ['user_id'], ['id'])
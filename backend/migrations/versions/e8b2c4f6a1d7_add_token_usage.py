@@ -0,0 +1,41 @@
+"""Add token_usage (partitioned by month on created_at)
+
+Revision ID: e8b2c4f6a1d7
+Revises: d4f6b8a0c2e1
+Create Date: 2026-10-18 19:40:12.208841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c4f6a1d7'
+down_revision: Union[str, None] = 'd4f6b8a0c2e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les partitions mensuelles (token_usage_pYYYYMM) sont créées à la demande par l'ingestion
+    # ou à l'avance : python -m backend.services.usage_ingestion --ensure-partitions 3
+    op.create_table('token_usage',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('model_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('tokens_consumed', sa.Integer(), nullable=False),
+    sa.Column('cost_usdc', sa.Numeric(precision=18, scale=6), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_token_usage_user_created_at', 'token_usage', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Supprime aussi toutes les partitions
+    op.drop_index('ix_token_usage_user_created_at', table_name='token_usage')
+    op.drop_table('token_usage')
@@ -0,0 +1,28 @@
+"""Add users.token_version
+
+Revision ID: f3b9d2a6c8e4
+Revises: e5a1b7c3d9f2
+Create Date: 2026-10-18 15:26:51.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2a6c8e4'
+down_revision: Union[str, None] = 'e5a1b7c3d9f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tous les utilisateurs existants démarrent en version 0
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,43 @@
+"""Bound units balance snapshots by transaction ID instead of entry ID
+
+Revision ID: f6d1a3c8e9b2
+Revises: e2c7a9d4b6f1
+Create Date: 2026-10-19 16:37:12.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d1a3c8e9b2'
+down_revision: Union[str, None] = 'e2c7a9d4b6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les lignes existantes prennent le txid de la migration, déjà terminé pour la première passe
+    op.add_column('units_ledger', sa.Column(
+        'txid', sa.BigInteger(), nullable=False,
+        server_default=sa.text('CAST(CAST(pg_current_xact_id() AS text) AS bigint)'),
+    ))
+    op.create_index(op.f('ix_units_ledger_txid'), 'units_ledger', ['txid'], unique=False)
+    op.create_index('ix_units_ledger_user_id_txid', 'units_ledger', ['user_id', 'txid'], unique=False)
+    # Instantanés bornés par ID d'écriture : données dérivées, la passe suivante les reconstruit
+    op.execute('DELETE FROM units_balance_snapshots')
+    op.drop_index(op.f('ix_units_balance_snapshots_as_of_entry_id'), table_name='units_balance_snapshots')
+    op.alter_column('units_balance_snapshots', 'as_of_entry_id', new_column_name='as_of_xid')
+    op.create_index(op.f('ix_units_balance_snapshots_as_of_xid'), 'units_balance_snapshots', ['as_of_xid'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM units_balance_snapshots')
+    op.drop_index(op.f('ix_units_balance_snapshots_as_of_xid'), table_name='units_balance_snapshots')
+    op.alter_column('units_balance_snapshots', 'as_of_xid', new_column_name='as_of_entry_id')
+    op.create_index(op.f('ix_units_balance_snapshots_as_of_entry_id'), 'units_balance_snapshots', ['as_of_entry_id'], unique=False)
+    op.drop_index('ix_units_ledger_user_id_txid', table_name='units_ledger')
+    op.drop_index(op.f('ix_units_ledger_txid'), table_name='units_ledger')
+    op.drop_column('units_ledger', 'txid')
@@ -0,0 +1,32 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from sqlmodel import SQLModel, Field
+
+
+class EmailStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(SQLModel, table=True):
+    """
+    Email transactionnel à envoyer (OTP, ...). Les requêtes HTTP ne font qu'insérer une ligne ;
+    l'envoi SMTP est fait par le worker d'emails. Le corps est vidé une fois l'email envoyé.
+    """
+    __tablename__ = "email_outbox" # pyright: ignore
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    to_email: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    body: str
+    status: EmailStatus = Field(default=EmailStatus.PENDING)
+    attempts: int = Field(default=0)
+    # Prochaine tentative (ou fin du bail pendant l'envoi)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    sent_at: Optional[datetime] = Field(default=None)
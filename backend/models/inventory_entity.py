@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
 #EXPIRATION_DELAY_MINUTES = 10
 
@@ -14,4 +15,15 @@ class InventoryReservation(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     amount_usdc: float = Field(description="Montant bloqué")
     recharge_id: UUID = Field(index=True) # Lien vers la tentative d'achat
-    expires_at: datetime = Field(default_factory=get_expiration_time, index=True)
\ No newline at end of file
+    expires_at: datetime = Field(default_factory=get_expiration_time, index=True)
+
+class InventoryCounter(SQLModel, table=True):
+    """
+    Total courant des réservations présentes dans inventory_reservations (une seule ligne, id=1).
+    Maintenu dans la même transaction que chaque insertion/suppression de réservation,
+    pour que la vérification de stock soit une lecture par clé primaire.
+    """
+    __tablename__ = "inventory_counters"
+
+    id: int = Field(default=1, primary_key=True)
+    reserved_usdc: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=6)
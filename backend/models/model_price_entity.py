@@ -0,0 +1,32 @@
+from decimal import Decimal
+from datetime import datetime, timezone
+from sqlmodel import SQLModel, Field
+
+
+class ModelPrice(SQLModel, table=True):
+    """
+    Tarif d'un modèle, en USDC par million de tokens d'entrée et de sortie.
+    Chaque écriture prend le numéro suivant de ModelCatalogVersion, dans sa transaction :
+    ce numéro identifie l'état du catalogue, que les process gardent en mémoire (voir PriceCatalog).
+    Un modèle retiré est désactivé (active=False) plutôt que supprimé, pour faire avancer la version.
+    """
+    __tablename__ = "model_prices" # pyright: ignore
+
+    model_name: str = Field(primary_key=True, max_length=100)
+    input_usdc_per_million: Decimal = Field(max_digits=18, decimal_places=6)
+    output_usdc_per_million: Decimal = Field(max_digits=18, decimal_places=6)
+    active: bool = Field(default=True)
+    version: int = Field(index=True)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ModelCatalogVersion(SQLModel, table=True):
+    """
+    Version du catalogue de tarifs (une seule ligne, id = 1). Incrémentée par UPDATE dans la
+    transaction de chaque écriture : le verrou de ligne ordonne les écrivains, une version lue
+    n'est donc visible qu'une fois toutes les écritures de numéro inférieur validées.
+    """
+    __tablename__ = "model_catalog_version" # pyright: ignore
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
@@ -0,0 +1,34 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from sqlmodel import SQLModel, Field
+
+
+class PayoutJobStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class PayoutJob(SQLModel, table=True):
+    """
+    Virement USDC à effectuer depuis le Master Wallet suite à un paiement Stripe réussi.
+    Un seul job par recharge (contrainte d'unicité) : deux webhooks concurrents ne peuvent pas
+    déclencher deux virements. L'ID du job sert de clé d'idempotence Circle.
+    """
+    __tablename__ = "payout_jobs" # pyright: ignore
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    recharge_id: UUID = Field(foreign_key="recharges.id", unique=True, ondelete="CASCADE")
+    destination_address: str = Field(max_length=255)
+    amount_usdc: float = Field(description="Montant USDC à livrer")
+    status: PayoutJobStatus = Field(default=PayoutJobStatus.PENDING)
+    attempts: int = Field(default=0)
+    # Prochaine tentative (ou fin du bail pendant le traitement)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    tx_id: Optional[str] = Field(default=None, max_length=255)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = Field(default=None)
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from .user_entity import User
 
@@ -17,9 +18,15 @@ class RechargeStatus(str, Enum):
 
 class Recharges(SQLModel, table=True):
     __tablename__ = "recharges" # pyright: ignore
+    # Historique paginé par clé (user_id, created_at, id) ; couvre aussi les recherches par user_id seul
+    # Export comptable par plage de dates, dans l'ordre (created_at, id)
+    __table_args__ = (
+        Index("ix_recharges_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_recharges_created_at_id", "created_at", "id"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    user_id: UUID = Field(foreign_key="users.id", nullable=False, index=True, ondelete="CASCADE")
+    user_id: UUID = Field(foreign_key="users.id", nullable=False, ondelete="CASCADE")
     
     # --- Logique Métier (1 Unit = 0.1 USDC) ---
     units_granted: int = Field(description="Nombre d'unités achetées")
@@ -35,6 +42,7 @@ class Recharges(SQLModel, table=True):
     # --- Technique ---
     stripe_payment_intent_id: str = Field(index=True)
     status: RechargeStatus = Field(default=RechargeStatus.PENDING)
+    tx_id: Optional[str] = Field(default=None, max_length=255, description="Transaction Circle du virement USDC")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     # Relation inverse
@@ -0,0 +1,27 @@
+from decimal import Decimal
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from .recharge_entity import RechargeStatus
+
+# Statuts suivis par les rollups (recharges terminées)
+ROLLUP_STATUSES = (RechargeStatus.COMPLETED, RechargeStatus.FAILED)
+
+
+class RevenueRollup(SQLModel, table=True):
+    """
+    Agrégats horaires des recharges par statut (date de création de la recharge).
+    Maintenus dans la transaction qui fait passer une recharge à COMPLETED ou FAILED,
+    et recalculables depuis recharges (backfill). Les vues journalières sont agrégées à la lecture.
+    """
+    __tablename__ = "revenue_rollups" # pyright: ignore
+
+    bucket_start: datetime = Field(primary_key=True, description="Début de l'heure (UTC)")
+    status: RechargeStatus = Field(primary_key=True)
+    recharge_count: int = Field(default=0)
+    units_granted: int = Field(default=0)
+    amount_usdc_value: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=6)
+    amount_base_eur: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=4)
+    service_fee_eur: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=4)
+    vat_amount_eur: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=4)
+    stripe_fee_eur: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=4)
+    total_paid_eur: Decimal = Field(default=Decimal("0"), max_digits=18, decimal_places=4)
@@ -0,0 +1,27 @@
+from decimal import Decimal
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class TokenUsage(SQLModel, table=True):
+    """
+    Journal des consommations de tokens (un événement par appel de modèle).
+    Table partitionnée par mois sur created_at : la rétention se fait en supprimant
+    des partitions entières (DROP TABLE) plutôt qu'avec des DELETE massifs.
+    Pas de clé étrangère vers users : l'ingestion se fait par COPY en gros volume.
+    """
+    __tablename__ = "token_usage" # pyright: ignore
+    __table_args__ = (
+        Index("ix_token_usage_user_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    # La clé de partitionnement doit faire partie de la clé primaire
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), primary_key=True)
+    user_id: UUID
+    model_name: str = Field(max_length=100)
+    tokens_consumed: int
+    cost_usdc: Decimal = Field(max_digits=18, decimal_places=6)
@@ -0,0 +1,76 @@
+from enum import Enum
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Column, Identity, Index, UniqueConstraint, text
+from sqlmodel import SQLModel, Field
+
+
+class UnitsEntryType(str, Enum):
+    RECHARGE = "recharge"
+    USAGE = "usage"
+    ADJUSTMENT = "adjustment"
+
+
+# Compte des utilisateurs (une ligne porte alors user_id) et contreparties système par type d'écriture
+USER_ACCOUNT = "user"
+SYSTEM_ACCOUNTS = {
+    UnitsEntryType.RECHARGE: "system:recharges",
+    UnitsEntryType.USAGE: "system:usage",
+    UnitsEntryType.ADJUSTMENT: "system:adjustments",
+}
+
+
+class UnitsLedgerEntry(SQLModel, table=True):
+    """
+    Grand livre des unités prépayées, en partie double et en ajout seul : chaque mouvement
+    (transaction_id) écrit une ligne sur le compte de l'utilisateur et sa contrepartie sur un
+    compte système, de somme nulle. Rien n'est jamais modifié ni supprimé ; une erreur se corrige
+    par un ajustement. transaction_id est l'ID de la recharge, du report de débits Redis ou de
+    l'ajustement : rejouer une écriture est sans effet.
+    Pas de clé étrangère vers users : l'historique survit à la suppression du compte.
+    txid est l'ID de la transaction Postgres qui a écrit la ligne : les instantanés de solde
+    se bornent par txid, pas par id (attribué avant le commit, dans un ordre qui n'est pas celui
+    de la visibilité).
+    """
+    __tablename__ = "units_ledger" # pyright: ignore
+    __table_args__ = (
+        UniqueConstraint("transaction_id", "account", name="uq_units_ledger_transaction_account"),
+        # Historique d'un utilisateur, paginé par ID
+        Index("ix_units_ledger_user_id_id", "user_id", "id"),
+        # Lecture du solde : écritures d'un utilisateur postérieures à son dernier instantané
+        Index("ix_units_ledger_user_id_txid", "user_id", "txid"),
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, Identity(), primary_key=True))
+    transaction_id: UUID
+    entry_type: UnitsEntryType
+    account: str = Field(max_length=32)
+    user_id: Optional[UUID] = Field(default=None)
+    # Milli-unités : même précision que le solde Redis
+    amount: Decimal = Field(max_digits=20, decimal_places=3)
+    description: Optional[str] = Field(default=None, max_length=255)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Rempli par Postgres à l'insertion ; indexé pour la plage d'une passe d'instantanés
+    txid: Optional[int] = Field(default=None, sa_column=Column(
+        BigInteger, nullable=False, index=True,
+        server_default=text("CAST(CAST(pg_current_xact_id() AS text) AS bigint)"),
+    ))
+
+
+class UnitsBalanceSnapshot(SQLModel, table=True):
+    """
+    Solde d'un utilisateur arrêté aux écritures de txid < as_of_xid du grand livre.
+    as_of_xid est l'horizon xmin de la passe : toute transaction de txid inférieur était terminée,
+    aucune écriture ne peut plus entrer dans l'instantané après coup.
+    Solde courant = dernier instantané + somme des écritures de txid >= as_of_xid de l'utilisateur.
+    Une passe d'instantanés couvre toutes les écritures sous son as_of_xid : la plus grande valeur
+    de la table marque où reprendre la suivante.
+    """
+    __tablename__ = "units_balance_snapshots" # pyright: ignore
+
+    user_id: UUID = Field(primary_key=True)
+    as_of_xid: int = Field(sa_column=Column(BigInteger, primary_key=True, index=True))
+    balance: Decimal = Field(max_digits=20, decimal_places=3)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
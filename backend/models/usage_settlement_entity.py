@@ -0,0 +1,71 @@
+from enum import Enum
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from sqlalchemy import Index, text
+from sqlmodel import SQLModel, Field
+
+
+class UsageSettlementStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class UsageSettlement(SQLModel, table=True):
+    """
+    Règlement on-chain groupé des charges d'usage d'un utilisateur (un transfert USDC
+    wallet utilisateur -> Master Wallet par fenêtre). L'ID sert de clé d'idempotence Circle.
+    """
+    __tablename__ = "usage_settlements" # pyright: ignore
+    __table_args__ = (
+        Index("ix_usage_settlements_user_created_at", "user_id", "created_at"),
+        Index(
+            "ix_usage_settlements_due", "next_attempt_at",
+            postgresql_where=text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE")
+    circle_wallet_id: str = Field(max_length=255, description="Wallet Circle débité")
+    amount_usdc: Decimal = Field(max_digits=18, decimal_places=6)
+    charge_count: int
+    # Date de la première et de la dernière charge réglées
+    window_start: datetime
+    window_end: datetime
+    status: UsageSettlementStatus = Field(default=UsageSettlementStatus.PENDING)
+    attempts: int = Field(default=0)
+    # Prochaine tentative (ou fin du bail pendant le transfert)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    tx_id: Optional[str] = Field(default=None, max_length=255)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = Field(default=None)
+
+
+class UsageCharge(SQLModel, table=True):
+    """
+    Charge d'usage (tokens consommés) en attente de règlement. Rien ne part sur la blockchain
+    à l'insertion : les charges sont rattachées à un UsageSettlement à la clôture de la fenêtre,
+    ce qui relie chaque événement de facturation à la transaction qui l'a réglé.
+    """
+    __tablename__ = "usage_charges" # pyright: ignore
+    __table_args__ = (
+        # Charges non encore réglées, regroupées par utilisateur à la clôture
+        Index(
+            "ix_usage_charges_unsettled", "user_id", "created_at",
+            postgresql_where=text("settlement_id IS NULL"),
+        ),
+        Index("ix_usage_charges_settlement_id", "settlement_id"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE")
+    model_name: str = Field(max_length=100)
+    tokens_consumed: int
+    amount_usdc: Decimal = Field(max_digits=18, decimal_places=6)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    settlement_id: Optional[UUID] = Field(default=None, foreign_key="usage_settlements.id")
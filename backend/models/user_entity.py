@@ -32,7 +32,11 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     wallet: Optional["Wallet"] = Relationship(back_populates="user", cascade_delete=True)
     recharges: list["Recharges"] = Relationship(back_populates="user", cascade_delete=True)
-    units: float = Field(default=0.0)
+    # Le solde d'unités est tenu par le grand livre units_ledger ; ce compteur numérote les crédits
+    # pour leur report dans le solde Redis (voir UnitsBalanceService)
+    units_credit_seq: int = Field(default=0)
+    # Incrémentée à chaque changement de mot de passe / rôle : invalide les JWT déjà émis
+    token_version: int = Field(default=0)
 
     class Config:
         json_schema_extra = {
@@ -0,0 +1,32 @@
+from enum import Enum
+from typing import Optional
+from datetime import datetime, timezone
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import SQLModel, Field
+
+
+class WebhookEventStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class WebhookEvent(SQLModel, table=True):
+    """
+    Journal durable des événements Stripe reçus.
+    La clé primaire est l'ID d'événement Stripe : les renvois de Stripe sont dédupliqués à l'insertion.
+    """
+    __tablename__ = "webhook_events" # pyright: ignore
+
+    id: str = Field(primary_key=True, max_length=255, description="ID de l'événement Stripe (evt_...)")
+    type: str = Field(max_length=100)
+    payload: dict = Field(sa_column=Column(JSONB, nullable=False), description="Événement brut")
+    status: WebhookEventStatus = Field(default=WebhookEventStatus.PENDING)
+    attempts: int = Field(default=0)
+    # Prochaine tentative (ou fin du bail pendant le traitement)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    processed_at: Optional[datetime] = Field(default=None)
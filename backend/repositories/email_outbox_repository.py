@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlmodel import update
+from backend.models.email_outbox_entity import EmailOutbox, EmailStatus
+from backend.repositories.lease_queue_repository import LeaseQueueRepository
+
+
+class EmailOutboxRepository(LeaseQueueRepository[EmailOutbox]):
+    """
+    Repository de la file des emails sortants.
+    Les workers se partagent les emails grâce à FOR UPDATE SKIP LOCKED (voir LeaseQueueRepository).
+    """
+
+    model = EmailOutbox
+    pending_status = EmailStatus.PENDING
+    processing_status = EmailStatus.SENDING
+    failed_status = EmailStatus.FAILED
+
+    def enqueue(self, to_email: str, subject: str, body: str, commit: bool = True) -> EmailOutbox:
+        email = EmailOutbox(to_email=to_email, subject=subject, body=body)
+        self.session.add(email)
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return email
+
+    def mark_sent(self, email_ids: list[UUID]):
+        """Marque un lot d'emails comme envoyés et efface leur corps (il contient l'OTP)."""
+        if not email_ids:
+            return
+        statement = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(email_ids))  # pyright: ignore
+            .values(status=EmailStatus.SENT, sent_at=datetime.now(timezone.utc), body="", last_error=None)
+        )
+        self.session.exec(statement)
+        self.session.commit()
@@ -1,31 +1,169 @@
-from sqlmodel import Session, select, func, delete
+from sqlmodel import Session, select, func, delete, update, text
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 from decimal import Decimal
-from uuid import UUID
-from backend.models.inventory_entity import InventoryReservation
+from uuid import UUID, uuid4
+from backend.models.inventory_entity import InventoryReservation, InventoryCounter, get_expiration_time
+
+COUNTER_ID = 1
+
+# Incrément conditionnel du compteur + insertion de la réservation, en une seule requête
+TRY_RESERVE_SQL = """
+    WITH bumped AS (
+        UPDATE inventory_counters
+        SET reserved_usdc = reserved_usdc + :amount
+        WHERE id = :counter_id AND reserved_usdc + :amount <= :available
+        RETURNING id
+    )
+    INSERT INTO inventory_reservations (id, amount_usdc, recharge_id, expires_at)
+    SELECT :reservation_id, :amount, :recharge_id, :expires_at FROM bumped
+    RETURNING id
+"""
 
 class InventoryRepository:
     def __init__(self, session: Session):
         self.session = session
 
+    def _bump_counter(self, delta: Decimal):
+        # UPDATE atomique : pas de lecture préalable, la ligne n'est verrouillée que le temps de la transaction
+        statement = (
+            update(InventoryCounter)
+            .where(InventoryCounter.id == COUNTER_ID)
+            .values(reserved_usdc=InventoryCounter.reserved_usdc + delta)
+        )
+        self.session.exec(statement)
+
     def create_reservation(self, amount_usdc: float, recharge_id: UUID):
         reservation = InventoryReservation(amount_usdc=amount_usdc, recharge_id=recharge_id)
         self.session.add(reservation)
+        self._bump_counter(Decimal(str(amount_usdc)))
         self.session.commit()
         return reservation
 
+    def try_reserve(self, amount_usdc: Decimal, recharge_id: UUID, available_usdc: Decimal, commit: bool = True) -> bool:
+        """
+        Réserve du stock de manière atomique, en une seule requête.
+        Le compteur n'est incrémenté que si (réservé + montant) <= disponible ; la réservation
+        n'est insérée que si l'incrément a eu lieu. Le verrou de ligne pris par l'UPDATE
+        sérialise les checkouts concurrents : impossible de survendre.
+        Retourne False en cas de rupture de stock.
+        """
+        statement = text(TRY_RESERVE_SQL)
+        result = self.session.execute(statement, {
+            "amount": amount_usdc,
+            "counter_id": COUNTER_ID,
+            "available": available_usdc,
+            "reservation_id": uuid4(),
+            "recharge_id": recharge_id,
+            "expires_at": get_expiration_time(),
+        }).first()
+        if commit:
+            self.session.commit()
+        return result is not None
+
     def get_total_reserved_amount(self) -> Decimal:
-        # Somme des réservations non expirées
-        now = datetime.now(timezone.utc)
-        statement = select(func.sum(InventoryReservation.amount_usdc)).where(
-            InventoryReservation.expires_at > now
-        )
-        result = self.session.exec(statement).one()
+        # Lecture du compteur maintenu (O(1), indépendant de la taille de la table)
+        statement = select(InventoryCounter.reserved_usdc).where(InventoryCounter.id == COUNTER_ID)
+        result = self.session.exec(statement).first()
         return Decimal(str(result)) if result else Decimal("0.00")
 
-    def delete_reservation_by_recharge_id(self, recharge_id: UUID):
+    def delete_reservation_by_recharge_id(self, recharge_id: UUID, commit: bool = True):
         statement = delete(InventoryReservation).where(
             InventoryReservation.recharge_id == recharge_id
+        ).returning(InventoryReservation.amount_usdc)
+        amounts = self.session.execute(statement).scalars().all()
+        if amounts:
+            self._bump_counter(-sum(Decimal(str(a)) for a in amounts))
+        if commit:
+            self.session.commit()
+
+    def find_expired(self, batch_size: int) -> list[UUID]:
+        """recharge_id des réservations expirées, les plus anciennes d'abord (le reaper est seul à les traiter)."""
+        now = datetime.now(timezone.utc)
+        statement = (
+            select(InventoryReservation.recharge_id)
+            .where(InventoryReservation.expires_at <= now)
+            .order_by(InventoryReservation.expires_at)
+            .limit(batch_size)
+        )
+        return list(self.session.exec(statement).all())
+
+    def release(self, recharge_ids: list[UUID], commit: bool = True) -> int:
+        """Supprime les réservations de ces recharges et libère leur montant dans le compteur."""
+        if not recharge_ids:
+            return 0
+        statement = delete(InventoryReservation).where(
+            InventoryReservation.recharge_id.in_(recharge_ids)  # pyright: ignore
+        ).returning(InventoryReservation.amount_usdc)
+        amounts = self.session.execute(statement).scalars().all()
+        if amounts:
+            self._bump_counter(-sum(Decimal(str(a)) for a in amounts))
+        if commit:
+            self.session.commit()
+        return len(amounts)
+
+    def extend(self, recharge_ids: list[UUID], expires_at: datetime, commit: bool = True):
+        """Prolonge les réservations de recharges payées (ou en cours de paiement) : le stock reste garanti."""
+        if not recharge_ids:
+            return
+        statement = (
+            update(InventoryReservation)
+            .where(InventoryReservation.recharge_id.in_(recharge_ids))  # pyright: ignore
+            .values(expires_at=expires_at)
         )
         self.session.exec(statement)
-        self.session.commit()
\ No newline at end of file
+        if commit:
+            self.session.commit()
+
+    def get_oldest_expired_at(self) -> datetime | None:
+        """Date d'expiration de la plus ancienne réservation expirée encore en base (retard du reaper)."""
+        now = datetime.now(timezone.utc)
+        statement = select(func.min(InventoryReservation.expires_at)).where(
+            InventoryReservation.expires_at <= now
+        )
+        return self.session.exec(statement).first()
+
+
+class AsyncInventoryRepository:
+    """Version asynchrone des opérations de réservation du chemin de checkout."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _bump_counter(self, delta: Decimal):
+        statement = (
+            update(InventoryCounter)
+            .where(InventoryCounter.id == COUNTER_ID)
+            .values(reserved_usdc=InventoryCounter.reserved_usdc + delta)
+        )
+        await self.session.execute(statement)
+
+    async def try_reserve(self, amount_usdc: Decimal, recharge_id: UUID, available_usdc: Decimal, commit: bool = True) -> bool:
+        """Voir InventoryRepository.try_reserve."""
+        result = await self.session.execute(text(TRY_RESERVE_SQL), {
+            "amount": amount_usdc,
+            "counter_id": COUNTER_ID,
+            "available": available_usdc,
+            "reservation_id": uuid4(),
+            "recharge_id": recharge_id,
+            "expires_at": get_expiration_time(),
+        })
+        reserved = result.first() is not None
+        if commit:
+            await self.session.commit()
+        return reserved
+
+    async def get_total_reserved_amount(self) -> Decimal:
+        statement = select(InventoryCounter.reserved_usdc).where(InventoryCounter.id == COUNTER_ID)
+        result = (await self.session.exec(statement)).first()
+        return Decimal(str(result)) if result else Decimal("0.00")
+
+    async def delete_reservation_by_recharge_id(self, recharge_id: UUID, commit: bool = True):
+        statement = delete(InventoryReservation).where(
+            InventoryReservation.recharge_id == recharge_id
+        ).returning(InventoryReservation.amount_usdc)
+        amounts = (await self.session.execute(statement)).scalars().all()
+        if amounts:
+            await self._bump_counter(-sum(Decimal(str(a)) for a in amounts))
+        if commit:
+            await self.session.commit()
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, ClassVar, Generic, TypeVar
+from sqlmodel import Session, SQLModel, select, update, or_
+
+RowT = TypeVar("RowT", bound=SQLModel)
+
+
+class LeaseQueueRepository(Generic[RowT]):
+    """
+    Base des files de travail en table (webhooks, virements, emails, règlements).
+    Chaque ligne porte status, attempts, last_error et next_attempt_at (prochaine tentative,
+    ou fin du bail pendant le traitement). Les workers se partagent les lignes grâce à
+    FOR UPDATE SKIP LOCKED ; une ligne en cours dont le bail a expiré (worker mort) est reprise.
+    """
+
+    model: ClassVar[type]
+    pending_status: ClassVar[Enum]
+    processing_status: ClassVar[Enum]
+    failed_status: ClassVar[Enum]
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def claim_batch(self, limit: int, lease_seconds: float) -> list[RowT]:
+        """
+        Réserve jusqu'à `limit` lignes pour ce worker : statut « en cours », tentative comptée, bail posé.
+        Les lignes sont retournées détachées de la session, attributs chargés : le worker les lit
+        pendant le traitement, une fois la session fermée.
+        """
+        model: Any = self.model
+        now = datetime.now(timezone.utc)
+        claimable = (
+            select(model.id)
+            .where(
+                or_(model.status == self.pending_status, model.status == self.processing_status),
+                model.next_attempt_at <= now,
+            )
+            .order_by(model.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(model)
+            .where(model.id.in_(claimable))
+            .values(
+                status=self.processing_status,
+                attempts=model.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+            .returning(model)
+        )
+        rows = list(self.session.execute(statement).scalars().all())
+        # Détachées avant le commit, qui sinon les expirerait : leur lecture hors session échouerait
+        for row in rows:
+            self.session.expunge(row)
+        self.session.commit()
+        return rows
+
+    def mark_failed(self, row_id: Any, error: str, retry_in_seconds: float | None):
+        """Replanifie la ligne, ou l'abandonne (statut d'échec) si retry_in_seconds vaut None."""
+        model: Any = self.model
+        values: dict = {"last_error": error[:2000]}
+        if retry_in_seconds is None:
+            values["status"] = self.failed_status
+        else:
+            values["status"] = self.pending_status
+            values["next_attempt_at"] = datetime.now(timezone.utc) + timedelta(seconds=retry_in_seconds)
+        statement = update(model).where(model.id == row_id).values(**values)
+        self.session.exec(statement)
+        self.session.commit()
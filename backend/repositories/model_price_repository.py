@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlmodel import Session, select, update
+from sqlalchemy.dialects.postgresql import insert
+from backend.models.model_price_entity import ModelPrice, ModelCatalogVersion
+
+
+class ModelPriceRepository:
+    """Repository du catalogue de tarifs des modèles."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_version(self) -> int:
+        """Version courante du catalogue (ligne unique de model_catalog_version)."""
+        return self.session.exec(select(ModelCatalogVersion.version).where(ModelCatalogVersion.id == 1)).one()
+
+    def get_all(self, active_only: bool = False) -> list[ModelPrice]:
+        statement = select(ModelPrice).order_by(ModelPrice.model_name)
+        if active_only:
+            statement = statement.where(ModelPrice.active == True)  # noqa: E712
+        return list(self.session.exec(statement).all())
+
+    def upsert(
+        self,
+        model_name: str,
+        input_usdc_per_million: Decimal,
+        output_usdc_per_million: Decimal,
+        active: bool = True,
+    ) -> ModelPrice:
+        """
+        Crée ou met à jour le tarif d'un modèle ; la version du catalogue avance dans la même
+        transaction (le verrou de la ligne de version sérialise les écritures concurrentes).
+        """
+        version = self.session.execute(
+            update(ModelCatalogVersion)
+            .where(ModelCatalogVersion.id == 1)  # pyright: ignore
+            .values(version=ModelCatalogVersion.version + 1)
+            .returning(ModelCatalogVersion.version)
+        ).scalar_one()
+        values = {
+            "input_usdc_per_million": input_usdc_per_million,
+            "output_usdc_per_million": output_usdc_per_million,
+            "active": active,
+            "version": version,
+            "updated_at": datetime.now(timezone.utc),
+        }
+        statement = (
+            insert(ModelPrice)
+            .values(model_name=model_name, **values)
+            .on_conflict_do_update(index_elements=["model_name"], set_=values)
+            .returning(ModelPrice)
+        )
+        price = self.session.execute(statement).scalars().one()
+        self.session.commit()
+        return price
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+from sqlmodel import update
+from sqlalchemy.dialects.postgresql import insert
+from backend.models.payout_job_entity import PayoutJob, PayoutJobStatus
+from backend.repositories.lease_queue_repository import LeaseQueueRepository
+
+
+class PayoutJobRepository(LeaseQueueRepository[PayoutJob]):
+    """
+    Repository de la file des virements USDC.
+    Les workers se partagent les jobs grâce à FOR UPDATE SKIP LOCKED (voir LeaseQueueRepository).
+    Un job PROCESSING dont le bail a expiré (worker mort en plein virement) est repris :
+    la clé d'idempotence Circle évite le double envoi. Un job FAILED attend une vérification manuelle.
+    """
+
+    model = PayoutJob
+    pending_status = PayoutJobStatus.PENDING
+    processing_status = PayoutJobStatus.PROCESSING
+    failed_status = PayoutJobStatus.FAILED
+
+    def enqueue(self, recharge_id: UUID, destination_address: str, amount_usdc: float, commit: bool = True) -> bool:
+        """Crée le job de virement d'une recharge. Retourne False s'il existe déjà."""
+        statement = insert(PayoutJob).values(
+            id=uuid4(),
+            recharge_id=recharge_id,
+            destination_address=destination_address,
+            amount_usdc=amount_usdc,
+            status=PayoutJobStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc),
+            created_at=datetime.now(timezone.utc),
+        ).on_conflict_do_nothing(index_elements=["recharge_id"])
+        result = self.session.exec(statement)
+        if commit:
+            self.session.commit()
+        return result.rowcount > 0
+
+    def mark_succeeded(self, job_id: UUID, tx_id: str, commit: bool = True):
+        statement = (
+            update(PayoutJob)
+            .where(PayoutJob.id == job_id)
+            .values(status=PayoutJobStatus.SUCCEEDED, tx_id=tx_id, completed_at=datetime.now(timezone.utc), last_error=None)
+        )
+        self.session.exec(statement)
+        if commit:
+            self.session.commit()
@@ -1,19 +1,63 @@
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional
 from uuid import UUID
-from sqlmodel import Session, select
-#from datetime import datetime, timezone
+from sqlalchemy import tuple_
+from sqlmodel import Session, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
 from backend.models.recharge_entity import Recharges, RechargeStatus
- 
+from backend.models.payout_job_entity import PayoutJob
+from backend.models.inventory_entity import InventoryReservation
+from backend.repositories.revenue_rollup_repository import RevenueRollupRepository
+
+# Colonnes de l'export comptable, dans l'ordre des colonnes CSV
+EXPORT_COLUMNS = (
+    Recharges.id,
+    Recharges.user_id,
+    Recharges.status,
+    Recharges.created_at,
+    Recharges.units_granted,
+    Recharges.amount_usdc_value,
+    Recharges.amount_base_eur,
+    Recharges.service_fee_eur,
+    Recharges.vat_amount_eur,
+    Recharges.stripe_fee_eur,
+    Recharges.total_paid_eur,
+    Recharges.stripe_payment_intent_id,
+    Recharges.tx_id,
+)
+
+
+def export_statement(
+    status: RechargeStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+):
+    """Requête de l'export : lignes brutes (pas d'objets ORM), ordre stable (created_at, id)."""
+    statement = select(*EXPORT_COLUMNS)
+    if status is not None:
+        statement = statement.where(Recharges.status == status)
+    if created_from is not None:
+        statement = statement.where(Recharges.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(Recharges.created_at < created_to)
+    return statement.order_by(Recharges.created_at, Recharges.id)  # pyright: ignore
+
 
 class RechargeRepository:
     def __init__(self, session: Session):
         self.session = session
 
-    def create(self, recharge: Recharges) -> Recharges:
-        """Crée une nouvelle recharge en base de données."""
+    def create(self, recharge: Recharges, commit: bool = True) -> Recharges:
+        """
+        Crée une nouvelle recharge en base de données.
+        Si commit=False, la recharge est seulement flushée : la transaction reste ouverte.
+        """
         self.session.add(recharge)
-        self.session.commit()
-        self.session.refresh(recharge)
+        if commit:
+            self.session.commit()
+            self.session.refresh(recharge)
+        else:
+            self.session.flush()
         return recharge
 
     def get_by_id(self, recharge_id: UUID) -> Optional[Recharges]:
@@ -26,6 +70,21 @@ class RechargeRepository:
         statement = select(Recharges).offset(skip).limit(limit)
         return self.session.exec(statement).all()
 
+    def stream_for_export(
+        self,
+        batch_size: int,
+        status: RechargeStatus | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+    ) -> Iterator[list]:
+        """
+        Parcourt les recharges par lots via un curseur côté serveur (yield_per) :
+        mémoire constante, pas d'OFFSET, quelle que soit la taille de l'export.
+        """
+        statement = export_statement(status, created_from, created_to).execution_options(yield_per=batch_size)
+        for partition in self.session.execute(statement).partitions():
+            yield partition
+
     def get_by_user_id(self, user_id: UUID) -> List[Recharges]:
         """
         Récupère toutes les recharges liées à un utilisateur spécifique.
@@ -51,8 +110,11 @@ class RechargeRepository:
         self.session.refresh(recharge)
         return recharge
 
-    def update(self, recharge_id: UUID, update_data: dict) -> Optional[Recharges]:
-        """Met à jour une recharge avec un dictionnaire de données partiel."""
+    def update(self, recharge_id: UUID, update_data: dict, commit: bool = True) -> Optional[Recharges]:
+        """
+        Met à jour une recharge avec un dictionnaire de données partiel.
+        Si commit=False, la modification est seulement flushée dans la transaction en cours.
+        """
         recharge = self.get_by_id(recharge_id)
         if not recharge:
             return None
@@ -63,10 +125,43 @@ class RechargeRepository:
                 setattr(recharge, key, value)
 
         self.session.add(recharge)
-        self.session.commit()
-        self.session.refresh(recharge)
+        if commit:
+            self.session.commit()
+            self.session.refresh(recharge)
+        else:
+            self.session.flush()
         return recharge
 
+    def transition_status(
+        self, recharge_id: UUID, new_status: RechargeStatus, values: dict | None = None, commit: bool = True
+    ) -> bool:
+        """
+        Change le statut d'une recharge et met à jour les rollups de revenus dans la même transaction.
+        La ligne est verrouillée pour lire l'ancien statut : deux transitions concurrentes ne peuvent
+        pas compter la même recharge deux fois. Retourne False si le statut était déjà `new_status`.
+        """
+        statement = select(Recharges.status).where(Recharges.id == recharge_id).with_for_update()
+        old_status = self.session.exec(statement).first()
+        if old_status is None or old_status == new_status:
+            if commit:
+                self.session.commit()
+            return False
+        self.session.exec(
+            update(Recharges).where(Recharges.id == recharge_id).values(status=new_status, **(values or {}))  # pyright: ignore
+        )
+        RevenueRollupRepository(self.session).apply_transition(recharge_id, old_status, new_status)
+        if commit:
+            self.session.commit()
+        return True
+
+    def update_fields(self, recharge_id: UUID, values: dict, commit: bool = True) -> bool:
+        """Met à jour des colonnes par un UPDATE direct, sans relire la recharge."""
+        statement = update(Recharges).where(Recharges.id == recharge_id).values(**values)
+        result = self.session.exec(statement)
+        if commit:
+            self.session.commit()
+        return result.rowcount > 0
+
     def delete(self, recharge_id: UUID) -> bool:
         """Supprime une recharge."""
         recharge = self.get_by_id(recharge_id)
@@ -75,4 +170,146 @@ class RechargeRepository:
         
         self.session.delete(recharge)
         self.session.commit()
-        return True
\ No newline at end of file
+        return True
+
+    def _has_payout(self):
+        # Une recharge payée dont le virement est en file n'est jamais annulée
+        return select(PayoutJob.id).where(PayoutJob.recharge_id == Recharges.id).exists()
+
+    def cancel_pending(self, recharge_ids: list[UUID], commit: bool = True) -> int:
+        """
+        Passe en CANCELLED les recharges encore PENDING (et non payées) parmi celles données.
+        À n'appeler qu'une fois leur intent Stripe annulé : sinon le client pourrait encore payer.
+        """
+        if not recharge_ids:
+            return 0
+        statement = (
+            update(Recharges)
+            .where(Recharges.id.in_(recharge_ids), Recharges.status == RechargeStatus.PENDING)  # pyright: ignore
+            .where(~self._has_payout())
+            .values(status=RechargeStatus.CANCELLED)
+        )
+        result = self.session.exec(statement)
+        if commit:
+            self.session.commit()
+        return result.rowcount
+
+    def get_pending(self, recharge_ids: list[UUID]) -> list[tuple[UUID, str, bool]]:
+        """(id, intent Stripe, virement en file) des recharges encore PENDING parmi celles données."""
+        if not recharge_ids:
+            return []
+        statement = (
+            select(Recharges.id, Recharges.stripe_payment_intent_id, self._has_payout())
+            .where(Recharges.id.in_(recharge_ids), Recharges.status == RechargeStatus.PENDING)  # pyright: ignore
+        )
+        return [tuple(row) for row in self.session.exec(statement).all()]  # pyright: ignore
+
+    def find_abandoned(self, created_before: datetime, batch_size: int, exclude: list[UUID]) -> list[tuple[UUID, str]]:
+        """
+        (id, intent Stripe) d'un lot de recharges restées PENDING depuis created_before,
+        sans virement en file ni réservation en cours (celles-là passent par les réservations expirées).
+        """
+        has_reservation = (
+            select(InventoryReservation.id).where(InventoryReservation.recharge_id == Recharges.id).exists()
+        )
+        statement = (
+            select(Recharges.id, Recharges.stripe_payment_intent_id)
+            .where(Recharges.status == RechargeStatus.PENDING, Recharges.created_at < created_before)
+            .where(~self._has_payout(), ~has_reservation)
+            .order_by(Recharges.created_at)  # pyright: ignore
+            .limit(batch_size)
+        )
+        if exclude:
+            statement = statement.where(Recharges.id.not_in(exclude))  # pyright: ignore
+        return [tuple(row) for row in self.session.exec(statement).all()]  # pyright: ignore
+
+
+class AsyncRechargeRepository:
+    """Version asynchrone de RechargeRepository (AsyncSession / asyncpg)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, recharge: Recharges, commit: bool = True) -> Recharges:
+        """Crée une nouvelle recharge (flush seulement si commit=False)."""
+        self.session.add(recharge)
+        if commit:
+            await self.session.commit()
+            await self.session.refresh(recharge)
+        else:
+            await self.session.flush()
+        return recharge
+
+    async def get_by_id(self, recharge_id: UUID) -> Optional[Recharges]:
+        """Récupère une recharge par son ID unique."""
+        statement = select(Recharges).where(Recharges.id == recharge_id)
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Recharges]:
+        """Récupère toutes les recharges avec pagination."""
+        statement = select(Recharges).offset(skip).limit(limit)
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def get_by_user_id(self, user_id: UUID) -> List[Recharges]:
+        """Récupère toutes les recharges liées à un utilisateur spécifique."""
+        statement = select(Recharges).where(Recharges.user_id == user_id)
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def get_page_by_user_id(
+        self, user_id: UUID, limit: int, before: tuple[datetime, UUID] | None = None
+    ) -> List[Recharges]:
+        """
+        Page de l'historique d'un utilisateur, du plus récent au plus ancien, par clé
+        (created_at, id) strictement antérieure à `before`. Parcourt l'index
+        ix_recharges_user_created_at_id à rebours : coût constant quelle que soit la page.
+        """
+        statement = select(Recharges).where(Recharges.user_id == user_id)
+        if before is not None:
+            statement = statement.where(tuple_(Recharges.created_at, Recharges.id) < tuple_(*before))
+        statement = statement.order_by(Recharges.created_at.desc(), Recharges.id.desc()).limit(limit)  # pyright: ignore
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def stream_for_export(
+        self,
+        batch_size: int,
+        status: RechargeStatus | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+    ) -> AsyncIterator[list]:
+        """Voir RechargeRepository.stream_for_export (curseur côté serveur asyncpg)."""
+        statement = export_statement(status, created_from, created_to).execution_options(yield_per=batch_size)
+        result = await self.session.stream(statement)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_by_status(self, status: RechargeStatus) -> List[Recharges]:
+        """Récupère les recharges filtrées par statut (ex: pending, completed)."""
+        statement = select(Recharges).where(Recharges.status == status)
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def update_fields(self, recharge_id: UUID, values: dict, commit: bool = True) -> bool:
+        """Met à jour des colonnes par un UPDATE direct, sans relire la recharge."""
+        statement = update(Recharges).where(Recharges.id == recharge_id).values(**values)
+        result = await self.session.execute(statement)
+        if commit:
+            await self.session.commit()
+        return result.rowcount > 0  # pyright: ignore
+
+    async def update_status(self, recharge_id: UUID, new_status: RechargeStatus, commit: bool = True) -> bool:
+        """Met à jour uniquement le statut d'une recharge."""
+        return await self.update_fields(recharge_id, {"status": new_status}, commit=commit)
+
+    async def delete(self, recharge_id: UUID) -> bool:
+        """Supprime une recharge."""
+        recharge = await self.get_by_id(recharge_id)
+        if not recharge:
+            return False
+
+        await self.session.delete(recharge)
+        await self.session.commit()
+        return True
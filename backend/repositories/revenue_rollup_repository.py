@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from uuid import UUID
+from sqlalchemy import func
+from sqlmodel import Session, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models.recharge_entity import RechargeStatus
+from backend.models.revenue_rollup_entity import RevenueRollup, ROLLUP_STATUSES
+
+SUM_COLUMNS = (
+    "recharge_count", "units_granted", "amount_usdc_value", "amount_base_eur",
+    "service_fee_eur", "vat_amount_eur", "stripe_fee_eur", "total_paid_eur",
+)
+_UPSERT_SET = ", ".join(f"{c} = revenue_rollups.{c} + EXCLUDED.{c}" for c in SUM_COLUMNS)
+
+# Ajoute (sign=1) ou retire (sign=-1) une recharge de son bucket horaire
+ADD_RECHARGE_SQL = f"""
+    INSERT INTO revenue_rollups (bucket_start, status, {", ".join(SUM_COLUMNS)})
+    SELECT date_trunc('hour', created_at), CAST(:status AS rechargestatus), :sign,
+           :sign * units_granted, :sign * amount_usdc_value, :sign * amount_base_eur, :sign * service_fee_eur,
+           :sign * vat_amount_eur, :sign * stripe_fee_eur, :sign * total_paid_eur
+    FROM recharges WHERE id = :recharge_id
+    ON CONFLICT (bucket_start, status) DO UPDATE SET {_UPSERT_SET}
+"""
+
+# Recalcul complet d'une plage depuis recharges
+BACKFILL_SQL = f"""
+    INSERT INTO revenue_rollups (bucket_start, status, {", ".join(SUM_COLUMNS)})
+    SELECT date_trunc('hour', created_at), status, count(*), sum(units_granted), sum(amount_usdc_value),
+           sum(amount_base_eur), sum(service_fee_eur), sum(vat_amount_eur), sum(stripe_fee_eur), sum(total_paid_eur)
+    FROM recharges
+    WHERE status IN ('COMPLETED', 'FAILED') AND created_at >= :start AND created_at < :end
+    GROUP BY 1, 2
+"""
+
+
+class RevenueRollupRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def apply_transition(self, recharge_id: UUID, old_status: RechargeStatus | None, new_status: RechargeStatus):
+        """Reporte un changement de statut dans les rollups (dans la transaction de l'appelant)."""
+        if old_status in ROLLUP_STATUSES:
+            self.session.execute(text(ADD_RECHARGE_SQL), {"recharge_id": recharge_id, "status": old_status.name, "sign": -1})  # pyright: ignore
+        if new_status in ROLLUP_STATUSES:
+            self.session.execute(text(ADD_RECHARGE_SQL), {"recharge_id": recharge_id, "status": new_status.name, "sign": 1})
+
+    def backfill(self, start: datetime, end: datetime) -> int:
+        """
+        Recalcule les buckets de [start, end) depuis recharges, en une transaction.
+        La plage est élargie aux heures entières. Le verrou EXCLUSIVE bloque les mises à jour
+        incrémentales concurrentes jusqu'au commit : aucune transition n'est comptée deux fois ni perdue.
+        """
+        start = start.replace(minute=0, second=0, microsecond=0)
+        hour_of_end = end.replace(minute=0, second=0, microsecond=0)
+        end = hour_of_end if hour_of_end == end else hour_of_end + timedelta(hours=1)
+        params = {"start": start, "end": end}
+        self.session.execute(text("LOCK TABLE revenue_rollups IN EXCLUSIVE MODE"))
+        self.session.execute(
+            text("DELETE FROM revenue_rollups WHERE bucket_start >= :start AND bucket_start < :end"), params
+        )
+        result = self.session.execute(text(BACKFILL_SQL), params)
+        self.session.commit()
+        return result.rowcount  # pyright: ignore
+
+
+class AsyncRevenueRollupRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_series(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        status: RechargeStatus | None = None,
+    ) -> list:
+        """Séries par heure ou par jour et par statut, lues uniquement dans revenue_rollups."""
+        bucket = func.date_trunc(granularity, RevenueRollup.bucket_start).label("bucket")
+        statement = (
+            select(  # pyright: ignore
+                bucket,
+                RevenueRollup.status,
+                *[func.sum(getattr(RevenueRollup, c)).label(c) for c in SUM_COLUMNS],
+            )
+            .where(RevenueRollup.bucket_start >= start, RevenueRollup.bucket_start < end)
+            .group_by(bucket, RevenueRollup.status)
+            .order_by(bucket, RevenueRollup.status)
+        )
+        if status is not None:
+            statement = statement.where(RevenueRollup.status == status)
+        result = await self.session.execute(statement)
+        return list(result.all())
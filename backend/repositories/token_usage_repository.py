@@ -0,0 +1,82 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterable
+from sqlmodel import Session, text
+
+COPY_COLUMNS = ("id", "created_at", "user_id", "model_name", "tokens_consumed", "cost_usdc")
+COPY_SQL = f"COPY token_usage ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# Création des partitions sérialisée entre process (verrou de transaction)
+PARTITION_LOCK_KEY = 734_201_003
+
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def retention_cutoff(today: date, retention_months: int) -> date:
+    """Premier mois conservé : les partitions antérieures peuvent être supprimées."""
+    months = today.year * 12 + today.month - 1 - retention_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"token_usage_p{month:%Y%m}"
+
+
+class TokenUsageRepository:
+    """
+    Écriture en masse du journal token_usage (COPY) et gestion de ses partitions mensuelles.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def ensure_partitions(self, months: Iterable[date]):
+        """Crée les partitions mensuelles manquantes (idempotent)."""
+        months = sorted(set(months))
+        if not months:
+            return
+        self.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+        for month in months:
+            self.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF token_usage "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+            ))
+        self.session.commit()
+
+    def copy_rows(self, rows: list[tuple]) -> int:
+        """Insère les lignes (dans l'ordre de COPY_COLUMNS) en un seul COPY, une seule transaction."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        raw_connection = self.session.connection().connection
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(COPY_SQL, buffer)
+        self.session.commit()
+        return len(rows)
+
+    def list_partitions(self) -> list[str]:
+        statement = text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'token_usage'::regclass ORDER BY c.relname"
+        )
+        return list(self.session.execute(statement).scalars().all())
+
+    def drop_partitions_before(self, cutoff: date) -> list[str]:
+        """Supprime les partitions entièrement antérieures au mois de `cutoff` (rétention)."""
+        cutoff_name = partition_name(month_start(cutoff))
+        dropped = [
+            name for name in self.list_partitions()
+            if name.startswith("token_usage_p") and name < cutoff_name
+        ]
+        for name in dropped:
+            self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        self.session.commit()
+        return dropped
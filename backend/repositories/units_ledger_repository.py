@@ -0,0 +1,283 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+from sqlmodel import Session, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models.units_ledger_entity import UnitsLedgerEntry, UnitsEntryType, USER_ACCOUNT, SYSTEM_ACCOUNTS
+
+# Une seule passe d'instantanés à la fois, tous process confondus (verrou de transaction)
+SNAPSHOT_LOCK_KEY = 734_201_004
+
+
+def _legs(entry_type: UnitsEntryType) -> str:
+    """Les deux jambes d'une écriture : compte utilisateur (signe du montant) et contrepartie système."""
+    return f"(VALUES ('{USER_ACCOUNT}', 1), ('{SYSTEM_ACCOUNTS[entry_type]}', -1)) AS leg(account, sign)"
+
+
+# Crédit d'une recharge : units_credit_seq numérote les crédits pour le report dans Redis
+# (une recharge par utilisateur à la fois, le verrou de ligne est sans contention).
+# Le compteur n'avance que si la jambe utilisateur vient d'être insérée : un rejeu ne retourne
+# aucune ligne, rien n'est crédité deux fois dans Redis.
+RECORD_RECHARGE_SQL = f"""
+    WITH legs AS (
+        INSERT INTO units_ledger (transaction_id, entry_type, account, user_id, amount, created_at)
+        SELECT r.id, 'RECHARGE', leg.account,
+               CASE WHEN leg.account = '{USER_ACCOUNT}' THEN r.user_id END, leg.sign * r.units_granted, :now
+        FROM recharges r CROSS JOIN {_legs(UnitsEntryType.RECHARGE)}
+        WHERE r.id = :recharge_id
+        ON CONFLICT (transaction_id, account) DO NOTHING
+        RETURNING user_id, amount
+    ), credited AS (
+        UPDATE users u SET units_credit_seq = u.units_credit_seq + 1
+        FROM legs l
+        WHERE u.id = l.user_id
+        RETURNING u.id AS user_id, l.amount, u.units_credit_seq
+    )
+    SELECT user_id, amount, units_credit_seq FROM credited
+"""
+
+RECORD_ADJUSTMENT_SQL = f"""
+    WITH adjusted AS (
+        UPDATE users SET units_credit_seq = units_credit_seq + 1
+        WHERE id = CAST(:user_id AS uuid)
+        RETURNING id AS user_id, units_credit_seq
+    ), legs AS (
+        INSERT INTO units_ledger (transaction_id, entry_type, account, user_id, amount, description, created_at)
+        SELECT CAST(:transaction_id AS uuid), 'ADJUSTMENT', leg.account,
+               CASE WHEN leg.account = '{USER_ACCOUNT}' THEN a.user_id END,
+               leg.sign * CAST(:amount AS numeric), CAST(:description AS varchar), CAST(:now AS timestamp)
+        FROM adjusted a CROSS JOIN {_legs(UnitsEntryType.ADJUSTMENT)}
+    )
+    SELECT units_credit_seq FROM adjusted
+"""
+
+# Report des débits Redis : une écriture par (utilisateur, flush_id), en un seul INSERT sans verrou
+# sur users. Un report rejoué après un crash retombe sur la contrainte d'unicité.
+RECORD_USAGE_SQL = f"""
+    INSERT INTO units_ledger (transaction_id, entry_type, account, user_id, amount, created_at)
+    SELECT v.flush_id, 'USAGE', leg.account,
+           CASE WHEN leg.account = '{USER_ACCOUNT}' THEN v.user_id END, leg.sign * v.amount, :now
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:amounts AS numeric[]), CAST(:flush_ids AS uuid[]))
+        AS v(user_id, amount, flush_id)
+    CROSS JOIN {_legs(UnitsEntryType.USAGE)}
+    ON CONFLICT (transaction_id, account) DO NOTHING
+"""
+
+# Solde = dernier instantané + écritures suivantes (parcours borné de ix_units_ledger_user_id_txid).
+# Lu dans la même requête que units_credit_seq : tout crédit de numéro inférieur y est compté.
+BALANCE_STATE_SQL = """
+    SELECT coalesce(s.balance, 0) + coalesce((
+               SELECT sum(e.amount) FROM units_ledger e
+               WHERE e.user_id = u.id AND e.txid >= coalesce(s.as_of_xid, 0)
+           ), 0),
+           u.units_credit_seq
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT balance, as_of_xid FROM units_balance_snapshots
+        WHERE user_id = u.id ORDER BY as_of_xid DESC LIMIT 1
+    ) s ON true
+    WHERE u.id = :user_id
+"""
+
+# Horizon de visibilité : toute transaction de txid inférieur est terminée (validée ou annulée),
+# toute transaction future recevra un txid supérieur.
+SNAPSHOT_HORIZON_SQL = "SELECT CAST(CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text) AS bigint)"
+
+# Nouvel instantané pour chaque utilisateur ayant des écritures de txid dans [since, upto[ : les
+# passes couvrent des plages contiguës, le précédent instantané d'un utilisateur est donc arrêté à since.
+TAKE_SNAPSHOTS_SQL = """
+    WITH changed AS (
+        SELECT user_id, sum(amount) AS delta
+        FROM units_ledger
+        WHERE user_id IS NOT NULL AND txid >= :since AND txid < :upto
+        GROUP BY user_id
+    ), inserted AS (
+        INSERT INTO units_balance_snapshots (user_id, as_of_xid, balance, created_at)
+        SELECT c.user_id, :upto, coalesce(s.balance, 0) + c.delta, :now
+        FROM changed c
+        LEFT JOIN LATERAL (
+            SELECT balance FROM units_balance_snapshots
+            WHERE user_id = c.user_id ORDER BY as_of_xid DESC LIMIT 1
+        ) s ON true
+        RETURNING 1
+    )
+    SELECT count(*) FROM inserted
+"""
+
+PRUNE_SNAPSHOTS_SQL = """
+    DELETE FROM units_balance_snapshots s
+    WHERE s.created_at < :cutoff
+      AND EXISTS (
+          SELECT 1 FROM units_balance_snapshots n
+          WHERE n.user_id = s.user_id AND n.as_of_xid > s.as_of_xid
+      )
+"""
+
+LEDGER_TOTALS_SQL = """
+    SELECT count(*), count(DISTINCT transaction_id), coalesce(sum(amount), 0) FROM units_ledger
+"""
+
+UNBALANCED_TRANSACTIONS_SQL = """
+    SELECT transaction_id, sum(amount) FROM units_ledger
+    GROUP BY transaction_id HAVING sum(amount) <> 0
+    ORDER BY transaction_id LIMIT :limit
+"""
+
+# Recalcule depuis tout l'historique le solde de chaque utilisateur à son dernier instantané
+RECOMPUTED_SNAPSHOTS_CTE = """
+    WITH latest AS (
+        SELECT DISTINCT ON (user_id) user_id, as_of_xid, balance
+        FROM units_balance_snapshots
+        ORDER BY user_id, as_of_xid DESC
+    ), recomputed AS (
+        SELECT l.user_id, l.as_of_xid, l.balance AS snapshot_balance,
+               coalesce(sum(e.amount), 0) AS ledger_balance
+        FROM latest l
+        LEFT JOIN units_ledger e ON e.user_id = l.user_id AND e.txid < l.as_of_xid
+        GROUP BY l.user_id, l.as_of_xid, l.balance
+    )
+"""
+
+SNAPSHOT_DRIFT_SQL = RECOMPUTED_SNAPSHOTS_CTE + """
+    SELECT (SELECT count(*) FROM recomputed), user_id, as_of_xid, snapshot_balance, ledger_balance
+    FROM recomputed
+    WHERE snapshot_balance <> ledger_balance
+    ORDER BY user_id LIMIT :limit
+"""
+
+REPAIR_SNAPSHOTS_SQL = RECOMPUTED_SNAPSHOTS_CTE + """
+    UPDATE units_balance_snapshots s SET balance = r.ledger_balance
+    FROM recomputed r
+    WHERE s.user_id = r.user_id AND s.as_of_xid = r.as_of_xid
+      AND r.snapshot_balance <> r.ledger_balance
+    RETURNING s.user_id
+"""
+
+
+class UnitsLedgerRepository:
+    """
+    Repository du grand livre des unités (ajout seul) et de ses instantanés de solde.
+    Les écritures sont des INSERT en partie double ; seuls les crédits incrémentent
+    users.units_credit_seq, les débits d'usage ne verrouillent jamais la ligne de l'utilisateur.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def record_recharge(self, recharge_id: UUID, commit: bool = True) -> tuple[UUID, int, int] | None:
+        """
+        Écrit le crédit d'une recharge terminée (idempotent : transaction_id = ID de la recharge).
+        Retourne (user_id, unités créditées, units_credit_seq du crédit) pour le report dans Redis,
+        ou None si le crédit était déjà écrit.
+        """
+        params = {"recharge_id": recharge_id, "now": datetime.now(timezone.utc)}
+        row = self.session.execute(text(RECORD_RECHARGE_SQL), params).first()
+        if commit:
+            self.session.commit()
+        return tuple(row) if row else None  # pyright: ignore
+
+    def record_usage(self, flushes: list[tuple[str, Decimal, str]]):
+        """Écrit les débits reportés depuis Redis : (user_id, unités débitées, flush_id)."""
+        self.session.execute(text(RECORD_USAGE_SQL), {
+            "user_ids": [user_id for user_id, _, _ in flushes],
+            "amounts": [-amount for _, amount, _ in flushes],
+            "flush_ids": [flush_id for _, _, flush_id in flushes],
+            "now": datetime.now(timezone.utc),
+        })
+        self.session.commit()
+
+    def take_snapshots(self) -> int | None:
+        """
+        Instantané des utilisateurs dont le solde a bougé depuis la passe précédente.
+        La passe s'arrête à l'horizon xmin : les écritures d'une transaction encore ouverte,
+        quel que soit leur ID, sont laissées à la passe suivante.
+        Retourne le nombre d'instantanés créés, ou None si une autre passe est en cours.
+        """
+        if not self.session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SNAPSHOT_LOCK_KEY}).scalar():
+            self.session.rollback()
+            return None
+        now = datetime.now(timezone.utc)
+        since = self.session.execute(
+            text("SELECT coalesce(max(as_of_xid), 0) FROM units_balance_snapshots")
+        ).scalar()
+        upto = self.session.execute(text(SNAPSHOT_HORIZON_SQL)).scalar()
+        if upto <= since:
+            self.session.rollback()
+            return 0
+        created = self.session.execute(text(TAKE_SNAPSHOTS_SQL), {"since": since, "upto": upto, "now": now}).scalar()
+        self.session.commit()
+        return created
+
+    def prune_snapshots(self, before: datetime) -> int:
+        """Supprime les instantanés antérieurs à `before`, sauf le dernier de chaque utilisateur."""
+        result = self.session.execute(text(PRUNE_SNAPSHOTS_SQL), {"cutoff": before})
+        self.session.commit()
+        return result.rowcount  # pyright: ignore
+
+    # --- Contrôle d'intégrité (requêtes d'ensemble sur tout l'historique) ---
+
+    def get_totals(self) -> tuple[int, int, Decimal]:
+        """(écritures, transactions, somme de toutes les écritures : nulle en partie double)."""
+        return tuple(self.session.execute(text(LEDGER_TOTALS_SQL)).one())  # pyright: ignore
+
+    def find_unbalanced_transactions(self, limit: int) -> list[tuple[UUID, Decimal]]:
+        rows = self.session.execute(text(UNBALANCED_TRANSACTIONS_SQL), {"limit": limit}).all()
+        return [tuple(row) for row in rows]  # pyright: ignore
+
+    def find_snapshot_drift(self, limit: int) -> tuple[int, list[tuple[UUID, int, Decimal, Decimal]]]:
+        """
+        Compare le dernier instantané de chaque utilisateur au solde recalculé depuis le grand livre.
+        Retourne (instantanés vérifiés, écarts : user_id, as_of_xid, instantané, recalculé).
+        """
+        rows = self.session.execute(text(SNAPSHOT_DRIFT_SQL), {"limit": limit}).all()
+        if not rows:
+            checked = self.session.execute(
+                text("SELECT count(DISTINCT user_id) FROM units_balance_snapshots")
+            ).scalar()
+            return checked, []
+        return rows[0][0], [tuple(row[1:]) for row in rows]  # pyright: ignore
+
+    def repair_snapshots(self) -> list[UUID]:
+        """Remplace les instantanés en écart par le solde recalculé. Retourne les utilisateurs corrigés."""
+        if not self.session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SNAPSHOT_LOCK_KEY}).scalar():
+            self.session.rollback()
+            raise RuntimeError("A snapshot pass is running, retry later")
+        user_ids = list(self.session.execute(text(REPAIR_SNAPSHOTS_SQL)).scalars().all())
+        self.session.commit()
+        return user_ids
+
+
+class AsyncUnitsLedgerRepository:
+    """Lectures du grand livre et ajustements manuels depuis les routes async (asyncpg)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_balance_state(self, user_id: UUID) -> tuple[Decimal, int] | None:
+        """(solde, units_credit_seq) pour charger le solde Redis (None si l'utilisateur n'existe plus)."""
+        result = await self.session.execute(text(BALANCE_STATE_SQL), {"user_id": user_id})
+        row = result.first()
+        return tuple(row) if row else None  # pyright: ignore
+
+    async def record_adjustment(self, user_id: UUID, amount: Decimal, description: str) -> int | None:
+        """Écrit un ajustement manuel signé. Retourne son units_credit_seq (None si l'utilisateur n'existe pas)."""
+        result = await self.session.execute(text(RECORD_ADJUSTMENT_SQL), {
+            "user_id": user_id,
+            "transaction_id": uuid4(),
+            "amount": amount,
+            "description": description,
+            # asyncpg : colonnes TIMESTAMP WITHOUT TIME ZONE
+            "now": datetime.utcnow(),
+        })
+        credit_seq = result.scalar()
+        await self.session.commit()
+        return credit_seq
+
+    async def get_entries(self, user_id: UUID, limit: int, before_id: int | None = None) -> list[UnitsLedgerEntry]:
+        """Écritures du compte d'un utilisateur, plus récentes d'abord (pagination par ID)."""
+        statement = select(UnitsLedgerEntry).where(UnitsLedgerEntry.user_id == user_id)
+        if before_id is not None:
+            statement = statement.where(UnitsLedgerEntry.id < before_id)  # pyright: ignore
+        statement = statement.order_by(UnitsLedgerEntry.id.desc()).limit(limit)  # pyright: ignore
+        result = await self.session.exec(statement)
+        return list(result.all())
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+from sqlmodel import select, update, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models.usage_settlement_entity import UsageCharge, UsageSettlement, UsageSettlementStatus
+from backend.repositories.lease_queue_repository import LeaseQueueRepository
+
+# Une seule clôture de fenêtres à la fois, tous process confondus (verrou de transaction)
+SETTLEMENT_CLOSE_LOCK_KEY = 734_201_002
+
+# Clôture en une requête : agrège les charges non réglées des utilisateurs dont la fenêtre est due,
+# crée un règlement par utilisateur et y rattache exactement les charges agrégées (même snapshot).
+CLOSE_WINDOWS_SQL = """
+    WITH due AS (
+        SELECT c.user_id, w.circle_wallet_id, sum(c.amount_usdc) AS amount_usdc, count(*) AS charge_count,
+               min(c.created_at) AS window_start, max(c.created_at) AS window_end
+        FROM usage_charges c
+        JOIN wallets w ON w.user_id = c.user_id
+        WHERE c.settlement_id IS NULL
+        GROUP BY c.user_id, w.circle_wallet_id
+        HAVING sum(c.amount_usdc) >= :threshold
+            OR (min(c.created_at) <= :cutoff AND sum(c.amount_usdc) >= :min_amount)
+        LIMIT :limit
+    ), created AS (
+        INSERT INTO usage_settlements (
+            id, user_id, circle_wallet_id, amount_usdc, charge_count, window_start, window_end,
+            status, attempts, next_attempt_at, created_at
+        )
+        SELECT gen_random_uuid(), user_id, circle_wallet_id, amount_usdc, charge_count, window_start, window_end,
+               'PENDING', 0, :now, :now
+        FROM due
+        RETURNING id, user_id
+    ), linked AS (
+        UPDATE usage_charges c SET settlement_id = created.id
+        FROM created
+        WHERE c.user_id = created.user_id AND c.settlement_id IS NULL
+        RETURNING c.id
+    )
+    SELECT (SELECT count(*) FROM created), (SELECT count(*) FROM linked)
+"""
+
+
+class UsageSettlementRepository(LeaseQueueRepository[UsageSettlement]):
+    """
+    Repository du registre des charges d'usage et de la file des règlements on-chain.
+    Les workers se partagent les règlements grâce à FOR UPDATE SKIP LOCKED (voir LeaseQueueRepository).
+    Un règlement PROCESSING dont le bail a expiré est repris : la clé d'idempotence Circle évite le
+    double prélèvement. Un règlement FAILED garde ses charges rattachées : elles ne sont pas refacturées.
+    """
+
+    model = UsageSettlement
+    pending_status = UsageSettlementStatus.PENDING
+    processing_status = UsageSettlementStatus.PROCESSING
+    failed_status = UsageSettlementStatus.FAILED
+
+    def record_charge(
+        self, user_id: UUID, model_name: str, tokens_consumed: int, amount_usdc: Decimal, commit: bool = True
+    ) -> UsageCharge:
+        charge = UsageCharge(
+            user_id=user_id, model_name=model_name, tokens_consumed=tokens_consumed, amount_usdc=amount_usdc
+        )
+        self.session.add(charge)
+        if commit:
+            self.session.commit()
+        return charge
+
+    def close_windows(self, threshold: Decimal, window_seconds: float, min_amount: Decimal, limit: int) -> tuple[int, int] | None:
+        """
+        Crée les règlements des fenêtres dues. Retourne (règlements créés, charges rattachées),
+        ou None si une autre clôture est en cours.
+        """
+        if not self.session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SETTLEMENT_CLOSE_LOCK_KEY}).scalar():
+            self.session.rollback()
+            return None
+        now = datetime.now(timezone.utc)
+        params = {
+            "threshold": threshold,
+            "cutoff": now - timedelta(seconds=window_seconds),
+            "min_amount": min_amount,
+            "limit": limit,
+            "now": now,
+        }
+        settlements, charges = self.session.execute(text(CLOSE_WINDOWS_SQL), params).one()
+        self.session.commit()
+        return settlements, charges
+
+    def mark_succeeded(self, settlement_id: UUID, tx_id: str):
+        statement = (
+            update(UsageSettlement)
+            .where(UsageSettlement.id == settlement_id)
+            .values(
+                status=UsageSettlementStatus.SUCCEEDED, tx_id=tx_id,
+                completed_at=datetime.now(timezone.utc), last_error=None,
+            )
+        )
+        self.session.exec(statement)
+        self.session.commit()
+
+
+class AsyncUsageSettlementRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_by_user_id(self, user_id: UUID, limit: int) -> list[UsageSettlement]:
+        """Derniers règlements d'un utilisateur (rapprochement charges / transactions)."""
+        statement = (
+            select(UsageSettlement)
+            .where(UsageSettlement.user_id == user_id)
+            .order_by(UsageSettlement.created_at.desc())  # pyright: ignore
+            .limit(limit)
+        )
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def get_charges(self, settlement_id: UUID, limit: int) -> list[UsageCharge]:
+        """Charges réglées par un règlement donné."""
+        statement = (
+            select(UsageCharge)
+            .where(UsageCharge.settlement_id == settlement_id)
+            .order_by(UsageCharge.created_at)  # pyright: ignore
+            .limit(limit)
+        )
+        result = await self.session.exec(statement)
+        return list(result.all())
@@ -1,4 +1,6 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
 from uuid import UUID
 from backend.models.user_entity import User
 
@@ -75,3 +77,80 @@ class UserRepository:
     def exists(self, email: str) -> bool:
         """Vérifie si un utilisateur existe avec cet email."""
         return self.get_by_email(email) is not None
+
+
+class AsyncUserRepository:
+    """
+    Version asynchrone de UserRepository (AsyncSession / asyncpg).
+    Les relations sont chargées explicitement (selectinload) : pas de lazy-loading en async.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialise le repository avec une session SQLModel asynchrone."""
+        self.session = session
+
+    async def create(self, user: User, commit: bool = True) -> User:
+        """Crée un nouvel utilisateur (flush seulement si commit=False)."""
+        self.session.add(user)
+        if commit:
+            await self.session.commit()
+            await self.session.refresh(user)
+        else:
+            await self.session.flush()
+        return user
+
+    async def get_by_id(self, user_id: UUID, with_relations: bool = True) -> User | None:
+        """
+        Récupère un utilisateur par son ID, avec son wallet si demandé.
+        L'historique des recharges n'est jamais chargé ici : voir AsyncRechargeRepository.get_page_by_user_id.
+        """
+        statement = select(User).where(User.id == user_id)
+        if with_relations:
+            statement = statement.options(selectinload(User.wallet))  # pyright: ignore
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def get_token_version(self, user_id: UUID) -> int | None:
+        """Version courante des tokens d'un utilisateur (None s'il n'existe plus)."""
+        statement = select(User.token_version).where(User.id == user_id)
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def get_by_email(self, email: str) -> User | None:
+        """Récupère un utilisateur par son email."""
+        statement = select(User).where(User.email == email)
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def get_all(self, skip: int = 0, limit: int = 10) -> list[User]:
+        """Récupère la liste de tous les utilisateurs avec pagination."""
+        statement = select(User).offset(skip).limit(limit)
+        result = await self.session.exec(statement)
+        return list(result.all())
+
+    async def update(self, user_id: UUID, user_update: dict) -> User | None:
+        """Met à jour un utilisateur avec les données fournies."""
+        user = await self.get_by_id(user_id)
+        if not user:
+            return None
+
+        user.sqlmodel_update(user_update)
+
+        self.session.add(user)
+        await self.session.commit()
+        return await self.get_by_id(user_id)
+
+    async def delete(self, user_id: UUID, commit: bool = True) -> bool:
+        """
+        Supprime un utilisateur par son ID. DELETE direct, sans charger l'historique en mémoire :
+        wallet, recharges (et leurs virements) et charges d'usage sont supprimés par les
+        ON DELETE CASCADE de leurs clés étrangères (celle de recharges rétablie par e2c7a9d4b6f1).
+        """
+        result = await self.session.execute(delete(User).where(User.id == user_id))  # pyright: ignore
+        if commit:
+            await self.session.commit()
+        return result.rowcount > 0  # pyright: ignore
+
+    async def exists(self, email: str) -> bool:
+        """Vérifie si un utilisateur existe avec cet email."""
+        return await self.get_by_email(email) is not None
@@ -1,4 +1,5 @@
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 from backend.models.wallet_entity import Wallet
 
@@ -52,4 +53,58 @@ class WalletRepository:
         
         self.session.delete(wallet)
         self.session.commit()
-        return True
\ No newline at end of file
+        return True
+
+class AsyncWalletRepository:
+    """Version asynchrone de WalletRepository (AsyncSession / asyncpg)."""
+
+    def __init__(self, session: AsyncSession):
+        """Initialise le repository avec une session SQLModel asynchrone."""
+        self.session = session
+
+    async def create(self, wallet: Wallet, commit: bool = True) -> Wallet:
+        """Crée un nouveau wallet en base de données."""
+        self.session.add(wallet)
+        if commit:
+            await self.session.commit()
+            await self.session.refresh(wallet)
+        else:
+            await self.session.flush()
+        return wallet
+
+    async def get_by_id(self, wallet_id: UUID) -> Wallet | None:
+        """Récupère un wallet par son ID."""
+        statement = select(Wallet).where(Wallet.id == wallet_id)
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def get_by_user_id(self, user_id: UUID) -> Wallet | None:
+        """Récupère un wallet par l'ID de l'utilisateur associé."""
+        statement = select(Wallet).where(Wallet.user_id == user_id)
+        result = await self.session.exec(statement)
+        return result.first()
+
+    async def update(self, wallet_id: UUID, wallet_update: dict) -> Wallet | None:
+        """Met à jour un wallet avec les données fournies."""
+        wallet = await self.get_by_id(wallet_id)
+        if not wallet:
+            return None
+
+        for key, value in wallet_update.items():
+            if hasattr(wallet, key) and value is not None:
+                setattr(wallet, key, value)
+
+        self.session.add(wallet)
+        await self.session.commit()
+        await self.session.refresh(wallet)
+        return wallet
+
+    async def delete(self, wallet_id: UUID) -> bool:
+        """Supprime un wallet par son ID."""
+        wallet = await self.get_by_id(wallet_id)
+        if not wallet:
+            return False
+
+        await self.session.delete(wallet)
+        await self.session.commit()
+        return True
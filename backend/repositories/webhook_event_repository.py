@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from sqlmodel import update
+from sqlalchemy.dialects.postgresql import insert
+from backend.models.webhook_event_entity import WebhookEvent, WebhookEventStatus
+from backend.repositories.lease_queue_repository import LeaseQueueRepository
+
+
+class WebhookEventRepository(LeaseQueueRepository[WebhookEvent]):
+    """
+    Repository du journal des webhooks Stripe.
+    Les workers se partagent les événements grâce à FOR UPDATE SKIP LOCKED (voir LeaseQueueRepository).
+    """
+
+    model = WebhookEvent
+    pending_status = WebhookEventStatus.PENDING
+    processing_status = WebhookEventStatus.PROCESSING
+    failed_status = WebhookEventStatus.FAILED
+
+    def insert_if_absent(self, event_id: str, event_type: str, payload: dict) -> bool:
+        """Enregistre un événement. Retourne False si Stripe nous l'a déjà envoyé."""
+        statement = insert(WebhookEvent).values(
+            id=event_id,
+            type=event_type,
+            payload=payload,
+            status=WebhookEventStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc),
+            created_at=datetime.now(timezone.utc),
+        ).on_conflict_do_nothing(index_elements=["id"])
+        result = self.session.exec(statement)
+        self.session.commit()
+        return result.rowcount > 0
+
+    def mark_processed(self, event_id: str):
+        statement = (
+            update(WebhookEvent)
+            .where(WebhookEvent.id == event_id)
+            .values(status=WebhookEventStatus.PROCESSED, processed_at=datetime.now(timezone.utc), last_error=None)
+        )
+        self.session.exec(statement)
+        self.session.commit()
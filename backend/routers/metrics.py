@@ -0,0 +1,105 @@
+# backend/routers/metrics.py
+from fastapi import APIRouter, Depends
+
+from backend.core.dependencies import get_current_admin
+from backend.core.rate_limit import rate_limit_counters
+from backend.services.circle_transport import transport, async_transport
+from backend.services.treasury_service import balance_cache
+from backend.services.reaper_service import reaper
+from backend.workers.webhook_worker import webhook_worker
+from backend.workers.payout_worker import payout_worker
+from backend.workers.email_worker import email_worker
+from backend.workers.settlement_worker import settlement_worker
+from backend.services.user_cache import user_cache
+from backend.services.token_revocation import token_revocations
+from backend.services.password_hasher import password_hasher
+from backend.services.usage_ingestion import usage_ingestion
+from backend.services.units_balance import units_balance
+from backend.services.units_ledger import units_ledger
+from backend.services.price_catalog import price_catalog
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"], dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/circle")
+def circle_metrics():
+    """Compteurs du pool de connexions HTTP vers Circle (réutilisations vs nouvelles connexions)."""
+    return {"sync": transport.stats(), "async": async_transport.stats()}
+
+
+@router.get("/master-balance")
+def master_balance_metrics():
+    """Efficacité du cache du solde Master Wallet."""
+    return balance_cache.stats()
+
+
+@router.get("/reaper")
+def reaper_metrics():
+    """Activité et retard du reaper de réservations / recharges abandonnées (pour ce worker)."""
+    return reaper.stats()
+
+
+@router.get("/webhooks")
+def webhook_metrics():
+    """Événements Stripe traités / replanifiés / abandonnés par le worker de ce process."""
+    return webhook_worker.stats()
+
+
+@router.get("/payouts")
+def payout_metrics():
+    """Virements USDC effectués / replanifiés / abandonnés par le worker de ce process."""
+    return payout_worker.stats()
+
+
+@router.get("/settlements")
+def settlement_metrics():
+    """Fenêtres de charges d'usage clôturées et règlements on-chain effectués / replanifiés / abandonnés (ce process)."""
+    return settlement_worker.stats()
+
+
+@router.get("/usage-ingestion")
+def usage_ingestion_metrics():
+    """Tampon d'ingestion token_usage : lignes en attente, écrites, refusées et durée des flush (ce process)."""
+    return usage_ingestion.stats()
+
+
+@router.get("/units")
+def units_balance_metrics():
+    """Débits, refus pour solde insuffisant, chargements depuis Postgres et reports différés (ce process)."""
+    return units_balance.stats()
+
+
+@router.get("/units-ledger")
+def units_ledger_metrics():
+    """Passes d'instantanés de solde du grand livre des unités (ce process) : créés, purgés, durée."""
+    return units_ledger.stats()
+
+
+@router.get("/price-catalog")
+def price_catalog_metrics():
+    """Version du catalogue de tarifs chargée par ce process et nombre de rechargements."""
+    return price_catalog.stats()
+
+
+@router.get("/emails")
+def email_metrics():
+    """Emails envoyés / replanifiés / abandonnés et réutilisation des connexions SMTP pour ce worker."""
+    return email_worker.stats()
+
+
+@router.get("/auth-cache")
+def auth_cache_metrics():
+    """Taux de succès du cache de l'utilisateur authentifié (LRU local + Redis) pour ce worker."""
+    return {**user_cache.stats(), "token_revocation": token_revocations.stats()}
+
+
+@router.get("/password-hashing")
+def password_hashing_metrics():
+    """Occupation du pool de hachage Argon2, refus (503) et rehash effectués pour ce worker."""
+    return password_hasher.stats()
+
+
+@router.get("/rate-limit")
+def rate_limit_metrics():
+    """Requêtes admises / refusées (par route et portée) par le rate limiter de ce worker."""
+    return rate_limit_counters.stats()
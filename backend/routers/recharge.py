@@ -1,12 +1,17 @@
 # backend/routers/recharges.py
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session
 from uuid import UUID
 from backend.models.user_entity import User
 from backend.db.session import get_session
 from backend.services.recharge_service import RechargeService
 from backend.schema.recharges import RechargeInitRequest, RechargeInitResponse
-from backend.core.dependencies import get_current_user
+from backend.core.dependencies import get_current_user, get_current_admin
+from backend.models.recharge_entity import RechargeStatus
+from backend.services.export_service import aopen_recharge_export, MEDIA_TYPES
 
 router = APIRouter(prefix="/recharges", tags=["Recharges"])
 
@@ -30,4 +35,34 @@ def init_payment(
     service = RechargeService(session)
     
     # On lance la logique métier avec le VRAI ID de l'utilisateur connecté
-    return service.init_payment_by_units(user_id=current_user.id, units=req.units)
\ No newline at end of file
+    return service.init_payment_by_units(user_id=current_user.id, units=req.units)
+
+
+@router.get("/export", dependencies=[Depends(get_current_admin)])
+async def export_recharges(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: RechargeStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+):
+    """
+    Export comptable (admin) des recharges en flux NDJSON ou CSV, triées par date de création.
+    `created_from` est inclus, `created_to` exclu. 503 si la base ne répond pas avant le premier lot.
+    """
+    if created_from and created_to and created_from >= created_to:
+        raise HTTPException(status_code=400, detail="created_from must be before created_to")
+    try:
+        body = await aopen_recharge_export(format, status, created_from, created_to)
+    except (SQLAlchemyError, OSError):
+        # asyncpg lève OSError (connexion refusée) sans passer par SQLAlchemyError
+        raise HTTPException(
+            status_code=503,
+            detail="Recharge export unavailable, please retry",
+            headers={"Retry-After": "1"},
+        )
+    filename = f"recharges.{format}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,56 @@
+# backend/routers/reports.py
+from datetime import datetime, timedelta
+from typing import Annotated
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from backend.core.dependencies import get_current_admin
+from backend.db.session import AsyncSessionDep
+from backend.models.recharge_entity import RechargeStatus
+from backend.repositories.usage_settlement_repository import AsyncUsageSettlementRepository
+from backend.schema.revenue import RevenueReport
+from backend.schema.usage import UsageChargeRead, UsageSettlementRead
+from backend.services.revenue_service import RevenueService
+
+router = APIRouter(prefix="/reports", tags=["Reports"], dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/revenue", response_model=RevenueReport)
+async def revenue_report(
+    session: AsyncSessionDep,
+    granularity: Annotated[str, Query(pattern="^(hour|day)$")] = "day",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    status: RechargeStatus | None = None,
+):
+    """
+    Revenus, frais et TVA des recharges terminées (COMPLETED / FAILED), par heure ou par jour.
+    Lit uniquement les rollups : temps de réponse indépendant de la taille de l'historique.
+    Par défaut : les 30 derniers jours.
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    try:
+        return await RevenueService(session).get_report(granularity, start, end, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/users/{user_id}/settlements", response_model=list[UsageSettlementRead])
+async def user_settlements(
+    user_id: UUID,
+    session: AsyncSessionDep,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+):
+    """Derniers règlements on-chain des charges d'usage d'un utilisateur, avec leur tx_id."""
+    return await AsyncUsageSettlementRepository(session).get_by_user_id(user_id, limit)
+
+
+@router.get("/settlements/{settlement_id}/charges", response_model=list[UsageChargeRead])
+async def settlement_charges(
+    settlement_id: UUID,
+    session: AsyncSessionDep,
+    limit: Annotated[int, Query(ge=1, le=5000)] = 1000,
+):
+    """Événements de facturation réglés par un règlement (rapprochement charge -> transaction)."""
+    return await AsyncUsageSettlementRepository(session).get_charges(settlement_id, limit)
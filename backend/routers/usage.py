@@ -0,0 +1,65 @@
+# backend/routers/usage.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.core.dependencies import get_current_admin
+from backend.db.session import SessionDep
+from backend.repositories.model_price_repository import ModelPriceRepository
+from backend.schema.usage import UsageEventBatch, UsageIngestResponse, ModelPriceIn, ModelPriceRead
+from backend.services.price_catalog import price_catalog, UnknownModelError, PriceCatalogUnavailableError
+from backend.services.usage_ingestion import usage_ingestion
+
+router = APIRouter(prefix="/usage", tags=["Usage"], dependencies=[Depends(get_current_admin)])
+
+
+@router.post("/events", response_model=UsageIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_usage_events(batch: UsageEventBatch):
+    """
+    Reçoit un lot d'événements de consommation de tokens (compte de service admin).
+    Les coûts sont calculés en une passe avec le catalogue de tarifs en mémoire ; un lot qui
+    contient un modèle inconnu est refusé en entier (422).
+    Les événements sont mis en tampon et écrits par COPY en différé : 202 ne garantit pas
+    qu'ils soient déjà en base. 503 si le tampon est plein (base lente ou indisponible).
+    """
+    try:
+        # Chargement hors de la boucle d'événements si le préchargement du lifespan a échoué
+        await price_catalog.aensure_loaded()
+        costs = price_catalog.price_batch((e.model_name, e.input_tokens, e.output_tokens) for e in batch.events)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except (PriceCatalogUnavailableError, SQLAlchemyError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Price catalog unavailable, please retry",
+            headers={"Retry-After": "1"},
+        )
+    rows = [
+        usage_ingestion.row(e.user_id, e.model_name, e.input_tokens + e.output_tokens, cost, e.occurred_at)
+        for e, cost in zip(batch.events, costs)
+    ]
+    if not usage_ingestion.add(rows):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Usage ingestion is saturated, please retry",
+            headers={"Retry-After": "1"},
+        )
+    return UsageIngestResponse(accepted=len(rows))
+
+
+@router.get("/prices", response_model=list[ModelPriceRead])
+def list_model_prices(session: SessionDep):
+    """Catalogue des tarifs (modèles actifs et désactivés)."""
+    return ModelPriceRepository(session).get_all()
+
+
+@router.put("/prices/{model_name}", response_model=ModelPriceRead)
+def set_model_price(model_name: str, price: ModelPriceIn, session: SessionDep):
+    """
+    Crée ou modifie le tarif d'un modèle (active=false pour le retirer).
+    Pris en compte immédiatement par ce process, sous PRICE_CATALOG_REFRESH_SECONDS par les autres.
+    """
+    saved = ModelPriceRepository(session).upsert(
+        model_name, price.input_usdc_per_million, price.output_usdc_per_million, price.active
+    )
+    price_catalog.refresh()
+    return saved
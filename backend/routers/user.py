@@ -2,16 +2,21 @@
 
 from typing import Annotated
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 from uuid import UUID
 
-from backend.schema.user import UserCreateDTO, UserReadDTO, Token, UserUpdateDTO
-from backend.schema.auth import VerifyOTPRequestUser
-from backend.services.user_service import UserService
+from backend.schema.user import (
+    UserCreateDTO, UserReadDTO, Token, UserUpdateDTO, UnitsBalance, UnitsAdjustmentIn, UnitsLedgerEntryRead,
+)
+from backend.schema.auth import VerifyOTPRequestUser, RefreshTokenRequest
+from backend.schema.recharges import RechargePage
+from backend.services.user_service import UserService, AsyncUserService
 from backend.services.auth_service import AuthService
+from backend.services.units_balance import units_balance
 from backend.models.user_entity import User
-from backend.db.session import SessionDep
+from backend.db.session import SessionDep, AsyncSessionDep
+from backend.db.redis_pool import RedisDep, AsyncRedisDep
 from backend.core.config import settings
 from backend.core.dependencies import get_current_user
 
@@ -20,22 +25,26 @@ router = APIRouter(prefix="/users", tags=["Users"])
 def get_user_service(session: SessionDep) -> UserService:
     return UserService(session)
 
-def get_auth_service(session: SessionDep) -> AuthService:
-    return AuthService(session)
+def get_async_user_service(session: AsyncSessionDep) -> AsyncUserService:
+    return AsyncUserService(session)
+
+def get_auth_service(session: SessionDep, redis_client: RedisDep, async_redis_client: AsyncRedisDep) -> AuthService:
+    return AuthService(session, redis_client, async_redis_client)
 
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
+AsyncUserServiceDep = Annotated[AsyncUserService, Depends(get_async_user_service)]
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
 
 @router.post("/token")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    user_service: UserServiceDep,
+    user_service: AsyncUserServiceDep,
     auth_service: AuthServiceDep,
 ) -> Token:
     """Authenticate a user and generate a JWT token for the upcoming resuests."""
 
-    db_user = user_service.authenticate_user(form_data.username, form_data.password)
+    db_user = await user_service.authenticate_user(form_data.username, form_data.password)
 
     if db_user is None:
         raise HTTPException(
@@ -44,11 +53,21 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_service.create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
-    )
-    return Token(access_token=access_token, token_type="bearer")
+    return auth_service.create_token_pair(db_user)
+
+@router.post("/token/refresh")
+async def refresh_access_token(
+    request: RefreshTokenRequest,
+    user_service: AsyncUserServiceDep,
+    auth_service: AuthServiceDep,
+) -> Token:
+    """Exchange a valid refresh token for a new access/refresh token pair."""
+    claims = auth_service.decode_refresh_token(request.refresh_token)
+    # Postgres fait foi ici : un changement de mot de passe ou de rôle invalide le refresh token
+    db_user = await user_service.get_user_for_refresh(UUID(claims["uid"]), int(claims.get("ver", 0)))
+    if db_user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return auth_service.create_token_pair(db_user)
 
 @router.post("/", response_model=UserReadDTO, status_code=status.HTTP_201_CREATED)
 def create_user(
@@ -65,7 +84,7 @@ async def verify_otp(
     request: VerifyOTPRequestUser,
     auth_service: AuthServiceDep
 ):
-    if auth_service.verify_otp(request.email, request.otp_code):
+    if await auth_service.averify_otp(request.email, request.otp_code):
         return {
             "status": 200,
             "message": "OTP vérifié avec succès"
@@ -73,53 +92,118 @@ async def verify_otp(
     raise HTTPException(status_code=400, detail="Code OTP invalide ou expiré")
 
 @router.get("/me", response_model=UserReadDTO)
-def read_user_me(
-    current_user: CurrentUserDep
+async def read_user_me(
+    current_user: CurrentUserDep,
+    user_service: AsyncUserServiceDep,
 ):
     """Get the current authenticated user's information."""
-    return current_user
+    # current_user est reconstruit depuis le token (détaché) : on recharge l'entité pour exposer le wallet
+    db_user = await user_service.get_user(current_user.id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
+@router.get("/me/balance", response_model=UnitsBalance)
+async def read_user_me_balance(current_user: CurrentUserDep):
+    """Solde d'unités prépayées en temps réel (Redis, chargé depuis Postgres au premier accès)."""
+    units = await units_balance.aget(current_user.id)
+    if units is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return UnitsBalance(units=units)
 
 @router.get("/{user_id}", response_model=UserReadDTO)
-def read_user(
+async def read_user(
     user_id: UUID,
-    user_service: UserServiceDep,
+    user_service: AsyncUserServiceDep,
     current_user: CurrentUserDep,
 ):
     """Get a user by ID. Only the user themselves or an admin can access this endpoint."""
     if current_user.id != user_id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to access this user")
     
-    db_user = user_service.get_user(user_id)
+    db_user = await user_service.get_user(user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     return db_user
 
+@router.get("/{user_id}/recharges", response_model=RechargePage)
+async def read_user_recharges(
+    user_id: UUID,
+    user_service: AsyncUserServiceDep,
+    current_user: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """Recharge history of a user, most recent first, paginated with an opaque cursor."""
+    if current_user.id != user_id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to access this user")
+
+    try:
+        return await user_service.get_recharge_history(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{user_id}/units/ledger", response_model=list[UnitsLedgerEntryRead])
+async def read_user_units_ledger(
+    user_id: UUID,
+    user_service: AsyncUserServiceDep,
+    current_user: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    before: Annotated[int | None, Query(description="ID de la dernière écriture de la page précédente")] = None,
+):
+    """Mouvements d'unités d'un utilisateur (recharges, consommations, ajustements), plus récents d'abord."""
+    if current_user.id != user_id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to access this user")
+
+    return await user_service.get_units_ledger(user_id, limit, before)
+
+@router.post("/{user_id}/units/adjustments", response_model=UnitsBalance)
+async def adjust_user_units(
+    user_id: UUID,
+    adjustment: UnitsAdjustmentIn,
+    user_service: AsyncUserServiceDep,
+    current_user: CurrentUserDep,
+):
+    """Ajustement manuel du solde d'unités (admin) : écriture au grand livre, jamais d'écrasement."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to adjust units")
+
+    try:
+        units = await user_service.adjust_units(
+            user_id, adjustment.amount, f"{adjustment.reason} (admin {current_user.id})"[:255]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if units is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return UnitsBalance(units=units)
+
 @router.put("/{user_id}", response_model=UserReadDTO)
-def update_user(
+async def update_user(
     user_id: UUID,
     user_data: UserUpdateDTO,
-    user_service: UserServiceDep,
+    user_service: AsyncUserServiceDep,
     current_user: CurrentUserDep,
 ):
     if current_user.id != user_id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to update this user")
     
-    updated_user = user_service.update_user(user_id, user_data=user_data)
+    updated_user = await user_service.update_user(user_id, user_data=user_data)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     return updated_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: UUID,
-    user_service: UserServiceDep,
+    user_service: AsyncUserServiceDep,
     current_user: CurrentUserDep,
 ):
     if current_user.id != user_id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this user")
     
-    success = user_service.delete_user(user_id)
+    success = await user_service.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
\ No newline at end of file
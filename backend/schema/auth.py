@@ -7,6 +7,9 @@ class VerifyOTPRequestUser(BaseModel):
     email: EmailStr
     otp_code: str
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
 class MailBody(BaseModel):
     to: EmailStr
     subject: str
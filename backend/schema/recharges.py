@@ -44,4 +44,14 @@ class RechargeInitResponse(BaseModel):
     Contient le secret pour Stripe Elements + le récapitulatif de la commande.
     """
     client_secret: str
-    recharge: RechargeRead # On renvoie l'objet complet pour afficher le résumé au client
\ No newline at end of file
+    recharge: RechargeRead # On renvoie l'objet complet pour afficher le résumé au client
+
+
+# --- 4. HISTORIQUE PAGINÉ ---
+class RechargePage(BaseModel):
+    """
+    Une page de l'historique des recharges, de la plus récente à la plus ancienne.
+    Passer next_cursor en paramètre `cursor` pour obtenir la page suivante (None : fin de l'historique).
+    """
+    items: list[RechargeRead]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,29 @@
+from datetime import datetime
+from decimal import Decimal
+from pydantic import BaseModel
+from backend.models.recharge_entity import RechargeStatus
+
+
+class RevenueTotals(BaseModel):
+    recharge_count: int = 0
+    units_granted: int = 0
+    amount_usdc_value: Decimal = Decimal("0")
+    amount_base_eur: Decimal = Decimal("0")
+    service_fee_eur: Decimal = Decimal("0")
+    vat_amount_eur: Decimal = Decimal("0")
+    stripe_fee_eur: Decimal = Decimal("0")
+    total_paid_eur: Decimal = Decimal("0")
+
+
+class RevenueBucket(RevenueTotals):
+    bucket: datetime
+    status: RechargeStatus
+
+
+class RevenueReport(BaseModel):
+    """Chiffre d'affaires, frais et TVA par heure ou par jour, lus dans les rollups."""
+    granularity: str
+    start: datetime
+    end: datetime
+    buckets: list[RevenueBucket]
+    totals: dict[RechargeStatus, RevenueTotals]
@@ -0,0 +1,88 @@
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+from backend.core.config import settings
+from backend.models.usage_settlement_entity import UsageSettlementStatus
+from backend.repositories.token_usage_repository import retention_cutoff
+
+
+class UsageSettlementRead(BaseModel):
+    """Règlement on-chain d'une fenêtre de charges d'usage."""
+    id: UUID
+    user_id: UUID
+    amount_usdc: Decimal
+    charge_count: int
+    window_start: datetime
+    window_end: datetime
+    status: UsageSettlementStatus
+    attempts: int
+    tx_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UsageChargeRead(BaseModel):
+    id: UUID
+    model_name: str
+    tokens_consumed: int
+    amount_usdc: Decimal
+    created_at: datetime
+    settlement_id: Optional[UUID] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UsageEventIn(BaseModel):
+    """Le coût n'est pas fourni par l'appelant : il est calculé avec le catalogue de tarifs."""
+    user_id: UUID
+    model_name: str = Field(max_length=100)
+    input_tokens: int = Field(ge=0)
+    output_tokens: int = Field(default=0, ge=0)
+    occurred_at: Optional[datetime] = None
+
+    @field_validator("occurred_at")
+    @classmethod
+    def within_retention(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """
+        Borné à la fenêtre de rétention : un mois dont la partition a été supprimée ferait échouer
+        le COPY de tout le lot, et une date arbitraire créerait une partition arbitraire.
+        """
+        if value is None:
+            return value
+        occurred_at = value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+        now = datetime.utcnow()
+        if occurred_at < datetime.combine(retention_cutoff(now.date(), settings.USAGE_RETENTION_MONTHS), time.min):
+            raise ValueError(f"occurred_at is older than the {settings.USAGE_RETENTION_MONTHS}-month usage retention")
+        if occurred_at > now + timedelta(seconds=settings.USAGE_INGEST_MAX_CLOCK_SKEW_SECONDS):
+            raise ValueError("occurred_at is in the future")
+        return value
+
+
+class UsageEventBatch(BaseModel):
+    events: list[UsageEventIn] = Field(min_length=1, max_length=settings.USAGE_INGEST_MAX_BATCH)
+
+
+class UsageIngestResponse(BaseModel):
+    accepted: int
+
+
+class ModelPriceIn(BaseModel):
+    input_usdc_per_million: Decimal = Field(ge=0, max_digits=18, decimal_places=6)
+    output_usdc_per_million: Decimal = Field(ge=0, max_digits=18, decimal_places=6)
+    active: bool = True
+
+
+class ModelPriceRead(ModelPriceIn):
+    model_name: str
+    version: int
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,10 +1,11 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 
-from .recharge import RechargeRead
 from .wallet import WalletReadDTO
+from backend.models.units_ledger_entity import UnitsEntryType
 
 class Role(str, Enum):
     ADMIN = "admin"
@@ -19,7 +20,7 @@ class UserReadDTO(UserBase):
     id: UUID
     role: Role
     created_at: datetime
-    recharges: list[RechargeRead] = []
+    # L'historique des recharges est paginé à part : GET /users/{id}/recharges
     wallet: WalletReadDTO | None = None
 
     class Config:
@@ -37,8 +38,7 @@ class UserCreateDTO(UserBase):
                 "nom": "DOE",
                 "prenom": "John",
                 "role": "user",
-                "password": "1234",
-                "units": 0.0
+                "password": "1234"
             }
     }
 
@@ -47,7 +47,7 @@ class UserUpdateDTO(BaseModel):
     nom: str | None = None
     prenom: str | None = None
     password: str | None = None
-    units: float | None = None
+    # Le solde d'unités ne se modifie que par écriture au grand livre : POST /users/{id}/units/adjustments
     role: Role | None = None
 
     class Config:
@@ -58,7 +58,6 @@ class UserUpdateDTO(BaseModel):
                 "nom": "Updated",
                 "prenom": "User",
                 "password": "newpassword123",
-                "units": 10.0,
                 "role": "user"
             }
         }
@@ -66,6 +65,26 @@ class UserUpdateDTO(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
 
 class TokenData(BaseModel):
     username: str | None = None
+
+class UnitsBalance(BaseModel):
+    units: float
+
+class UnitsAdjustmentIn(BaseModel):
+    """Ajustement manuel (admin), écrit au grand livre avec son motif."""
+    amount: float = Field(description="Unités ajoutées (positif) ou retirées (négatif)")
+    reason: str = Field(min_length=1, max_length=255)
+
+class UnitsLedgerEntryRead(BaseModel):
+    id: int
+    transaction_id: UUID
+    entry_type: UnitsEntryType
+    amount: Decimal
+    description: str | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
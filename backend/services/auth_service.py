@@ -2,32 +2,55 @@ from typing import Annotated
 from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import logging, os, random, string, redis, jwt
-from ssl import create_default_context
-from email.mime.text import MIMEText
-from smtplib import SMTP
-from pwdlib import PasswordHash
+import redis.asyncio as aioredis
 from datetime import datetime, timedelta, timezone
 from jwt.exceptions import InvalidTokenError
 from backend.schema.auth import MailBody
 from sqlmodel import Session
+from backend.models.user_entity import User
+from backend.schema.user import Token
 from backend.repositories.user_repository import UserRepository
+from backend.repositories.email_outbox_repository import EmailOutboxRepository
 from backend.core.config import settings, make_mail_data_template
+from backend.db.redis_pool import redis_pools
+from backend.services.password_hasher import password_hasher
+from backend.services.smtp_pool import smtp_pool, build_message
+from backend.workers.email_worker import email_worker
 
 logger = logging.getLogger(__name__)
 
-password_hash = PasswordHash.recommended()
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token")
 
+OTP_TTL_SECONDS = 300  # 5 minutes
+
+# Compare et consomme l'OTP en un seul aller-retour (atomique : un code ne sert qu'une fois)
+# Retourne 1 si valide, 0 si invalide, -1 si expiré ou inexistant.
+CONSUME_OTP_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then return -1 end
+if stored ~= ARGV[1] then return 0 end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
 class AuthService:
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: Session,
+        redis_client: redis.Redis | None = None,
+        async_redis_client: aioredis.Redis | None = None,
+    ):
         self.repository = UserRepository(session)
+        self.outbox = EmailOutboxRepository(session)
+        self.redis = redis_client or redis_pools.client
+        self.async_redis = async_redis_client or redis_pools.async_client
 
     def get_password_hash(self, password: str) -> str:
-            return password_hash.hash(password)
+            return password_hasher.hash(password)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return password_hash.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
 
     #Todo: A supprimer
     def decode_token(self, token: str) -> str:
@@ -50,36 +73,57 @@ class AuthService:
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
         return encoded_jwt
+
+    def create_token_pair(self, user: User) -> Token:
+        """
+        Token d'accès court et autoporteur (id, rôle, version) + token de refresh long.
+        Les routes authentifiées n'ont ainsi plus besoin de relire l'utilisateur dans Postgres.
+        """
+        claims = {"sub": user.email, "uid": str(user.id), "role": user.role, "ver": user.token_version}
+        access_token = self.create_access_token(
+            {**claims, "type": "access"},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        )
+        refresh_token = self.create_access_token(
+            {**claims, "type": "refresh"},
+            expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        )
+        return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
+
+    def decode_refresh_token(self, token: str) -> dict:
+        """Vérifie la signature et le type d'un token de refresh ; lève 401 sinon."""
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except InvalidTokenError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        if payload.get("type") != "refresh" or payload.get("uid") is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        return payload
         
     def generate_otp(self, length: int = 6) -> str:
         """Génère un code OTP aléatoire."""
         return ''.join(random.choices(string.digits, k=length))
 
     def send_mail(self, data: dict | None = None):
+        """Envoi immédiat (bloquant) via le pool SMTP. Les emails transactionnels passent par queue_mail."""
         try:
-            logger.info(f"Début envoi email : {data}")
+            logger.info(f"Début envoi email à {data.get('to') if data else None}")
             msg = MailBody(**data) # pyright: ignore
-            message = MIMEText(msg.body, "html")
-            message["From"] = settings.FROM_MAIL
-            message["To"] = msg.to
-            message["Subject"] = msg.subject
-
-            ctx = create_default_context()
-
-            with SMTP(settings.MAIL_HOST, settings.MAIL_PORT) as server:
-                
-                server.ehlo()
-                server.starttls(context=ctx)
-                server.ehlo()
-                server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD) # pyright: ignore
-                server.send_message(message)
-                logger.info(f"Email envoyé avec succès à {msg.to}")
-            
+            error = smtp_pool.send_many([build_message(msg.to, msg.subject, msg.body)])[0]
+            if error is not None:
+                raise error
+            logger.info(f"Email envoyé avec succès à {msg.to}")
             return {"status": 200, "errors": None}
         
         except Exception as e:
             logger.error(f"Erreur SMTP : {str(e)}", exc_info=True)
             return {"status": 500, "errors": str(e)}
+
+    def queue_mail(self, data: dict):
+        """Dépose l'email dans l'outbox ; il est envoyé par le worker d'emails (backend.workers.email_worker)."""
+        msg = MailBody(**data)
+        self.outbox.enqueue(msg.to, msg.subject, msg.body)
+        email_worker.notify()
         
     def send_otp_email(self, email: str) -> bool:
         """Génère un OTP et l'envoie par email (stocké en Redis)."""
@@ -93,37 +137,42 @@ class AuthService:
             otp = self.generate_otp()
             
             # Stocker en Redis avec expiration de 5 minutes
-            redis_key = f"otp:{email}"
-            redis_client.setex(redis_key, 300, otp)  # 300 secondes = 5 minutes
+            self.redis.setex(f"otp:{email}", OTP_TTL_SECONDS, otp)
             
             mail_data = make_mail_data_template(email, otp)
-            self.send_mail(mail_data)
-            logger.info(f"OTP envoyé à {email}")
+            self.queue_mail(mail_data)
+            logger.info(f"OTP mis en file pour {email}")
             return True
         
         except Exception as e:
             logger.error(f"Erreur envoi OTP : {str(e)}", exc_info=True)
             return False
 
+    def _log_otp_result(self, email: str, result: int) -> bool:
+        if result == -1:
+            logger.warning(f"OTP expiré ou inexistant pour {email}")
+        elif result == 0:
+            logger.warning(f"OTP invalide pour {email}")
+        else:
+            logger.info(f"OTP vérifié avec succès pour {email}")
+        return result == 1
+
     def verify_otp(self, email: str, otp_code: str) -> bool:
-        """Vérifie le code OTP stocké en Redis."""
+        """Vérifie le code OTP stocké en Redis et le supprime s'il est valide."""
         try:
-            redis_key = f"otp:{email}"
-            stored_otp = redis_client.get(redis_key)
-            
-            if not stored_otp:
-                logger.warning(f"OTP expiré ou inexistant pour {email}")
-                return False
-            
-            if stored_otp != otp_code:
-                logger.warning(f"OTP invalide pour {email}")
-                return False
-            
-            # Supprimer l'OTP après vérification
-            redis_client.delete(redis_key)
-            logger.info(f"OTP vérifié avec succès pour {email}")
-            return True
-        
+            result = redis_pools.script(CONSUME_OTP_SCRIPT)(keys=[f"otp:{email}"], args=[otp_code], client=self.redis)
+            return self._log_otp_result(email, int(result))  # pyright: ignore
         except Exception as e:
             logger.error(f"Erreur vérification OTP : {str(e)}", exc_info=True)
-            return False
\ No newline at end of file
+            return False
+
+    async def averify_otp(self, email: str, otp_code: str) -> bool:
+        """Équivalent asynchrone de verify_otp pour les routes async."""
+        try:
+            result = await redis_pools.async_script(CONSUME_OTP_SCRIPT)(
+                keys=[f"otp:{email}"], args=[otp_code], client=self.async_redis
+            )
+            return self._log_otp_result(email, int(result))
+        except Exception as e:
+            logger.error(f"Erreur vérification OTP : {str(e)}", exc_info=True)
+            return False
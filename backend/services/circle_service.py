@@ -1,10 +1,155 @@
 # backend/services/circle_service.py
-import uuid, base64, requests
+import uuid, base64, asyncio, logging, queue, threading, time
+from typing import Callable
 from dotenv import load_dotenv, find_dotenv
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_OAEP
 from Crypto.Hash import SHA256
 from backend.core.config import settings
+from backend.services.circle_transport import transport, async_transport
+
+logger = logging.getLogger(__name__)
+
+
+class EntitySecretCipherPool:
+    """
+    Cache de la clé publique Circle (avec TTL) et réserve de ciphertexts à usage unique.
+
+    RSA-OAEP est randomisé : chaque chiffrement de l'entity secret produit un ciphertext
+    différent, qu'on peut donc pré-générer localement. Un thread d'arrière-plan garde la
+    réserve pleine ; les appels Circle (wallets, transferts) n'ont plus qu'à en prendre un.
+    """
+
+    def __init__(self, ttl_seconds: int, pool_size: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._public_key: RSA.RsaKey | None = None
+        self._fetched_at = 0.0
+        # Chaque ciphertext est étiqueté avec la génération de clé qui l'a produit
+        self._generation = 0
+        self._ciphertexts: queue.Queue[tuple[int, str]] = queue.Queue(maxsize=pool_size)
+        self._refill = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._fetch_public_key: Callable[[], str] | None = None
+        self._entity_secret: bytes | None = None
+
+    def bind(self, fetch_public_key: Callable[[], str], entity_secret_hex: str):
+        """Branche la source de la clé publique et l'entity secret (une seule fois par process)."""
+        if self._fetch_public_key is not None:
+            return
+        entity_secret = bytes.fromhex(entity_secret_hex)
+        if len(entity_secret) != 32:
+            raise ValueError("Entity secret invalide (doit faire 32 bytes)")
+        with self._lock:
+            if self._fetch_public_key is None:
+                self._entity_secret = entity_secret
+                self._fetch_public_key = fetch_public_key
+
+    def _get_key(self) -> tuple[int, RSA.RsaKey]:
+        """Retourne la clé publique en cache, rafraîchie si le TTL est dépassé."""
+        with self._lock:
+            if self._public_key is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+                return self._generation, self._public_key
+
+            try:
+                key = RSA.import_key(self._fetch_public_key())  # pyright: ignore
+            except Exception:
+                if self._public_key is None:
+                    raise
+                # Circle indisponible : on garde la clé précédente plutôt que de bloquer les paiements
+                logger.warning("Rafraîchissement de la clé publique Circle impossible, réutilisation de l'ancienne", exc_info=True)
+                self._fetched_at = time.monotonic()
+                return self._generation, self._public_key
+
+            if self._public_key is None or key.export_key() != self._public_key.export_key():
+                self._generation += 1
+            self._public_key = key
+            self._fetched_at = time.monotonic()
+            return self._generation, key
+
+    def _encrypt(self) -> tuple[int, str]:
+        generation, key = self._get_key()
+        cipher = PKCS1_OAEP.new(key, hashAlgo=SHA256)
+        encrypted = cipher.encrypt(self._entity_secret)  # pyright: ignore
+        return generation, base64.b64encode(encrypted).decode()
+
+    def take_nowait(self) -> str | None:
+        """Retourne un ciphertext de la réserve, ou None si elle est vide."""
+        self.start()
+        try:
+            while True:
+                generation, ciphertext = self._ciphertexts.get_nowait()
+                if generation == self._generation:
+                    return ciphertext
+        except queue.Empty:
+            return None
+        finally:
+            self._refill.set()
+
+    def take(self) -> str:
+        """Retourne un ciphertext frais (jamais réutilisé), depuis la réserve si possible."""
+        ciphertext = self.take_nowait()
+        if ciphertext is not None:
+            return ciphertext
+
+        # Réserve vide : chiffrement synchrone (clé toujours servie depuis le cache)
+        return self._encrypt()[1]
+
+    def invalidate(self):
+        """Oublie la clé et les ciphertexts en réserve (ex: Circle a rejeté un ciphertext)."""
+        with self._lock:
+            self._public_key = None
+            self._fetched_at = 0.0
+            self._generation += 1
+        self._refill.set()
+
+    def start(self):
+        """Démarre le thread de remplissage de la réserve s'il ne tourne pas déjà."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._fill_forever, name="circle-ciphertext-pool", daemon=True)
+                self._worker.start()
+
+    def _fill_forever(self):
+        while True:
+            try:
+                while not self._ciphertexts.full():
+                    self._ciphertexts.put_nowait(self._encrypt())
+            except queue.Full:
+                pass
+            except Exception:
+                logger.error("Erreur lors du remplissage de la réserve de ciphertexts Circle", exc_info=True)
+                time.sleep(5)
+            # On se réveille à chaque prélèvement, ou au moins une fois par TTL pour rafraîchir la clé
+            self._refill.wait(timeout=self.ttl_seconds)
+            self._refill.clear()
+
+
+def wallet_payload(idempotency_key: str, user_name: str, ciphertext: str, wallet_set_id: str) -> dict:
+    """Corps de la requête Circle de création d'un wallet SCA sur ARC-TESTNET."""
+    return {
+        "idempotencyKey": idempotency_key,
+        "blockchains": ["ARC-TESTNET"],
+        "entitySecretCiphertext": ciphertext,
+        "walletSetId": wallet_set_id,
+        "accountType": "SCA",
+        "count": 1,
+        "metadata": [
+            {
+                "name": f"{user_name} Wallet",
+                "refId": f"user_{idempotency_key[:8]}"
+            }
+        ]
+    }
+
+
+# Partagé par toutes les instances de CircleService du process
+cipher_pool = EntitySecretCipherPool(
+    ttl_seconds=settings.CIRCLE_PUBLIC_KEY_TTL_SECONDS,
+    pool_size=settings.CIRCLE_CIPHERTEXT_POOL_SIZE,
+)
 
 
 class CircleService:
@@ -26,15 +171,16 @@ class CircleService:
             "Content-Type": "application/json",
             "accept": "application/json",
         }
-        
+        cipher_pool.bind(self.get_public_key, self.entity_secret)
+
     # ─────────────────────────────
     # Circle helpers
     # ─────────────────────────────
 
     def get_public_key(self) -> str:
         """Récupère la clé publique Circle"""
-        url = f"{self.base_url}/w3s/config/entity/publicKey"
-        response = requests.get(url, headers=self.headers, timeout=15)
+        endpoint = "/w3s/config/entity/publicKey"
+        response = transport.request("GET", f"{self.base_url}{endpoint}", endpoint, headers=self.headers)
         response.raise_for_status()
 
         public_key = response.json().get("data", {}).get("publicKey")
@@ -44,48 +190,26 @@ class CircleService:
         return public_key
 
     def encrypt_entity_secret(self) -> str:
-        """Chiffre l’entity secret avec la clé publique Circle"""
-        public_key_string = self.get_public_key()
-        entity_secret_bytes = bytes.fromhex(self.entity_secret)
-
-        if len(entity_secret_bytes) != 32:
-            raise ValueError("Entity secret invalide (doit faire 32 bytes)")
-
-        public_key = RSA.import_key(public_key_string)
-        cipher = PKCS1_OAEP.new(public_key, hashAlgo=SHA256)
-        encrypted = cipher.encrypt(entity_secret_bytes)
+        """
+        Retourne un entity secret chiffré avec la clé publique Circle.
+        La clé est mise en cache et les ciphertexts sont pré-générés : pas d'appel Circle ici.
+        """
+        return cipher_pool.take()
 
-        return base64.b64encode(encrypted).decode()
-    
     def create_wallet(
         self,
         idempotency_key: str,
         user_name: str
     ) -> list[dict] | None:
-    
+
         if not idempotency_key:
             idempotency_key = str(uuid.uuid4())
 
         ciphertext = self.encrypt_entity_secret()
 
-        payload = {
-            "idempotencyKey": idempotency_key,
-            "blockchains": ["ARC-TESTNET"],
-            "entitySecretCiphertext": ciphertext,
-            "walletSetId": self.wallet_set_id,
-            "accountType": "SCA",
-            "count": 1,
-            "metadata": [
-                {
-                    "name": f"{user_name} Wallet",
-                    "refId": f"user_{idempotency_key[:8]}"
-                }
-            ]
-        }
-
         response = self.post(
             endpoint="/w3s/developer/wallets",
-            payload=payload
+            payload=wallet_payload(idempotency_key, user_name, ciphertext, self.wallet_set_id)
         )
 
         return response.get("data", {}).get("wallets", [])
@@ -93,17 +217,17 @@ class CircleService:
     # ─────────────────────────────
     # HTTP générique
     # ─────────────────────────────
-    
+
     def get(self, endpoint: str) -> dict:
         """GET générique Circle"""
 
         url = f"{self.base_url}{endpoint}"
-        response = requests.get(url, headers=self.headers, timeout=15)
+        response = transport.request("GET", url, endpoint, headers=self.headers)
 
         if not response.ok:
             print(f"Erreur Circle GET ({response.status_code}): {response.text}")
             response.raise_for_status()
-        
+
         return response.json()
 
 
@@ -111,22 +235,126 @@ class CircleService:
         """POST générique Circle"""
 
         url = f"{self.base_url}{endpoint}"
-        response = requests.post(url, json=payload, headers=self.headers, timeout=15)
+        response = transport.request("POST", url, endpoint, json=payload, headers=self.headers)
 
         if not response.ok:
             print(f"Erreur Circle ({response.status_code}): {response.text}")
+            if "entitySecretCiphertext" in payload and 400 <= response.status_code < 500:
+                # Clé publique peut-être tournée côté Circle : on la re-télécharge au prochain appel
+                cipher_pool.invalidate()
             response.raise_for_status()
 
         return response.json()
-    
+
     def delete(self, endpoint: str) -> dict:
         """DELETE générique Circle"""
 
         url = f"{self.base_url}{endpoint}"
-        response = requests.delete(url, headers=self.headers, timeout=15)
+        response = transport.request("DELETE", url, endpoint, headers=self.headers)
 
         if not response.ok:
             print(f"Erreur Circle DELETE ({response.status_code}): {response.text}")
             response.raise_for_status()
 
         return response.json()
+
+
+class AsyncCircleService:
+    """
+    Variante asyncio de CircleService (même surface de méthodes), sur un client httpx partagé.
+    À utiliser depuis les routes et workers async pour ne pas bloquer l'event loop.
+    """
+
+    def __init__(self):
+        self.api_key = settings.CIRCLE_API_KEY.get_secret_value()
+        self.entity_secret = settings.HEX_ENCODED_ENTITY_SECRET.get_secret_value()
+        self.base_url = settings.CIRCLE_BASE_URL
+        self.wallet_set_id = settings.WALLET_SET_ID
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "accept": "application/json",
+        }
+        # Le thread de remplissage de la réserve utilise le fetch synchrone de la clé publique
+        cipher_pool.bind(CircleService().get_public_key, self.entity_secret)
+
+    # ─────────────────────────────
+    # Circle helpers
+    # ─────────────────────────────
+
+    async def get_public_key(self) -> str:
+        """Récupère la clé publique Circle"""
+        data = await self.get("/w3s/config/entity/publicKey")
+        public_key = data.get("data", {}).get("publicKey")
+        if not public_key:
+            raise ValueError("Clé publique Circle introuvable")
+
+        return public_key
+
+    async def encrypt_entity_secret(self) -> str:
+        """Prend un ciphertext dans la réserve ; si elle est vide, chiffre hors de l'event loop."""
+        ciphertext = cipher_pool.take_nowait()
+        if ciphertext is not None:
+            return ciphertext
+        return await asyncio.to_thread(cipher_pool.take)
+
+    async def create_wallet(
+        self,
+        idempotency_key: str,
+        user_name: str
+    ) -> list[dict] | None:
+
+        if not idempotency_key:
+            idempotency_key = str(uuid.uuid4())
+
+        ciphertext = await self.encrypt_entity_secret()
+
+        response = await self.post(
+            endpoint="/w3s/developer/wallets",
+            payload=wallet_payload(idempotency_key, user_name, ciphertext, self.wallet_set_id)
+        )
+
+        return response.get("data", {}).get("wallets", [])
+
+    # ─────────────────────────────
+    # HTTP générique
+    # ─────────────────────────────
+
+    async def get(self, endpoint: str) -> dict:
+        """GET générique Circle"""
+
+        url = f"{self.base_url}{endpoint}"
+        response = await async_transport.request("GET", url, endpoint, headers=self.headers)
+
+        if not response.is_success:
+            print(f"Erreur Circle GET ({response.status_code}): {response.text}")
+            response.raise_for_status()
+
+        return response.json()
+
+    async def post(self, endpoint: str, payload: dict) -> dict:
+        """POST générique Circle"""
+
+        url = f"{self.base_url}{endpoint}"
+        response = await async_transport.request("POST", url, endpoint, json=payload, headers=self.headers)
+
+        if not response.is_success:
+            print(f"Erreur Circle ({response.status_code}): {response.text}")
+            if "entitySecretCiphertext" in payload and 400 <= response.status_code < 500:
+                cipher_pool.invalidate()
+            response.raise_for_status()
+
+        return response.json()
+
+    async def delete(self, endpoint: str) -> dict:
+        """DELETE générique Circle"""
+
+        url = f"{self.base_url}{endpoint}"
+        response = await async_transport.request("DELETE", url, endpoint, headers=self.headers)
+
+        if not response.is_success:
+            print(f"Erreur Circle DELETE ({response.status_code}): {response.text}")
+            response.raise_for_status()
+
+        return response.json()
@@ -0,0 +1,157 @@
+# backend/services/circle_transport.py
+import asyncio, random
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from backend.core.config import settings
+
+# Codes pour lesquels Circle peut être réessayé sans risque
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Les POST ne sont pas rejoués ici : ils portent un entitySecretCiphertext à usage unique, que
+# Circle refuse au second envoi. Ils sont réessayés par les workers (payout, settlement) avec
+# un nouveau ciphertext et le même idempotencyKey.
+RETRY_METHODS = frozenset({"GET", "DELETE"})
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Classe un endpoint Circle pour lui appliquer le bon timeout."""
+    if "/balances" in endpoint:
+        return "balances"
+    if "/transactions" in endpoint:
+        return "transfers"
+    if endpoint.startswith("/w3s/developer/wallets"):
+        return "wallets"
+    return "default"
+
+
+READ_TIMEOUTS = {
+    "balances": settings.CIRCLE_READ_TIMEOUT_BALANCES,
+    "transfers": settings.CIRCLE_READ_TIMEOUT_TRANSFERS,
+    "wallets": settings.CIRCLE_READ_TIMEOUT_WALLETS,
+    "default": settings.CIRCLE_READ_TIMEOUT_DEFAULT,
+}
+
+
+def timeout_for(endpoint: str) -> tuple[float, float]:
+    """Timeout (connexion, lecture) pour un endpoint donné."""
+    return settings.CIRCLE_CONNECT_TIMEOUT, READ_TIMEOUTS[endpoint_class(endpoint)]
+
+
+class CircleTransport:
+    """
+    Session HTTP partagée par tout le process : connexions TLS keep-alive vers api.circle.com,
+    retries avec backoff aléatoire sur les erreurs réseau et les réponses 429/5xx
+    (lectures et suppressions seulement, voir RETRY_METHODS).
+    """
+
+    def __init__(self, pool_size: int, max_retries: int, backoff_factor: float, backoff_jitter: float):
+        self.pool_size = pool_size
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.session.request(method, url, timeout=timeout_for(endpoint), **kwargs)
+
+    def stats(self) -> dict:
+        """Compteurs du pool : une connexion réutilisée est un 'hit', une nouvelle connexion un 'miss'."""
+        requests_count = 0
+        new_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            new_connections += pool.num_connections
+        return {
+            "requests": requests_count,
+            "pool_hits": max(requests_count - new_connections, 0),
+            "pool_misses": new_connections,
+            "pool_maxsize": self.pool_size,
+        }
+
+
+transport = CircleTransport(
+    pool_size=settings.CIRCLE_HTTP_POOL_SIZE,
+    max_retries=settings.CIRCLE_HTTP_MAX_RETRIES,
+    backoff_factor=settings.CIRCLE_HTTP_BACKOFF_FACTOR,
+    backoff_jitter=settings.CIRCLE_HTTP_BACKOFF_JITTER,
+)
+
+
+class AsyncCircleTransport:
+    """
+    Équivalent asyncio de CircleTransport : un httpx.AsyncClient partagé (keep-alive),
+    mêmes timeouts par type d'endpoint et mêmes retries avec backoff aléatoire (GET/DELETE).
+    Le client est créé au premier appel et fermé dans le lifespan de l'app.
+    """
+
+    def __init__(self, pool_size: int, max_retries: int, backoff_factor: float, backoff_jitter: float):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self._client: httpx.AsyncClient | None = None
+        self._requests = 0
+        self._retries = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self._client = httpx.AsyncClient(limits=limits)
+        return self._client
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter)
+
+    async def request(self, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+        connect, read = timeout_for(endpoint)
+        timeout = httpx.Timeout(read, connect=connect)
+        max_retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            self._requests += 1
+            try:
+                response = await self.client.request(method, url, timeout=timeout, **kwargs)
+            except httpx.TransportError:
+                if attempt >= max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+            self._retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"requests": self._requests, "retries": self._retries, "pool_maxsize": self.pool_size}
+
+
+async_transport = AsyncCircleTransport(
+    pool_size=settings.CIRCLE_HTTP_POOL_SIZE,
+    max_retries=settings.CIRCLE_HTTP_MAX_RETRIES,
+    backoff_factor=settings.CIRCLE_HTTP_BACKOFF_FACTOR,
+    backoff_jitter=settings.CIRCLE_HTTP_BACKOFF_JITTER,
+)
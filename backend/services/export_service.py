@@ -0,0 +1,133 @@
+# backend/services/export_service.py
+"""
+Export comptable des recharges en NDJSON ou CSV, en flux et en mémoire constante.
+
+Endpoint admin : GET /recharges/export?format=csv&status=completed&created_from=...&created_to=...
+CLI (écrit sur la sortie standard) :
+    python -m backend.services.export_service --format csv --status completed --from 2026-09-01 --to 2026-10-01 > recharges.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Iterable, Iterator
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.core.config import settings
+from backend.db.session import engine, async_engine
+from backend.models.recharge_entity import RechargeStatus
+from backend.services.revenue_service import naive_utc
+from backend.repositories.recharge_repository import (
+    EXPORT_COLUMNS,
+    RechargeRepository,
+    AsyncRechargeRepository,
+)
+
+FIELDNAMES = [column.key for column in EXPORT_COLUMNS]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+class RechargeExportFormatter:
+    """Transforme un lot de lignes en un seul bloc de texte (un write réseau par lot, pas par ligne)."""
+
+    def __init__(self, fmt: str):
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.fmt = fmt
+
+    def header(self) -> str:
+        if self.fmt == "csv":
+            return ",".join(FIELDNAMES) + "\r\n"
+        return ""
+
+    def format_rows(self, rows: Iterable) -> str:
+        if self.fmt == "ndjson":
+            return "".join(
+                json.dumps(dict(zip(FIELDNAMES, map(_value, row))), separators=(",", ":")) + "\n" for row in rows
+            )
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_value(v) for v in row] for row in rows)
+        return buffer.getvalue()
+
+
+async def aopen_recharge_export(
+    fmt: str,
+    status: RechargeStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Ouvre la session et lit le premier lot avant le moindre octet : une base indisponible lève ici,
+    pendant la route (statut d'erreur), et non au milieu d'une réponse 200 déjà commencée.
+    Retourne le flux pour StreamingResponse, qui garde la session jusqu'à la fin de la réponse.
+    """
+    formatter = RechargeExportFormatter(fmt)
+    created_from = naive_utc(created_from) if created_from else None
+    created_to = naive_utc(created_to) if created_to else None
+    session = AsyncSession(async_engine)
+    try:
+        batches = AsyncRechargeRepository(session).stream_for_export(
+            settings.EXPORT_BATCH_SIZE, status, created_from, created_to
+        )
+        first = await anext(batches, None)
+    except BaseException:
+        await session.close()
+        raise
+
+    async def stream() -> AsyncIterator[bytes]:
+        try:
+            yield (formatter.header() + (formatter.format_rows(first) if first else "")).encode()
+            async for rows in batches:
+                yield formatter.format_rows(rows).encode()
+        finally:
+            await batches.aclose()
+            await session.close()
+
+    return stream()
+
+
+def export_recharges(
+    fmt: str,
+    status: RechargeStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> Iterator[str]:
+    """Équivalent synchrone (curseur serveur psycopg2) pour la CLI ; rien n'est écrit si la première lecture échoue."""
+    formatter = RechargeExportFormatter(fmt)
+    with Session(engine) as session:
+        batches = RechargeRepository(session).stream_for_export(
+            settings.EXPORT_BATCH_SIZE, status, created_from, created_to
+        )
+        first = next(batches, None)
+        yield formatter.header() + (formatter.format_rows(first) if first else "")
+        for rows in batches:
+            yield formatter.format_rows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export comptable des recharges (NDJSON / CSV)")
+    parser.add_argument("--format", choices=sorted(MEDIA_TYPES), default="csv")
+    parser.add_argument("--status", choices=[s.value for s in RechargeStatus])
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat, help="date de début incluse (ISO 8601)")
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat, help="date de fin exclue (ISO 8601)")
+    args = parser.parse_args()
+
+    # L'écho SQL du moteur partagé polluerait la sortie standard
+    engine.echo = False
+    status = RechargeStatus(args.status) if args.status else None
+    for chunk in export_recharges(args.format, status, args.created_from, args.created_to):
+        sys.stdout.write(chunk)
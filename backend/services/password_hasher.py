@@ -0,0 +1,166 @@
+# backend/services/password_hasher.py
+import argparse
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from backend.core.config import settings
+
+
+class PasswordHasherPool:
+    """
+    Hachage / vérification Argon2 dans un pool de threads dédié et borné.
+
+    argon2-cffi relâche le GIL pendant le calcul : les threads du pool tournent en parallèle
+    sur plusieurs cœurs, sans occuper le threadpool des requêtes ni la boucle d'événements.
+    Au-delà de `workers + max_pending` opérations en cours, la demande est refusée
+    immédiatement (503) plutôt que mise en attente : une rafale de logins ne peut plus
+    affamer les autres endpoints.
+    """
+
+    def __init__(self, workers: int, max_pending: int, time_cost: int, memory_cost: int, parallelism: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.hasher = PasswordHash((
+            Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism),
+        ))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.workers + max_pending)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release(Future())
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        valid, updated_hash = self.hasher.verify_and_update(password, hashed_password)
+        if updated_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, updated_hash
+
+    # --- Appels bloquants (routes et services synchrones) ---
+
+    def hash(self, password: str) -> str:
+        return self._submit(self.hasher.hash, password).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(self.hasher.verify, password, hashed_password).result()
+
+    def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Vérifie le mot de passe ; retourne aussi un nouveau hash si les paramètres Argon2 ont changé."""
+        return self._submit(self._verify_and_update, password, hashed_password).result()
+
+    # --- Appels asynchrones (routes async) ---
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.hasher.hash, password))
+
+    async def averify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await asyncio.wrap_future(self._submit(self._verify_and_update, password, hashed_password))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+def benchmark(workers: int, seconds: float) -> dict:
+    """
+    Mesure le débit de vérifications (≈ logins/s) avec les paramètres Argon2 configurés, en
+    passant par le pool borné comme une route de login. Le débit par cœur est rapporté au temps
+    CPU consommé par le process (et non divisé par le nombre de workers, qui peut dépasser le
+    nombre de cœurs ou se cumuler aux threads Argon2 de ARGON2_PARALLELISM).
+    """
+    pool = PasswordHasherPool(
+        workers=workers,
+        max_pending=0,
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    )
+    hashed = pool.hash("benchmark-password")
+    latencies: list[float] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def run():
+        # Un client par worker : le pool reste plein sans jamais refuser (max_pending=0)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            pool.verify("benchmark-password", hashed)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    clients = [threading.Thread(target=run) for _ in range(pool.workers)]
+    started, cpu_started = time.monotonic(), time.process_time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed, cpu_seconds = time.monotonic() - started, time.process_time() - cpu_started
+    verified = len(latencies)
+    return {
+        "workers": pool.workers,
+        "time_cost": settings.ARGON2_TIME_COST,
+        "memory_cost_kib": settings.ARGON2_MEMORY_COST,
+        "parallelism": settings.ARGON2_PARALLELISM,
+        "logins_per_second": verified / elapsed,
+        "logins_per_second_per_core": verified / cpu_seconds if cpu_seconds else None,
+        "cores_used": cpu_seconds / elapsed,
+        "ms_per_login": sum(latencies) * 1000 / verified if verified else None,
+        "rejected": pool.rejected,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du hachage Argon2 (logins/s par cœur)")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    for key, value in benchmark(args.workers, args.seconds).items():
+        print(f"{key}: {value}")
@@ -0,0 +1,148 @@
+# backend/services/payment_service.py
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from uuid import UUID
+from decimal import Decimal
+
+from backend.models.recharge_entity import RechargeStatus
+from backend.repositories.recharge_repository import RechargeRepository
+from backend.repositories.inventory_repository import InventoryRepository
+from backend.repositories.wallet_repository import WalletRepository
+from backend.repositories.payout_job_repository import PayoutJobRepository
+from backend.services.recharge_service import STOCK_SAFETY_MARGIN_USDC, refund_payment_intent
+from backend.services.treasury_service import TreasuryService
+from backend.workers.payout_worker import payout_worker
+
+# Événements Stripe journalisés et traités par le worker de webhooks
+PAYMENT_SUCCEEDED = "payment_intent.succeeded"
+PAYMENT_FAILED = "payment_intent.payment_failed"
+HANDLED_EVENT_TYPES = {PAYMENT_SUCCEEDED, PAYMENT_FAILED}
+
+
+async def dispatch_event(event: dict, session: Session):
+    """
+    Aiguille un événement Stripe vers son traitement.
+    Lève une exception en cas d'erreur transitoire pour que le worker réessaie.
+    """
+    # CAS 1 : Succès
+    if event['type'] == PAYMENT_SUCCEEDED:
+        print("\n Webhook: Paiement RÉUSSI. Traitement...")
+        await handle_payment_success(event['data']['object'], session)
+
+    # CAS 2 : Échec
+    elif event['type'] == PAYMENT_FAILED:
+        print("\n Webhook: Paiement ÉCHOUÉ. Nettoyage...")
+        await handle_payment_failure(event['data']['object'], session)
+
+
+def reserve_again(recharge, session: Session) -> bool:
+    """
+    Recharge payée alors qu'elle n'est plus PENDING (annulée ou échouée) : sa réservation de
+    stock a été libérée. On en reprend une et on la repasse en PENDING, dans une seule
+    transaction. Retourne False si le stock ne suffit plus.
+    """
+    inv_repo = InventoryRepository(session)
+    available = TreasuryService().get_master_balance_usdc() - STOCK_SAFETY_MARGIN_USDC
+    if not inv_repo.try_reserve(Decimal(str(recharge.amount_usdc_value)), recharge.id, available, commit=False):
+        session.rollback()
+        return False
+    RechargeRepository(session).transition_status(recharge.id, RechargeStatus.PENDING, commit=False)
+    session.commit()
+    return True
+
+
+async def handle_payment_success(payment_intent: dict, session: Session):
+    """
+    Paiement validé : on met en file le virement des fonds équivalents.
+    Le virement lui-même est exécuté par le worker de payouts (backend.workers.payout_worker).
+    """
+    print(f"🧐 METADATA REÇUES DE STRIPE : {payment_intent.get('metadata')}")
+
+    recharge_id = payment_intent['metadata'].get('recharge_id')
+    user_id = payment_intent['metadata'].get('user_id')
+    
+    if not recharge_id:
+        return
+
+    # 1. Initialisation des repositories
+    repo = RechargeRepository(session)
+    wallet_repo = WalletRepository(session)
+    payout_repo = PayoutJobRepository(session)
+
+    # 2. Récupération de la commande
+    # Les accès BDD (synchrones) passent par le threadpool pour libérer l'event loop
+    recharge = await run_in_threadpool(repo.get_by_id, UUID(recharge_id))
+    
+    if not recharge or recharge.status == RechargeStatus.COMPLETED:
+        # Déjà traité ou introuvable
+        return
+
+    if recharge.status != RechargeStatus.PENDING:
+        # Plus de stock réservé pour cette recharge : jamais de virement sans nouvelle réservation
+        if not await run_in_threadpool(reserve_again, recharge, session):
+            await run_in_threadpool(refund_payment_intent, payment_intent['id'], recharge.id)
+            print(f"Rupture de stock pour la recharge {recharge.id} ({recharge.status.value}) : paiement remboursé.")
+            return
+
+    print(f"Paiement de {recharge.amount_base_eur}€ validé. Mise en file du virement...")
+
+    # 3. RÉCUPÉRATION DE L'ADRESSE UTILISATEUR
+    try:
+        user_uuid = UUID(user_id)
+        user_wallet = await run_in_threadpool(wallet_repo.get_by_user_id, user_uuid)
+        
+        if not user_wallet:
+            print(f"ERREUR CRITIQUE : Aucun wallet trouvé pour l'user {user_id}")
+            # On ne peut pas livrer les fonds si l'user n'a pas de wallet
+            # TODO: Créer un ticket support ou marquer la recharge en "MANUAL_CHECK_NEEDED"
+            return
+            
+        destination_address = user_wallet.address # L'adresse 0x... stockée en BDD
+        print(f"Wallet trouvé : {destination_address}")
+
+    except Exception as e:
+        print(f"Erreur lors de la récupération du wallet : {e}")
+        raise
+
+    # 4. MISE EN FILE DU VIREMENT
+    # Un seul job par recharge (contrainte unique) : un webhook rejoué ne crée pas de second virement.
+    # On utilise 'amount_usdc_value' qui a été calculé lors de l'init_payment
+    created = await run_in_threadpool(
+        payout_repo.enqueue, recharge.id, destination_address, float(recharge.amount_usdc_value)
+    )
+    if created:
+        payout_worker.notify()
+
+
+# --- NOUVELLE FONCTION ÉCHEC ---
+async def handle_payment_failure(payment_intent: dict, session: Session):
+    """
+    Libère le stock et marque la commande comme échouée.
+    """
+    recharge_id = payment_intent['metadata'].get('recharge_id')
+    
+    if not recharge_id:
+        print("Webhook Failed reçu sans ID.")
+        return
+
+    print(f"Traitement de l'échec pour la recharge : {recharge_id}")
+
+    # 1. Init des repos
+    repo = RechargeRepository(session)
+    inv_repo = InventoryRepository(session)
+
+    try:
+        uuid_recharge = UUID(recharge_id)
+        
+        # 2. Mise à jour statut -> FAILED
+        await run_in_threadpool(repo.transition_status, uuid_recharge, RechargeStatus.FAILED)
+        print("   -> Statut mis à jour : FAILED")
+
+        # 3. Libération immédiate du stock
+        # On utilise la méthode 'secure' qu'on a codée tout à l'heure
+        await run_in_threadpool(inv_repo.delete_reservation_by_recharge_id, uuid_recharge)
+        print("   -> Stock libéré immédiatement.")
+
+    except Exception as e:
+        print(f"Erreur lors du nettoyage de l'échec : {e}")
+        raise
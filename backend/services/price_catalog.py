@@ -0,0 +1,154 @@
+# backend/services/price_catalog.py
+import asyncio
+import logging
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, NamedTuple
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.repositories.model_price_repository import ModelPriceRepository
+
+logger = logging.getLogger(__name__)
+
+TOKENS_PER_PRICE_UNIT = Decimal(1_000_000)
+# Précision des montants USDC stockés (usage_charges, token_usage)
+USDC_QUANTUM = Decimal("0.000001")
+
+
+class UnknownModelError(ValueError):
+    """Modèle absent du catalogue (ou désactivé) : l'événement ne peut pas être facturé."""
+
+    def __init__(self, model_names: Iterable[str]):
+        self.model_names = sorted(set(model_names))
+        super().__init__(f"Unknown or inactive model(s): {', '.join(self.model_names)}")
+
+
+class PriceCatalogUnavailableError(RuntimeError):
+    """Catalogue pas encore chargé (base indisponible au démarrage et depuis)."""
+
+
+class ModelRate(NamedTuple):
+    input_per_token: Decimal
+    output_per_token: Decimal
+
+
+class PriceCatalogSnapshot:
+    """État du catalogue à une version donnée. Jamais modifié : un rafraîchissement en crée un nouveau."""
+
+    def __init__(self, version: int, rates: dict[str, ModelRate]):
+        self.version = version
+        self.rates = rates
+        self.loaded_at = time.time()
+
+    def cost(self, model_name: str, input_tokens: int, output_tokens: int = 0) -> Decimal:
+        rate = self.rates.get(model_name)
+        if rate is None:
+            raise UnknownModelError([model_name])
+        return (input_tokens * rate.input_per_token + output_tokens * rate.output_per_token).quantize(
+            USDC_QUANTUM, rounding=ROUND_HALF_UP
+        )
+
+
+class PriceCatalog:
+    """
+    Catalogue des tarifs gardé en mémoire, partagé par tout le process : le coût d'un événement
+    est calculé sans requête. Un rafraîchissement ne lit que la version du catalogue ; il n'est
+    rechargé que si elle a changé, et remplacé d'un bloc (les lecteurs gardent une version cohérente).
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: PriceCatalogSnapshot | None = None
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> PriceCatalogSnapshot:
+        """Catalogue chargé ; ne fait jamais de requête (appelable depuis une route async)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise PriceCatalogUnavailableError("Price catalog is not loaded yet")
+        return snapshot
+
+    def ensure_loaded(self):
+        """Charge le catalogue s'il ne l'est pas encore (appel bloquant)."""
+        if self._snapshot is None:
+            self.refresh()
+
+    async def aensure_loaded(self):
+        if self._snapshot is None:
+            await asyncio.to_thread(self.refresh)
+
+    def refresh(self) -> bool:
+        """Recharge le catalogue si sa version a changé. Retourne True s'il a été rechargé."""
+        with self._lock, Session(engine) as session:
+            repository = ModelPriceRepository(session)
+            self.checks += 1
+            version = repository.get_version()
+            if self._snapshot is not None and self._snapshot.version == version:
+                return False
+            rates = {
+                price.model_name: ModelRate(
+                    price.input_usdc_per_million / TOKENS_PER_PRICE_UNIT,
+                    price.output_usdc_per_million / TOKENS_PER_PRICE_UNIT,
+                )
+                for price in repository.get_all(active_only=True)
+            }
+            # Les lignes lues peuvent être plus récentes que `version` : au pire, un rechargement de trop
+            self._snapshot = PriceCatalogSnapshot(version, rates)
+            self.reloads += 1
+            logger.info(f"Catalogue de tarifs chargé : version {version}, {len(rates)} modèles")
+            return True
+
+    def cost(self, model_name: str, input_tokens: int, output_tokens: int = 0) -> Decimal:
+        """Coût USDC d'un événement, arrondi au micro-USDC (appel synchrone : charge le catalogue au besoin)."""
+        self.ensure_loaded()
+        return self.snapshot.cost(model_name, input_tokens, output_tokens)
+
+    def price_batch(self, events: Iterable[tuple[str, int, int]]) -> list[Decimal]:
+        """
+        Coûts d'un lot d'événements (modèle, tokens d'entrée, tokens de sortie) en une passe,
+        tous calculés avec la même version du catalogue. Lève UnknownModelError avec la liste
+        de tous les modèles inconnus du lot, PriceCatalogUnavailableError si le catalogue n'est pas chargé.
+        """
+        rates = self.snapshot.rates
+        costs: list[Decimal] = []
+        unknown: set[str] = set()
+        for model_name, input_tokens, output_tokens in events:
+            rate = rates.get(model_name)
+            if rate is None:
+                unknown.add(model_name)
+                continue
+            costs.append(
+                (input_tokens * rate.input_per_token + output_tokens * rate.output_per_token).quantize(
+                    USDC_QUANTUM, rounding=ROUND_HALF_UP
+                )
+            )
+        if unknown:
+            raise UnknownModelError(unknown)
+        return costs
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Rafraîchissement du catalogue de tarifs impossible : {str(e)}")
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "models": len(snapshot.rates) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "checks": self.checks,
+            "reloads": self.reloads,
+        }
+
+
+price_catalog = PriceCatalog(refresh_seconds=settings.PRICE_CATALOG_REFRESH_SECONDS)
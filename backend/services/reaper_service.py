@@ -0,0 +1,158 @@
+# backend/services/reaper_service.py
+import asyncio
+import logging
+import time
+import stripe
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlmodel import Session, text
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.models.inventory_entity import get_expiration_time
+from backend.repositories.inventory_repository import InventoryRepository
+from backend.repositories.recharge_repository import RechargeRepository
+from backend.services.recharge_service import cancel_payment_intent
+
+logger = logging.getLogger(__name__)
+
+# Clé du verrou consultatif Postgres qui désigne le leader parmi les workers
+REAPER_LOCK_KEY = 734_201_001
+
+
+class ReaperService:
+    """
+    Nettoyage périodique lancé dans le lifespan de chaque worker :
+    - libère les réservations de stock expirées par lots bornés et annule leurs recharges PENDING,
+      après avoir annulé l'intent Stripe (prolongées si l'intent est déjà payé) ;
+    - annule de même les recharges PENDING dont l'intent Stripe n'a jamais été payé.
+
+    Un seul worker travaille à la fois : celui qui obtient le verrou consultatif Postgres.
+    """
+
+    def __init__(self, batch_size: int, max_batches: int, pending_timeout_minutes: int):
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.pending_timeout = timedelta(minutes=pending_timeout_minutes)
+        self.runs = 0
+        self.skipped_runs = 0
+        self.reservations_released = 0
+        self.recharges_cancelled = 0
+        self.last_run_at: datetime | None = None
+        self.last_duration_seconds: float | None = None
+        self.lag_seconds: float | None = None
+
+    def run_once(self) -> bool:
+        """Exécute un passage si ce worker est leader. Retourne False si un autre worker tient le verrou."""
+        with engine.connect() as lock_conn:
+            if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REAPER_LOCK_KEY}).scalar():
+                self.skipped_runs += 1
+                return False
+            # Verrou de session : il survit au commit, la connexion ne reste pas en transaction
+            # pendant tout le passage
+            lock_conn.commit()
+            try:
+                started = time.monotonic()
+                with Session(engine) as session:
+                    self._reap(session)
+                self.runs += 1
+                self.last_run_at = datetime.now(timezone.utc)
+                self.last_duration_seconds = time.monotonic() - started
+                return True
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REAPER_LOCK_KEY})
+                lock_conn.commit()
+
+    def _reap(self, session: Session):
+        inventory = InventoryRepository(session)
+        recharges = RechargeRepository(session)
+
+        # 1. Réservations expirées. Une recharge PENDING n'est annulée (et sa réservation libérée)
+        # qu'une fois son intent Stripe annulé : un paiement tardif ne trouve alors plus rien à
+        # payer. Intent déjà payé ou en cours de paiement, ou virement en file : on prolonge.
+        # Aucune transaction n'est ouverte pendant les appels Stripe : lecture du lot, fin de la
+        # transaction, appels, puis écritures dans une transaction courte (cancel_pending revérifie
+        # le statut, une recharge payée entre-temps n'est pas annulée).
+        for _ in range(self.max_batches):
+            recharge_ids = inventory.find_expired(self.batch_size)
+            pending = {recharge_id: (intent_id, has_payout) for recharge_id, intent_id, has_payout in recharges.get_pending(recharge_ids)}
+            session.rollback()
+            to_release = [recharge_id for recharge_id in recharge_ids if recharge_id not in pending]
+            to_cancel, to_extend, stripe_failed = [], [], False
+            for recharge_id, (intent_id, has_payout) in pending.items():
+                if has_payout:
+                    to_extend.append(recharge_id)
+                    continue
+                try:
+                    (to_cancel if cancel_payment_intent(intent_id) else to_extend).append(recharge_id)
+                except stripe.error.StripeError as e:
+                    # Stripe indisponible : le reste du lot attend le prochain passage
+                    logger.warning(f"Annulation de l'intent {intent_id} impossible : {str(e)}")
+                    stripe_failed = True
+                    break
+            released = inventory.release(to_release + to_cancel, commit=False)
+            cancelled = recharges.cancel_pending(to_cancel, commit=False)
+            inventory.extend(to_extend, get_expiration_time(), commit=False)
+            session.commit()
+            self.reservations_released += released
+            self.recharges_cancelled += cancelled
+            if stripe_failed or len(recharge_ids) < self.batch_size:
+                break
+
+        # 2. Recharges PENDING abandonnées (sans réservation ni virement) : même règle, l'intent
+        # Stripe est annulé d'abord. Celles dont l'intent est payé sont laissées au webhook.
+        created_before = datetime.now(timezone.utc) - self.pending_timeout
+        skipped: list[UUID] = []
+        for _ in range(self.max_batches):
+            abandoned = recharges.find_abandoned(created_before, self.batch_size, exclude=skipped)
+            session.rollback()
+            to_cancel, stripe_failed = [], False
+            for recharge_id, intent_id in abandoned:
+                try:
+                    (to_cancel if cancel_payment_intent(intent_id) else skipped).append(recharge_id)
+                except stripe.error.StripeError as e:
+                    logger.warning(f"Annulation de l'intent {intent_id} impossible : {str(e)}")
+                    stripe_failed = True
+                    break
+            self.recharges_cancelled += recharges.cancel_pending(to_cancel)
+            if stripe_failed or len(abandoned) < self.batch_size:
+                break
+
+        # 3. Retard : âge de la plus ancienne réservation expirée encore présente
+        oldest = inventory.get_oldest_expired_at()
+        if oldest is None:
+            self.lag_seconds = 0.0
+        else:
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            self.lag_seconds = (datetime.now(timezone.utc) - oldest).total_seconds()
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "reservations_released": self.reservations_released,
+            "recharges_cancelled": self.recharges_cancelled,
+            "last_run_at": self.last_run_at,
+            "last_duration_seconds": self.last_duration_seconds,
+            "lag_seconds": self.lag_seconds,
+            "batch_size": self.batch_size,
+            "interval_seconds": settings.REAPER_INTERVAL_SECONDS,
+        }
+
+
+reaper = ReaperService(
+    batch_size=settings.REAPER_BATCH_SIZE,
+    max_batches=settings.REAPER_MAX_BATCHES_PER_RUN,
+    pending_timeout_minutes=settings.RECHARGE_PENDING_TIMEOUT_MINUTES,
+)
+
+
+async def run_reaper():
+    """Boucle d'arrière-plan lancée dans le lifespan de l'app."""
+    while True:
+        try:
+            await asyncio.to_thread(reaper.run_once)
+        except Exception as e:
+            logger.error(f"Erreur du reaper : {str(e)}", exc_info=True)
+        await asyncio.sleep(settings.REAPER_INTERVAL_SECONDS)
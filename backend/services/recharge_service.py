@@ -1,23 +1,59 @@
 # backend/services/recharge_service.py
 import stripe
 from sqlmodel import Session
-from uuid import UUID
+from uuid import UUID, uuid4
 from decimal import Decimal
 from fastapi import HTTPException
 import os
+import time
+import logging
 from backend.models.recharge_entity import Recharges, RechargeStatus
 from backend.repositories.recharge_repository import RechargeRepository
 from backend.repositories.inventory_repository import InventoryRepository
 from backend.services.pricing_service import PricingService
 from backend.services.treasury_service import TreasuryService
 
+logger = logging.getLogger(__name__)
+
+stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+
+# Marge gardée sur le solde du Master Wallet quand on réserve du stock
+STOCK_SAFETY_MARGIN_USDC = Decimal("0.1")
+# Placeholder de stripe_payment_intent_id tant que l'intent n'est pas créé
+PENDING_INTENT_ID = "PENDING"
+
+
+def cancel_payment_intent(intent_id: str) -> bool:
+    """
+    Annule l'intent Stripe d'une recharge abandonnée : le client ne peut plus payer.
+    Retourne True s'il est annulé (ou l'était déjà), False s'il ne peut plus l'être
+    (paiement abouti ou en cours). Lève stripe.error.StripeError si Stripe est indisponible.
+    Appel réseau : à faire hors transaction, aucun verrou ne doit attendre Stripe.
+    """
+    if intent_id == PENDING_INTENT_ID:
+        # Crash avant l'enregistrement de l'intent : le client n'a jamais reçu de client_secret
+        return True
+    try:
+        stripe.PaymentIntent.cancel(intent_id, cancellation_reason="abandoned")
+        return True
+    except stripe.error.InvalidRequestError as e:
+        if e.code != "payment_intent_unexpected_state":
+            raise
+    return stripe.PaymentIntent.retrieve(intent_id).status == "canceled"
+
+
+def refund_payment_intent(intent_id: str, recharge_id: UUID):
+    """Rembourse intégralement un paiement qui ne peut pas être livré (une seule fois par recharge)."""
+    stripe.Refund.create(payment_intent=intent_id, idempotency_key=f"refund-{recharge_id}")
+
+
 class RechargeService:
     def __init__(self, session: Session):
+        self.session = session
         self.repo = RechargeRepository(session)
         self.inventory = InventoryRepository(session)
         self.pricing = PricingService()
         self.treasury = TreasuryService()
-        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
     def init_payment_by_units(self, user_id: UUID, units: int):
         if units < 1:
@@ -27,19 +63,23 @@ class RechargeService:
         quote = self.pricing.calculate_from_units(units)
         usdc_needed = Decimal(str(quote["usdc_value"]))
 
-        # 2. VÉRIFICATION DU STOCK
+        # Unit of work : les repositories ne font que flusher, le service décide des commits.
+        # Transaction 1 (réservation + recharge) avant Stripe, transaction 2 (intent) après.
+        started = time.perf_counter()
+
+        # 2. VÉRIFICATION ET RÉSERVATION DU STOCK (atomique, une seule requête)
         physique = self.treasury.get_master_balance_usdc()
-        reserve = self.inventory.get_total_reserved_amount()
-        
-        # Marge de sécurité de 0.1 USDC
-        if (physique - reserve) < (usdc_needed + Decimal("0.1")):
+        recharge_id = uuid4()
+        if not self.inventory.try_reserve(usdc_needed, recharge_id, physique - STOCK_SAFETY_MARGIN_USDC, commit=False):
+            self.session.rollback()
             raise HTTPException(status_code=409, detail="Rupture de stock temporaire.")
 
         # 3. SAUVEGARDE EN BDD
         recharge = Recharges(
+            id=recharge_id,
             user_id=user_id,
             status=RechargeStatus.PENDING,
-            stripe_payment_intent_id="PENDING",
+            stripe_payment_intent_id=PENDING_INTENT_ID,
             
             # Données financières calculées
             amount_base_eur=quote["base_eur"],     
@@ -50,26 +90,9 @@ class RechargeService:
             vat_amount_eur=quote["vat_eur"],
             total_paid_eur=quote["total_to_pay"]   
         )
-        saved_recharge = self.repo.create(recharge)
-
-        # 4. RÉSERVATION DU STOCK
-        self.inventory.create_reservation(float(usdc_needed), saved_recharge.id)
-
-        # 5. CRÉATION INTENT STRIPE
         try:
-            intent = stripe.PaymentIntent.create(
-                amount=int(round(quote["total_to_pay"] * 100)), # Montant TTC en centimes
-                currency="eur",
-                automatic_payment_methods={"enabled": True},
-                metadata={
-                    "recharge_id": str(saved_recharge.id),
-                    "user_id": str(user_id)
-                }
-            )
-            
-            self.repo.update(saved_recharge.id, {"stripe_payment_intent_id": intent.id})
-            
-            # 6. Réponse API
+            saved_recharge = self.repo.create(recharge, commit=False)
+            # Capturé avant le commit : pas de relecture de la ligne après expiration de la session
             recharge_read_data = {
                 "id": saved_recharge.id,
                 "user_id": saved_recharge.user_id,
@@ -83,8 +106,31 @@ class RechargeService:
                 "stripe_fee_eur": float(saved_recharge.stripe_fee_eur),
                 "total_paid_eur": float(saved_recharge.total_paid_eur),
                 "payment_provider": "stripe",
-                "provider_reference": intent.id,
             }
+            self.session.commit()
+        except Exception:
+            # La réservation et la recharge disparaissent ensemble
+            self.session.rollback()
+            raise
+
+        # 4. CRÉATION INTENT STRIPE
+        try:
+            intent = stripe.PaymentIntent.create(
+                amount=int(round(quote["total_to_pay"] * 100)), # Montant TTC en centimes
+                currency="eur",
+                automatic_payment_methods={"enabled": True},
+                metadata={
+                    "recharge_id": str(recharge_id),
+                    "user_id": str(user_id)
+                }
+            )
+            
+            self.repo.update_fields(recharge_id, {"stripe_payment_intent_id": intent.id}, commit=False)
+            self.session.commit()
+            logger.debug(f"Checkout {recharge_id} : 2 commits, {(time.perf_counter() - started) * 1000:.1f} ms (Stripe inclus)")
+            
+            # 5. Réponse API
+            recharge_read_data["provider_reference"] = intent.id
 
             return {
                 "client_secret": intent.client_secret,
@@ -92,6 +138,8 @@ class RechargeService:
             }
 
         except Exception as e:
-            self.inventory.delete_reservation_by_recharge_id(saved_recharge.id)
-            self.repo.update(saved_recharge.id, {"status": RechargeStatus.FAILED})
-            raise e
\ No newline at end of file
+            self.session.rollback()
+            self.inventory.delete_reservation_by_recharge_id(recharge_id, commit=False)
+            self.repo.transition_status(recharge_id, RechargeStatus.FAILED, commit=False)
+            self.session.commit()
+            raise e
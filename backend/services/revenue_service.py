@@ -0,0 +1,77 @@
+# backend/services/revenue_service.py
+"""
+Rapports de revenus (montants HT, frais, TVA, frais Stripe) à partir de revenue_rollups.
+
+Recalcul des rollups depuis recharges (après une correction manuelle de données, par exemple) :
+    python -m backend.services.revenue_service --backfill --from 2026-01-01 [--to 2026-10-01]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db.session import engine
+from backend.models.recharge_entity import RechargeStatus
+from backend.repositories.revenue_rollup_repository import (
+    RevenueRollupRepository,
+    AsyncRevenueRollupRepository,
+    SUM_COLUMNS,
+)
+from backend.schema.revenue import RevenueBucket, RevenueReport, RevenueTotals
+
+# Plage maximale par granularité : borne la taille des réponses
+MAX_RANGE = {"hour": timedelta(days=31), "day": timedelta(days=3 * 366)}
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Les colonnes sont des timestamps UTC sans fuseau : asyncpg refuse les datetimes avec fuseau."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class RevenueService:
+    def __init__(self, session: AsyncSession):
+        self.repository = AsyncRevenueRollupRepository(session)
+
+    async def get_report(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        status: RechargeStatus | None = None,
+    ) -> RevenueReport:
+        """Lève ValueError si la plage est invalide ou trop large pour la granularité."""
+        start, end = naive_utc(start), naive_utc(end)
+        if granularity not in MAX_RANGE:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        if start >= end:
+            raise ValueError("start must be before end")
+        if end - start > MAX_RANGE[granularity]:
+            raise ValueError(f"Range too large for granularity '{granularity}' (max {MAX_RANGE[granularity].days} days)")
+
+        rows = await self.repository.get_series(granularity, start, end, status)
+        buckets = [RevenueBucket(bucket=row.bucket, status=row.status, **{c: getattr(row, c) for c in SUM_COLUMNS}) for row in rows]
+        totals: dict[RechargeStatus, RevenueTotals] = {}
+        for bucket in buckets:
+            total = totals.setdefault(bucket.status, RevenueTotals())
+            for column in SUM_COLUMNS:
+                setattr(total, column, getattr(total, column) + getattr(bucket, column))
+        return RevenueReport(granularity=granularity, start=start, end=end, buckets=buckets, totals=totals)
+
+
+def backfill(start: datetime, end: datetime) -> int:
+    with Session(engine) as session:
+        return RevenueRollupRepository(session).backfill(start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rollups de revenus")
+    parser.add_argument("--backfill", action="store_true", required=True, help="recalcule les rollups depuis recharges")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, required=True, help="début inclus (ISO 8601)")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, default=None, help="fin exclue (défaut : maintenant)")
+    args = parser.parse_args()
+
+    end = args.end or datetime.utcnow()
+    buckets = backfill(args.start, end)
+    print(f"{buckets} buckets recalculés entre {args.start.isoformat()} et {end.isoformat()}")
@@ -0,0 +1,154 @@
+# backend/services/smtp_pool.py
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from ssl import create_default_context
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(to_email: str, subject: str, body: str) -> MIMEText:
+    message = MIMEText(body, "html")
+    message["From"] = settings.FROM_MAIL
+    message["To"] = to_email
+    message["Subject"] = subject
+    return message
+
+
+def is_transient(error: Exception) -> bool:
+    """Erreurs SMTP qui méritent un nouvel essai : coupure réseau ou réponse 4xx."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+class SMTPConnectionPool:
+    """
+    Petit pool de connexions SMTP déjà authentifiées (EHLO + STARTTLS + LOGIN faits une fois).
+    Chaque emprunt envoie plusieurs messages à la suite sur la même connexion.
+    Une connexion inactive depuis plus de `max_idle_seconds` est fermée plutôt que réutilisée,
+    et une connexion coupée par le serveur est rouverte une fois avant d'abandonner.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, use_tls: bool,
+                 size: int, max_idle_seconds: float, timeout: float):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[tuple[float, smtplib.SMTP]] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls(context=create_default_context())
+                server.ehlo()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _take(self) -> smtplib.SMTP | None:
+        """Connexion inactive la plus récente encore fraîche, ou None."""
+        while True:
+            try:
+                released_at, server = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - released_at <= self.max_idle_seconds:
+                return server
+            self._close(server)
+
+    def _send(self, server: smtplib.SMTP | None, message: MIMEText) -> smtplib.SMTP:
+        if server is None:
+            server = self._connect()
+            server.send_message(message)
+            return server
+        try:
+            server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Connexion réutilisée fermée côté serveur : une seule reconnexion
+            self.reconnects += 1
+            server = self._connect()
+            server.send_message(message)
+        return server
+
+    def send_many(self, messages: list[MIMEText]) -> list[Exception | None]:
+        """Envoie les messages sur une même connexion ; retourne l'erreur de chaque message (ou None)."""
+        results: list[Exception | None] = []
+        with self._slots:
+            server = self._take()
+            try:
+                for message in messages:
+                    try:
+                        server = self._send(server, message)
+                        self.messages_sent += 1
+                        results.append(None)
+                    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                        # Refus du serveur pour ce message : la connexion reste utilisable
+                        results.append(e)
+                    except Exception as e:
+                        # Serveur injoignable : inutile d'essayer le reste du lot
+                        if server is not None:
+                            server.close()
+                        server = None
+                        results.extend([e] * (len(messages) - len(results)))
+                        break
+            finally:
+                if server is not None:
+                    self._idle.put((time.monotonic(), server))
+        return results
+
+    def close(self):
+        server = self._take()
+        while server is not None:
+            self._close(server)
+            server = self._take()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle_connections": self._idle.qsize(),
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "messages_sent": self.messages_sent,
+        }
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.MAIL_HOST,
+    port=settings.MAIL_PORT,
+    username=settings.MAIL_USERNAME,
+    password=settings.MAIL_PASSWORD.get_secret_value(),
+    use_tls=settings.MAIL_USE_TLS,
+    size=settings.MAIL_SMTP_POOL_SIZE,
+    max_idle_seconds=settings.MAIL_SMTP_MAX_IDLE_SECONDS,
+    timeout=settings.MAIL_SMTP_TIMEOUT,
+)
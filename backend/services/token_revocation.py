@@ -0,0 +1,72 @@
+# backend/services/token_revocation.py
+import logging
+import redis
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from backend.core.config import settings
+from backend.db.redis_pool import redis_pools
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationList:
+    """
+    Liste de révocation des JWT, tenue dans Redis : une clé par utilisateur dont les tokens
+    ont été invalidés, contenant sa token_version courante. Un token dont la claim `ver` est
+    inférieure est refusé. La clé expire avec le plus long des tokens qu'elle peut viser :
+    seuls les utilisateurs révoqués récemment occupent de la place.
+
+    Postgres (users.token_version) reste la référence : il est lu au refresh et, pour les
+    tokens d'accès, seulement si Redis est indisponible.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.checks = 0
+        self.rejected = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"auth:token_version:{user_id}"
+
+    def revoke(self, user_id: UUID, current_version: int):
+        """Invalide les tokens émis avant `current_version` (après commit de la nouvelle version)."""
+        try:
+            redis_pools.client.setex(self._key(user_id), self.ttl_seconds, current_version)
+        except redis.RedisError as e:
+            # Les tokens d'accès restent valides jusqu'à expiration ; le refresh, lui, lit Postgres
+            logger.error(f"Révocation des tokens de {user_id} non publiée dans Redis : {str(e)}")
+
+    async def arevoke(self, user_id: UUID, current_version: int):
+        try:
+            await redis_pools.async_client.setex(self._key(user_id), self.ttl_seconds, current_version)
+        except redis.RedisError as e:
+            logger.error(f"Révocation des tokens de {user_id} non publiée dans Redis : {str(e)}")
+
+    async def is_revoked(self, user_id: UUID, version: int, fallback: Callable[[], Awaitable[int | None]]) -> bool:
+        """
+        True si le token (user_id, version) a été révoqué.
+        `fallback` lit la version dans Postgres (None si l'utilisateur n'existe plus).
+        """
+        self.checks += 1
+        try:
+            current = await redis_pools.async_client.get(self._key(user_id))
+            revoked = current is not None and version < int(current)
+        except redis.RedisError as e:
+            logger.warning(f"Liste de révocation indisponible, vérification dans Postgres ({str(e)})")
+            self.fallbacks += 1
+            current = await fallback()
+            revoked = current is None or version < current
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def stats(self) -> dict:
+        return {"checks": self.checks, "rejected": self.rejected, "postgres_fallbacks": self.fallbacks}
+
+
+token_revocations = TokenRevocationList(
+    ttl_seconds=int(max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_MINUTES) * 60) + 60,
+)
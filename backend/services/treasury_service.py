@@ -1,15 +1,165 @@
 # backend/services/treasury_service.py
 import uuid
 import os
+import asyncio
+import threading
+import time
+from collections import deque
 from decimal import Decimal
-from backend.services.circle_service import CircleService
+from typing import Awaitable, Callable
+from backend.services.circle_service import CircleService, AsyncCircleService
 from core.config import settings
 
+class MasterBalanceCache:
+    """
+    Solde USDC du Master Wallet gardé quelques secondes en mémoire, partagé par tout le process.
+    Les requêtes concurrentes sur un cache expiré sont coalescées (single-flight) : une seule
+    requête /balances part vers Circle, les autres attendent son résultat.
+    Les transferts sortants sont décomptés localement pour que la vérification de stock
+    reste prudente entre deux rafraîchissements. Ils sont gardés à part du solde lu et retirés
+    de chaque nouvelle lecture tant qu'une requête partie settle_seconds après eux n'a pas pu
+    les voir : un rafraîchissement ne les efface pas.
+    """
+
+    def __init__(self, ttl_seconds: float, settle_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.settle_seconds = settle_seconds
+        self._value: Decimal | None = None
+        self._fetched_at = 0.0
+        # (instant, montant) des transferts sortants pas encore reflétés par Circle
+        self._debits: deque[tuple[float, Decimal]] = deque()
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._async_refresh_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _net(self) -> Decimal | None:
+        """Solde lu moins les débits locaux en attente (appelé sous _state_lock)."""
+        if self._value is None:
+            return None
+        return self._value - sum((amount for _, amount in self._debits), Decimal("0"))
+
+    def _fresh(self) -> Decimal | None:
+        with self._state_lock:
+            if time.monotonic() - self._fetched_at < self.ttl_seconds:
+                return self._net()
+        return None
+
+    def _store(self, value: Decimal, started: float) -> Decimal:
+        # Horodaté au départ de la requête : un débit pendant la lecture reste décompté
+        with self._state_lock:
+            self._value = value
+            self._fetched_at = started
+            while self._debits and self._debits[0][0] <= started - self.settle_seconds:
+                self._debits.popleft()
+            return self._net()  # pyright: ignore
+
+    def get(self, fetch: Callable[[], Decimal]) -> Decimal:
+        value = self._fresh()
+        if value is not None:
+            self.hits += 1
+            return value
+        with self._refresh_lock:
+            # Un autre thread a peut-être rafraîchi pendant qu'on attendait le verrou
+            value = self._fresh()
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            started = time.monotonic()
+            return self._store(fetch(), started)
+
+    async def aget(self, fetch: Callable[[], Awaitable[Decimal]]) -> Decimal:
+        value = self._fresh()
+        if value is not None:
+            self.hits += 1
+            return value
+        async with self._async_refresh_lock:
+            value = self._fresh()
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            started = time.monotonic()
+            return self._store(await fetch(), started)
+
+    def debit(self, amount: Decimal):
+        """Décompte un transfert sortant du solde en cache et des prochaines lectures."""
+        with self._state_lock:
+            self._debits.append((time.monotonic(), amount))
+
+    def invalidate(self):
+        with self._state_lock:
+            self._value = None
+
+    def stats(self) -> dict:
+        with self._state_lock:
+            net = self._net()
+            pending = len(self._debits)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_balance": str(net) if net is not None else None,
+            "pending_debits": pending,
+        }
+
+
+balance_cache = MasterBalanceCache(
+    ttl_seconds=settings.MASTER_BALANCE_CACHE_TTL_SECONDS,
+    settle_seconds=settings.MASTER_BALANCE_DEBIT_SETTLE_SECONDS,
+)
+
+
+def transfer_payload(
+    ciphertext: str,
+    amount: float | Decimal,
+    token_id: str,
+    wallet_id: str,
+    destination_address: str,
+    ref_id: str,
+    idempotency_key: str | None = None,
+) -> dict:
+    """Corps d'un transfert USDC Circle (le gas est payé en USDC sur ARC)."""
+    return {
+        "idempotencyKey": idempotency_key or str(uuid.uuid4()),
+        "entitySecretCiphertext": ciphertext,
+        "amounts": [str(amount)],
+        "feeLevel": "MEDIUM",
+        "tokenId": token_id,
+        "walletId": wallet_id,
+        "destinationAddress": destination_address,
+        "refId": ref_id
+    }
+
+
+def usdc_balance(data: dict, token_id: str) -> Decimal:
+    """Solde du jeton USDC dans une réponse /balances de Circle."""
+    for b in data.get("data", {}).get("tokenBalances", []):
+        if b.get("token", {}).get("id") == token_id:
+            return Decimal(b.get("amount", "0"))
+    return Decimal("0.00")
+
+
+def master_wallet(data: dict) -> dict:
+    """Wallet d'une réponse /wallets/{id} de Circle."""
+    master = data.get("data", {}).get("wallet", {})
+    if not master:
+        raise ValueError("Master Wallet introuvable")
+    return master
+
+
+# Adresse de chaque Master Wallet, lue une fois par process (elle ne change pas) ;
+# partagée par TreasuryService et AsyncTreasuryService
+master_addresses: dict[str, str] = {}
+
+
 class TreasuryService:
     """
     Gère le Master Wallet sur ARC-TESTNET.
     Spécificité ARC : Le Gas se paie en USDC.
     """
+
     def __init__(self):
         self.connector = CircleService()
         self.master_wallet_id = settings.MASTER_WALLET_ID
@@ -17,61 +167,138 @@ class TreasuryService:
 
     def get_master(self) -> dict:
         """Récupère les infos du Master Wallet"""
-        endpoint = f"/w3s/wallets/{self.master_wallet_id}"
-        master_wallet = self.connector.get(endpoint).get("data", {}).get("wallet", {})
-        if not master_wallet:
-            raise ValueError("Master Wallet introuvable")
-        return master_wallet
+        return master_wallet(self.connector.get(f"/w3s/wallets/{self.master_wallet_id}"))
 
     def get_master_balance_usdc(self) -> Decimal:
-        """Récupère le solde USDC disponible"""
-        endpoint = f"/w3s/wallets/{self.master_wallet_id}/balances"
-        data = self.connector.get(endpoint)
-        balances = data.get("data", {}).get("tokenBalances", [])
-        
-        for b in balances:
-            if b.get("token", {}).get("id") == self.usdc_token_id:
-                return Decimal(b.get("amount", "0"))
-        return Decimal("0.00")
+        """Solde USDC disponible (cache partagé de quelques secondes)."""
+        return balance_cache.get(self.fetch_master_balance_usdc)
+
+    def fetch_master_balance_usdc(self) -> Decimal:
+        """Récupère le solde USDC disponible directement auprès de Circle"""
+        data = self.connector.get(f"/w3s/wallets/{self.master_wallet_id}/balances")
+        return usdc_balance(data, self.usdc_token_id)
 
-    def execute_transfer_to_user(self, user_wallet_address: str, amount: float) -> str:
+    def execute_transfer_to_user(self, user_wallet_address: str, amount: float, idempotency_key: str | None = None) -> str:
+        """
+        Envoie des USDC du Master Wallet vers l'utilisateur.
+        Rejouer un appel avec le même idempotency_key ne crée pas de second transfert côté Circle.
+        """
         # Vérification du solde (Marchandise + Gas)
         balance = self.get_master_balance_usdc()
         if balance < Decimal(str(amount)) + Decimal("0.1"):
             print(f"Solde bas ({balance}) pour envoi de {amount}")
 
         # Envoi
-        payload = {
-            "idempotencyKey": str(uuid.uuid4()),
-            "entitySecretCiphertext": self.connector.encrypt_entity_secret(),
-            "amounts": [str(amount)],
-            "feeLevel": "MEDIUM",
-            "tokenId": self.usdc_token_id,
-            "walletId": self.master_wallet_id,
-            "destinationAddress": user_wallet_address,
-            "refId": f"payout_{uuid.uuid4()}"
-        }
-        
+        payload = transfer_payload(
+            ciphertext=self.connector.encrypt_entity_secret(),
+            amount=amount,
+            token_id=self.usdc_token_id,
+            wallet_id=self.master_wallet_id,
+            destination_address=user_wallet_address,
+            ref_id=f"payout_{idempotency_key or uuid.uuid4()}",
+            idempotency_key=idempotency_key,
+        )
+
         response = self.connector.post("/w3s/developer/transactions/transfer", payload)
+        balance_cache.debit(Decimal(str(amount)))
         return response.get("data", {}).get("id")
     
-    def charge_user_wallet(self, user_wallet_id: str, amount: float) -> str:
+    def get_master_address(self) -> str:
+        """Adresse du Master Wallet, lue une fois par process (elle ne change pas)."""
+        if self.master_wallet_id not in master_addresses:
+            master_addresses[self.master_wallet_id] = self.get_master().get("address")
+        return master_addresses[self.master_wallet_id]
+
+    def charge_user_wallet(self, user_wallet_id: str, amount: float | Decimal, idempotency_key: str | None = None) -> str:
         """
         Débite le wallet de l'utilisateur pour le payer au Master Wallet.
+        Rejouer un appel avec le même idempotency_key ne crée pas de second transfert côté Circle.
         Retourne l'ID de la transaction pour suivi.
         """
-        payload = {
-            "idempotencyKey": str(uuid.uuid4()),
-            "entitySecretCiphertext": self.connector.encrypt_entity_secret(),
-            "amounts": [str(amount)],
-            "feeLevel": "MEDIUM",
-            "tokenId": self.usdc_token_id,
-            "walletId": user_wallet_id,
-            "destinationAddress": self.get_master().get("address"),
-            "refId": f"charge_usage_{uuid.uuid4()}"
-        }
-        
+        payload = transfer_payload(
+            ciphertext=self.connector.encrypt_entity_secret(),
+            amount=amount,
+            token_id=self.usdc_token_id,
+            wallet_id=user_wallet_id,
+            destination_address=self.get_master_address(),
+            ref_id=f"charge_usage_{idempotency_key or uuid.uuid4()}",
+            idempotency_key=idempotency_key,
+        )
+
         response = self.connector.post("/w3s/developer/transactions/transfer", payload)
         
         return response.get("data", {}).get("id")
-    
\ No newline at end of file
+
+
+class AsyncTreasuryService:
+    """
+    Équivalent asyncio de TreasuryService (mêmes opérations, en coroutines) basé sur AsyncCircleService.
+    Utilisé par les workers de virements et de règlements pour ne jamais bloquer l'event loop sur Circle.
+    """
+
+    def __init__(self):
+        self.connector = AsyncCircleService()
+        self.master_wallet_id = settings.MASTER_WALLET_ID
+        self.usdc_token_id = settings.USDC_TOKEN_ID
+
+    async def get_master(self) -> dict:
+        """Récupère les infos du Master Wallet"""
+        return master_wallet(await self.connector.get(f"/w3s/wallets/{self.master_wallet_id}"))
+
+    async def get_master_balance_usdc(self) -> Decimal:
+        """Solde USDC disponible (cache partagé de quelques secondes)."""
+        return await balance_cache.aget(self.fetch_master_balance_usdc)
+
+    async def fetch_master_balance_usdc(self) -> Decimal:
+        """Récupère le solde USDC disponible directement auprès de Circle"""
+        data = await self.connector.get(f"/w3s/wallets/{self.master_wallet_id}/balances")
+        return usdc_balance(data, self.usdc_token_id)
+
+    async def execute_transfer_to_user(self, user_wallet_address: str, amount: float, idempotency_key: str | None = None) -> str:
+        """
+        Envoie des USDC du Master Wallet vers l'utilisateur.
+        Rejouer un appel avec le même idempotency_key ne crée pas de second transfert côté Circle.
+        """
+        # Vérification du solde (Marchandise + Gas)
+        balance = await self.get_master_balance_usdc()
+        if balance < Decimal(str(amount)) + Decimal("0.1"):
+            print(f"Solde bas ({balance}) pour envoi de {amount}")
+
+        payload = transfer_payload(
+            ciphertext=await self.connector.encrypt_entity_secret(),
+            amount=amount,
+            token_id=self.usdc_token_id,
+            wallet_id=self.master_wallet_id,
+            destination_address=user_wallet_address,
+            ref_id=f"payout_{idempotency_key or uuid.uuid4()}",
+            idempotency_key=idempotency_key,
+        )
+
+        response = await self.connector.post("/w3s/developer/transactions/transfer", payload)
+        balance_cache.debit(Decimal(str(amount)))
+        return response.get("data", {}).get("id")
+
+    async def get_master_address(self) -> str:
+        """Adresse du Master Wallet, lue une fois par process (elle ne change pas)."""
+        if self.master_wallet_id not in master_addresses:
+            master_addresses[self.master_wallet_id] = (await self.get_master()).get("address")
+        return master_addresses[self.master_wallet_id]
+
+    async def charge_user_wallet(self, user_wallet_id: str, amount: float | Decimal, idempotency_key: str | None = None) -> str:
+        """
+        Débite le wallet de l'utilisateur pour le payer au Master Wallet.
+        Rejouer un appel avec le même idempotency_key ne crée pas de second transfert côté Circle.
+        Retourne l'ID de la transaction pour suivi.
+        """
+        payload = transfer_payload(
+            ciphertext=await self.connector.encrypt_entity_secret(),
+            amount=amount,
+            token_id=self.usdc_token_id,
+            wallet_id=user_wallet_id,
+            destination_address=await self.get_master_address(),
+            ref_id=f"charge_usage_{idempotency_key or uuid.uuid4()}",
+            idempotency_key=idempotency_key,
+        )
+
+        response = await self.connector.post("/w3s/developer/transactions/transfer", payload)
+        return response.get("data", {}).get("id")
@@ -0,0 +1,298 @@
+# backend/services/units_balance.py
+import asyncio
+import logging
+import uuid
+from decimal import Decimal
+from uuid import UUID
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.core.config import settings
+from backend.db.redis_pool import redis_pools
+from backend.db.session import engine, async_engine
+from backend.repositories.units_ledger_repository import UnitsLedgerRepository, AsyncUnitsLedgerRepository
+
+logger = logging.getLogger(__name__)
+
+# Redis stocke des milli-unités entières : pas d'erreur d'arrondi flottant sur les soldes
+SCALE = 1000
+DIRTY_KEY = "units:dirty"
+FLUSH_LOCK_KEY = "units:flush_lock"
+
+# KEYS = solde, ensemble des soldes à écrire ; ARGV = montant, user_id
+# Retourne {-1, 0} si le solde n'est pas chargé, {0, solde} si insuffisant, {1, nouveau solde} sinon.
+DEBIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, 0}
+end
+local amount = tonumber(ARGV[1])
+local balance = tonumber(redis.call('HGET', KEYS[1], 'balance'))
+if balance < amount then
+    return {0, balance}
+end
+balance = redis.call('HINCRBY', KEYS[1], 'balance', -amount)
+redis.call('HINCRBY', KEYS[1], 'pending', -amount)
+redis.call('PERSIST', KEYS[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+return {1, balance}
+"""
+
+# KEYS = solde, crédits arrivés avant le chargement ; ARGV = solde du grand livre, units_credit_seq lu, TTL
+# Les crédits postérieurs à la lecture du grand livre (seq plus grand) sont ajoutés au solde chargé.
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    local balance = tonumber(ARGV[1])
+    local credits = redis.call('HGETALL', KEYS[2])
+    for i = 1, #credits, 2 do
+        if tonumber(credits[i]) > tonumber(ARGV[2]) then
+            balance = balance + tonumber(credits[i + 1])
+        end
+    end
+    redis.call('HSET', KEYS[1], 'balance', balance, 'pending', 0, 'flushing', 0, 'credit_seq', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return tonumber(redis.call('HGET', KEYS[1], 'balance'))
+"""
+
+# KEYS = solde, crédits en attente de chargement ; ARGV = montant, units_credit_seq du crédit, TTL des crédits
+CREDIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    return 0
+end
+if tonumber(redis.call('HGET', KEYS[1], 'credit_seq')) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'balance', ARGV[1])
+return 1
+"""
+
+# KEYS = solde ; ARGV = nouvel identifiant de flush
+# Un flush interrompu (crash avant l'acquittement) est repris avec son identifiant d'origine.
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0, ''}
+end
+local flushing = tonumber(redis.call('HGET', KEYS[1], 'flushing')) or 0
+if flushing ~= 0 then
+    return {flushing, redis.call('HGET', KEYS[1], 'flush_id')}
+end
+local pending = tonumber(redis.call('HGET', KEYS[1], 'pending')) or 0
+if pending == 0 then
+    return {0, ''}
+end
+redis.call('HSET', KEYS[1], 'flushing', pending, 'pending', 0, 'flush_id', ARGV[1])
+return {pending, ARGV[1]}
+"""
+
+# KEYS = solde, ensemble des soldes à écrire ; ARGV = identifiant de flush, user_id, TTL d'inactivité
+ACK_SCRIPT = """
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[1], 'flush_id') == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'flushing', 0)
+    redis.call('HDEL', KEYS[1], 'flush_id')
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[2])
+elseif (tonumber(redis.call('HGET', KEYS[1], 'pending')) or 0) == 0
+    and (tonumber(redis.call('HGET', KEYS[1], 'flushing')) or 0) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def to_milli(units: float | Decimal) -> int:
+    return int((Decimal(str(units)) * SCALE).to_integral_value())
+
+
+class UnitsBalanceService:
+    """
+    Solde d'unités prépayées tenu dans Redis pour le chemin chaud (un EVALSHA par débit).
+
+    Règles de reprise :
+    - Les crédits (recharges terminées, ajustements) sont écrits dans le grand livre units_ledger
+      d'abord, dans la transaction de la recharge, puis reportés dans Redis : jamais perdus.
+    - Les débits sont écrits dans Redis seulement (champ `pending`) puis reportés en différé dans
+      le grand livre. Chaque report porte un identifiant (flush_id, transaction_id de l'écriture) :
+      rejouer un report interrompu par un crash n'applique pas deux fois le même delta.
+    - Si Redis perd un solde, il est rechargé depuis le grand livre (dernier instantané + écritures
+      suivantes) : seuls les débits des dernières secondes (au plus UNITS_WRITE_BEHIND_SECONDS)
+      sont perdus, au bénéfice de l'utilisateur.
+    """
+
+    def __init__(self, write_behind_seconds: float, batch_size: int, idle_ttl_seconds: int):
+        self.write_behind_seconds = write_behind_seconds
+        self.batch_size = batch_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.debits = 0
+        self.insufficient = 0
+        self.loads = 0
+        self.credits = 0
+        self.flushed_users = 0
+        self.flush_runs = 0
+        self.skipped_flushes = 0
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"units:{user_id}"
+
+    @staticmethod
+    def _credits_key(user_id: UUID) -> str:
+        return f"units:credits:{user_id}"
+
+    # --- Chemin chaud (routes async) ---
+
+    async def _aload(self, user_id: UUID) -> int | None:
+        async with AsyncSession(async_engine) as session:
+            state = await AsyncUnitsLedgerRepository(session).get_balance_state(user_id)
+        if state is None:
+            return None
+        units, credit_seq = state
+        self.loads += 1
+        return await redis_pools.async_script(LOAD_SCRIPT)(
+            keys=[self._key(user_id), self._credits_key(user_id)],
+            args=[to_milli(units), credit_seq, self.idle_ttl_seconds],
+        )
+
+    async def aget(self, user_id: UUID) -> float | None:
+        """Solde courant (None si l'utilisateur n'existe pas)."""
+        balance = await redis_pools.async_client.hget(self._key(user_id), "balance")
+        if balance is None:
+            balance = await self._aload(user_id)
+            if balance is None:
+                return None
+        return int(balance) / SCALE
+
+    async def adebit(self, user_id: UUID, units: float | Decimal) -> tuple[bool, float]:
+        """
+        Débite `units` si le solde suffit, en un seul aller-retour Redis (EVALSHA).
+        Retourne (débité, solde après l'opération).
+        """
+        script = redis_pools.async_script(DEBIT_SCRIPT)
+        keys = [self._key(user_id), DIRTY_KEY]
+        args = [to_milli(units), str(user_id)]
+        ok, balance = await script(keys=keys, args=args)
+        if ok == -1:
+            # Solde absent de Redis (premier accès ou expiration) : chargé depuis le grand livre
+            if await self._aload(user_id) is None:
+                raise ValueError(f"User with ID {user_id} not found")
+            ok, balance = await script(keys=keys, args=args)
+        if ok == 1:
+            self.debits += 1
+        else:
+            self.insufficient += 1
+        return ok == 1, int(balance) / SCALE
+
+    # --- Crédits et ajustements (appelés après le commit Postgres) ---
+
+    def credit(self, user_id: UUID, units: float | Decimal, credit_seq: int):
+        """Reporte dans Redis un crédit (ou ajustement signé) déjà écrit dans le grand livre (seq = units_credit_seq)."""
+        try:
+            redis_pools.script(CREDIT_SCRIPT)(
+                keys=[self._key(user_id), self._credits_key(user_id)],
+                args=[to_milli(units), credit_seq, self.idle_ttl_seconds],
+            )
+            self.credits += 1
+        except Exception as e:
+            # Le grand livre a le crédit : on force un rechargement plutôt que de garder un solde faux
+            logger.error(f"Crédit de {units} unités non reporté dans Redis pour {user_id} : {str(e)}")
+            self.reset(user_id)
+
+    def reset(self, user_id: UUID):
+        """
+        Oublie le solde Redis : il sera rechargé depuis le grand livre.
+        Les débits pas encore reportés sont abandonnés.
+        """
+        try:
+            pipe = redis_pools.client.pipeline(transaction=True)
+            pipe.delete(self._key(user_id), self._credits_key(user_id))
+            pipe.srem(DIRTY_KEY, str(user_id))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Solde Redis de {user_id} non invalidé : {str(e)}")
+
+    # --- Write-behind vers le grand livre ---
+
+    def flush_once(self) -> int:
+        """
+        Reporte dans le grand livre les débits en attente, par lots (un INSERT par lot).
+        Un seul process à la fois grâce à un verrou Redis. Retourne le nombre de soldes reportés.
+        """
+        client = redis_pools.client
+        token = str(uuid.uuid4())
+        if not client.set(FLUSH_LOCK_KEY, token, nx=True, ex=max(int(self.write_behind_seconds * 10), 30)):
+            self.skipped_flushes += 1
+            return 0
+        flushed = 0
+        try:
+            batch: list[str] = []
+            for user_id in client.sscan_iter(DIRTY_KEY, count=self.batch_size):
+                batch.append(user_id)
+                if len(batch) >= self.batch_size:
+                    flushed += self._flush_batch(batch)
+                    batch = []
+            if batch:
+                flushed += self._flush_batch(batch)
+        finally:
+            redis_pools.script(RELEASE_LOCK_SCRIPT)(keys=[FLUSH_LOCK_KEY], args=[token])
+        self.flush_runs += 1
+        self.flushed_users += flushed
+        return flushed
+
+    def _flush_batch(self, user_ids: list[str]) -> int:
+        client = redis_pools.client
+        claim, ack = redis_pools.script(CLAIM_SCRIPT), redis_pools.script(ACK_SCRIPT)
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            claim(keys=[f"units:{user_id}"], args=[str(uuid.uuid4())], client=pipe)
+        claims = pipe.execute()
+        # `pending` cumule des débits (négatif) : l'écriture porte le montant débité
+        flushes = [
+            (user_id, Decimal(-delta) / SCALE, flush_id)
+            for user_id, (delta, flush_id) in zip(user_ids, claims)
+            if delta != 0
+        ]
+        if flushes:
+            # En cas d'échec, les flush restent réservés dans Redis et seront rejoués au prochain passage
+            with Session(engine) as session:
+                UnitsLedgerRepository(session).record_usage(flushes)
+        pipe = client.pipeline(transaction=False)
+        for user_id, (_, flush_id) in zip(user_ids, claims):
+            ack(keys=[f"units:{user_id}", DIRTY_KEY], args=[flush_id, user_id, self.idle_ttl_seconds], client=pipe)
+        pipe.execute()
+        return len(flushes)
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.write_behind_seconds)
+            try:
+                await asyncio.to_thread(self.flush_once)
+            except Exception as e:
+                logger.error(f"Échec du report des soldes d'unités : {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "debits": self.debits,
+            "insufficient": self.insufficient,
+            "loads": self.loads,
+            "credits": self.credits,
+            "flush_runs": self.flush_runs,
+            "skipped_flushes": self.skipped_flushes,
+            "flushed_users": self.flushed_users,
+        }
+
+
+units_balance = UnitsBalanceService(
+    write_behind_seconds=settings.UNITS_WRITE_BEHIND_SECONDS,
+    batch_size=settings.UNITS_WRITE_BEHIND_BATCH,
+    idle_ttl_seconds=settings.UNITS_IDLE_TTL_SECONDS,
+)
@@ -0,0 +1,142 @@
+# backend/services/units_ledger.py
+"""
+Instantanés de solde et contrôle d'intégrité du grand livre des unités (units_ledger).
+
+Toutes les UNITS_SNAPSHOT_INTERVAL_SECONDS secondes, un process (verrou consultatif) arrête le
+solde de chaque utilisateur dont le compte a bougé : une lecture de solde ne parcourt ensuite que
+les écritures d'un intervalle. Contrôle et réparation hors ligne :
+    python -m backend.services.units_ledger --check            # partie double + instantanés recalculés
+    python -m backend.services.units_ledger --check --repair   # corrige les instantanés en écart
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.repositories.units_ledger_repository import UnitsLedgerRepository
+from backend.services.units_balance import units_balance
+
+logger = logging.getLogger(__name__)
+
+
+class UnitsLedgerService:
+    """Passes périodiques d'instantanés de solde, lancées dans le lifespan de chaque worker."""
+
+    def __init__(self, interval_seconds: float, retention_days: int):
+        self.interval_seconds = interval_seconds
+        self.retention = timedelta(days=retention_days)
+        self.runs = 0
+        self.skipped_runs = 0
+        self.snapshots_created = 0
+        self.snapshots_pruned = 0
+        self.last_run_at: datetime | None = None
+        self.last_duration_seconds: float | None = None
+
+    def snapshot_once(self) -> int | None:
+        """Crée les instantanés dus. Retourne leur nombre, ou None si un autre process tient la passe."""
+        started = time.monotonic()
+        with Session(engine) as session:
+            repository = UnitsLedgerRepository(session)
+            created = repository.take_snapshots()
+            if created is None:
+                self.skipped_runs += 1
+                return None
+            self.snapshots_pruned += repository.prune_snapshots(datetime.now(timezone.utc) - self.retention)
+        self.runs += 1
+        self.snapshots_created += created
+        self.last_run_at = datetime.now(timezone.utc)
+        self.last_duration_seconds = time.monotonic() - started
+        return created
+
+    def check(self, limit: int = 100) -> dict:
+        """
+        Recalcule en masse depuis tout l'historique : chaque transaction doit être de somme nulle,
+        et le dernier instantané de chaque utilisateur égal à la somme de ses écritures.
+        """
+        with Session(engine) as session:
+            repository = UnitsLedgerRepository(session)
+            entries, transactions, total = repository.get_totals()
+            unbalanced = repository.find_unbalanced_transactions(limit)
+            checked, drift = repository.find_snapshot_drift(limit)
+        return {
+            "entries": entries,
+            "transactions": transactions,
+            "ledger_total": str(total),
+            "unbalanced_transactions": [
+                {"transaction_id": str(transaction_id), "sum": str(amount)} for transaction_id, amount in unbalanced
+            ],
+            "snapshots_checked": checked,
+            "snapshot_drift": [
+                {
+                    "user_id": str(user_id),
+                    "as_of_xid": as_of_xid,
+                    "snapshot_balance": str(snapshot_balance),
+                    "ledger_balance": str(ledger_balance),
+                }
+                for user_id, as_of_xid, snapshot_balance, ledger_balance in drift
+            ],
+            "ok": total == 0 and not unbalanced and not drift,
+        }
+
+    def repair(self) -> list[UUID]:
+        """Corrige les instantanés en écart ; les soldes Redis concernés sont rechargés."""
+        with Session(engine) as session:
+            user_ids = UnitsLedgerRepository(session).repair_snapshots()
+        if user_ids:
+            # Débits en attente écrits d'abord : l'invalidation ne perd alors que les plus récents
+            units_balance.flush_once()
+            for user_id in user_ids:
+                units_balance.reset(user_id)
+        return user_ids
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.snapshot_once)
+            except Exception as e:
+                logger.error(f"Échec de la passe d'instantanés de solde : {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "snapshots_created": self.snapshots_created,
+            "snapshots_pruned": self.snapshots_pruned,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+        }
+
+
+units_ledger = UnitsLedgerService(
+    interval_seconds=settings.UNITS_SNAPSHOT_INTERVAL_SECONDS,
+    retention_days=settings.UNITS_SNAPSHOT_RETENTION_DAYS,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instantanés et contrôle d'intégrité du grand livre des unités")
+    parser.add_argument("--snapshot", action="store_true", help="lance une passe d'instantanés")
+    parser.add_argument("--check", action="store_true", help="recalcule les soldes depuis tout l'historique")
+    parser.add_argument("--repair", action="store_true", help="avec --check : corrige les instantanés en écart")
+    parser.add_argument("--limit", type=int, default=100, help="écarts affichés au plus")
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.snapshot:
+        created = units_ledger.snapshot_once()
+        print("Passe déjà en cours ailleurs" if created is None else f"Instantanés créés : {created}")
+    if args.check:
+        report = units_ledger.check(args.limit)
+        print(json.dumps(report, indent=2))
+        if args.repair and report["snapshot_drift"]:
+            repaired = units_ledger.repair()
+            print(f"Instantanés corrigés : {len(repaired)}")
+        if not report["ok"]:
+            raise SystemExit(1)
@@ -0,0 +1,251 @@
+# backend/services/usage_ingestion.py
+"""
+Ingestion à haut débit du journal token_usage.
+
+Les événements sont accumulés en mémoire puis écrits par COPY, en une transaction par lot :
+dès que le tampon atteint USAGE_INGEST_FLUSH_ROWS lignes, et au plus tard toutes les
+USAGE_INGEST_FLUSH_SECONDS secondes. Un crash du process perd au plus le contenu du tampon.
+Un lot dont le COPY échoue est mis de côté et retenté seul ; après USAGE_INGEST_MAX_FLUSH_ATTEMPTS
+échecs, il est déposé en CSV dans USAGE_INGEST_DEAD_LETTER_DIR.
+
+Maintenance des partitions mensuelles et des lots en dead-letter :
+    python -m backend.services.usage_ingestion --ensure-partitions 3   # mois courant + 3 mois
+    python -m backend.services.usage_ingestion --drop-expired          # rétention USAGE_RETENTION_MONTHS
+    python -m backend.services.usage_ingestion --replay-dead-letters   # réécrit les lots déposés
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from uuid import UUID, uuid4
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.repositories.token_usage_repository import TokenUsageRepository, month_start, next_month, retention_cutoff
+from backend.services.revenue_service import naive_utc
+
+logger = logging.getLogger(__name__)
+
+
+class UsageIngestionBuffer:
+    """
+    Tampon mémoire des événements token_usage, partagé par tout le process.
+    `add` est appelable depuis une route async comme depuis un thread de route synchrone.
+    Au-delà de `max_buffered` lignes en attente (base lente ou indisponible), les nouveaux
+    événements sont refusés plutôt que d'épuiser la mémoire.
+    Un lot en échec n'est pas remis dans le tampon : il est retenté seul, avec backoff, pour
+    qu'une ligne invalide ne bloque pas les suivantes, puis déposé en dead-letter.
+    """
+
+    def __init__(
+        self,
+        flush_rows: int,
+        flush_seconds: float,
+        max_buffered: int,
+        max_flush_attempts: int,
+        dead_letter_dir: Path,
+    ):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self.max_flush_attempts = max_flush_attempts
+        self.dead_letter_dir = dead_letter_dir
+        self._rows: list[tuple] = []
+        # Lots en échec : (lignes, échecs, prochain essai en temps monotone)
+        self._failed: list[tuple[list[tuple], int, float]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # Mois dont la partition existe déjà (évite un CREATE TABLE IF NOT EXISTS par flush)
+        self._known_months: set[date] = set()
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+        self.last_flush_rows = 0
+        self.last_flush_seconds: float | None = None
+
+    @staticmethod
+    def row(
+        user_id: UUID,
+        model_name: str,
+        tokens_consumed: int,
+        cost_usdc: Decimal,
+        created_at: datetime | None = None,
+    ) -> tuple:
+        """Ligne dans l'ordre de COPY_COLUMNS."""
+        created_at = naive_utc(created_at) if created_at else datetime.utcnow()
+        return (uuid4(), created_at, user_id, model_name, tokens_consumed, cost_usdc)
+
+    def add(self, rows: list[tuple]) -> bool:
+        """Ajoute des lignes au tampon. Retourne False (rien n'est ajouté) si le tampon est plein."""
+        with self._lock:
+            if self._pending_rows() + len(rows) > self.max_buffered:
+                self.rejected += len(rows)
+                return False
+            self._rows.extend(rows)
+            self.accepted += len(rows)
+            full = len(self._rows) >= self.flush_rows
+        if full and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def _pending_rows(self) -> int:
+        return len(self._rows) + sum(len(rows) for rows, _, _ in self._failed)
+
+    def _take(self, final: bool) -> list[tuple[list[tuple], int]]:
+        """Lots à écrire : lots en échec dont le backoff est écoulé (tous si final), puis le tampon."""
+        now = time.monotonic()
+        with self._lock:
+            batches = [(rows, failures) for rows, failures, retry_at in self._failed if final or retry_at <= now]
+            self._failed = [batch for batch in self._failed if not final and batch[2] > now]
+            if self._rows:
+                batches.append((self._rows, 0))
+                self._rows = []
+        return batches
+
+    def _write(self, rows: list[tuple]):
+        with Session(engine) as session:
+            repository = TokenUsageRepository(session)
+            months = {month_start(row[1]) for row in rows} - self._known_months
+            if months:
+                repository.ensure_partitions(months)
+                self._known_months |= months
+            repository.copy_rows(rows)
+
+    def _dead_letter(self, rows: list[tuple]) -> Path:
+        """Dépose un lot en CSV, colonnes dans l'ordre de COPY_COLUMNS (voir --replay-dead-letters)."""
+        self.dead_letter_dir.mkdir(parents=True, exist_ok=True)
+        path = self.dead_letter_dir / f"token_usage-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}.csv"
+        with path.open("w", newline="") as file:
+            csv.writer(file).writerows(rows)
+        self.dead_lettered += len(rows)
+        return path
+
+    def _fail(self, rows: list[tuple], failures: int, error: Exception, final: bool):
+        """Met le lot de côté pour un nouvel essai, ou le dépose en dead-letter."""
+        self.failed_flushes += 1
+        # Une partition absente (supprimée par la rétention) sera recréée au prochain essai
+        self._known_months -= {month_start(row[1]) for row in rows}
+        if final or failures >= self.max_flush_attempts:
+            try:
+                path = self._dead_letter(rows)
+            except OSError as e:
+                self.dropped += len(rows)
+                logger.error(f"Lot de {len(rows)} événements token_usage perdu : dead-letter impossible ({str(e)}), COPY : {str(error)}")
+                return
+            logger.error(f"Lot de {len(rows)} événements token_usage déposé dans {path} après {failures} échecs : {str(error)}")
+            return
+        retry_at = time.monotonic() + self.flush_seconds * 2 ** failures
+        with self._lock:
+            self._failed.append((rows, failures, retry_at))
+        logger.warning(f"Échec de l'écriture de {len(rows)} événements token_usage (essai {failures}) : {str(error)}")
+
+    def flush(self, final: bool = False) -> int:
+        """
+        Écrit le contenu du tampon et les lots en échec dus (appel bloquant), un COPY par lot.
+        Retourne le nombre de lignes écrites. final=True (arrêt du process) : un lot qui échoue
+        encore est déposé en dead-letter plutôt que perdu avec la mémoire du process.
+        """
+        with self._flush_lock:
+            written = 0
+            for rows, failures in self._take(final):
+                started = time.monotonic()
+                try:
+                    self._write(rows)
+                except Exception as e:
+                    self._fail(rows, failures + 1, e, final)
+                    continue
+                written += len(rows)
+                self.flushes += 1
+                self.flushed += len(rows)
+                self.last_flush_rows = len(rows)
+                self.last_flush_seconds = time.monotonic() - started
+            return written
+
+    async def run_forever(self):
+        self._loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Échec de l'écriture du journal token_usage : {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._rows),
+            "failed_batches": len(self._failed),
+            "failed_rows": self._pending_rows() - len(self._rows),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dead_lettered": self.dead_lettered,
+            "last_flush_rows": self.last_flush_rows,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+usage_ingestion = UsageIngestionBuffer(
+    flush_rows=settings.USAGE_INGEST_FLUSH_ROWS,
+    flush_seconds=settings.USAGE_INGEST_FLUSH_SECONDS,
+    max_buffered=settings.USAGE_INGEST_MAX_BUFFERED,
+    max_flush_attempts=settings.USAGE_INGEST_MAX_FLUSH_ATTEMPTS,
+    dead_letter_dir=settings.USAGE_INGEST_DEAD_LETTER_DIR,
+)
+
+
+def replay_dead_letters(repository: TokenUsageRepository, dead_letter_dir: Path) -> list[Path]:
+    """Réécrit les lots déposés en dead-letter ; un fichier n'est supprimé qu'une fois écrit en base."""
+    replayed = []
+    for path in sorted(dead_letter_dir.glob("token_usage-*.csv")):
+        with path.open(newline="") as file:
+            rows = [tuple(row) for row in csv.reader(file)]
+        repository.ensure_partitions({month_start(datetime.fromisoformat(row[1])) for row in rows})
+        repository.copy_rows(rows)
+        path.unlink()
+        replayed.append(path)
+    return replayed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance des partitions mensuelles et des lots en dead-letter de token_usage")
+    parser.add_argument("--ensure-partitions", type=int, metavar="N", help="crée les partitions du mois courant et des N suivants")
+    parser.add_argument("--drop-expired", action="store_true", help="supprime les partitions au-delà de USAGE_RETENTION_MONTHS")
+    parser.add_argument("--replay-dead-letters", action="store_true", help="réécrit les lots de USAGE_INGEST_DEAD_LETTER_DIR")
+    args = parser.parse_args()
+
+    engine.echo = False
+    with Session(engine) as session:
+        repository = TokenUsageRepository(session)
+        if args.ensure_partitions is not None:
+            month = month_start(date.today())
+            months = [month]
+            for _ in range(args.ensure_partitions):
+                month = next_month(month)
+                months.append(month)
+            repository.ensure_partitions(months)
+            print(f"Partitions présentes : {', '.join(repository.list_partitions())}")
+        if args.drop_expired:
+            dropped = repository.drop_partitions_before(retention_cutoff(date.today(), settings.USAGE_RETENTION_MONTHS))
+            print(f"Partitions supprimées : {', '.join(dropped) or 'aucune'}")
+        if args.replay_dead_letters:
+            replayed = replay_dead_letters(repository, settings.USAGE_INGEST_DEAD_LETTER_DIR)
+            print(f"Lots réécrits : {', '.join(path.name for path in replayed) or 'aucun'}")
@@ -0,0 +1,215 @@
+# backend/services/user_cache.py
+import json
+import logging
+import threading
+import time
+import redis
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from backend.core.config import settings
+from backend.db.redis_pool import redis_pools
+from backend.models.user_entity import User
+
+logger = logging.getLogger(__name__)
+
+class UserCache:
+    """
+    Cache à deux niveaux devant la résolution de l'utilisateur authentifié :
+    1. LRU en mémoire du process, TTL très court ;
+    2. Redis, partagé entre workers, TTL plus long.
+    Les entrées sont indexées par email et par id, et invalidées explicitement
+    par UserService à chaque modification ou suppression.
+
+    Les objets User renvoyés sont détachés de toute session : pas de lazy-loading
+    des relations (wallet, recharges) à partir d'eux.
+    """
+
+    def __init__(self, local_size: int, local_ttl_seconds: float, redis_ttl_seconds: int):
+        self.local_size = local_size
+        self.local_ttl_seconds = local_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"user:email:{email}"
+
+    @staticmethod
+    def _id_key(user_id: UUID | str) -> str:
+        return f"user:id:{user_id}"
+
+    @staticmethod
+    def _serialize(user: User) -> dict:
+        # Le hash du mot de passe ne quitte jamais Postgres
+        return {
+            "id": str(user.id),
+            "email": user.email,
+            "nom": user.nom,
+            "prenom": user.prenom,
+            "role": user.role,
+            "created_at": user.created_at.isoformat(),
+        }
+
+    @staticmethod
+    def _deserialize(data: dict) -> User:
+        return User(
+            id=UUID(data["id"]),
+            email=data["email"],
+            nom=data["nom"],
+            prenom=data["prenom"],
+            role=data["role"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            hashed_password="",
+        )
+
+    def _local_get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return data
+
+    def _local_set(self, key: str, data: dict):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl_seconds, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _store(self, data: dict):
+        email_key, id_key = self._email_key(data["email"]), self._id_key(data["id"])
+        self._local_set(email_key, data)
+        self._local_set(id_key, data)
+        try:
+            raw = json.dumps(data)
+            pipe = redis_pools.client.pipeline(transaction=False)
+            pipe.setex(email_key, self.redis_ttl_seconds, raw)
+            pipe.setex(id_key, self.redis_ttl_seconds, raw)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : écriture Redis impossible ({str(e)})")
+
+    async def _astore(self, data: dict):
+        email_key, id_key = self._email_key(data["email"]), self._id_key(data["id"])
+        self._local_set(email_key, data)
+        self._local_set(id_key, data)
+        try:
+            raw = json.dumps(data)
+            pipe = redis_pools.async_client.pipeline(transaction=False)
+            pipe.setex(email_key, self.redis_ttl_seconds, raw)
+            pipe.setex(id_key, self.redis_ttl_seconds, raw)
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : écriture Redis impossible ({str(e)})")
+
+    def _get(self, key: str, loader: Callable[[], User | None]) -> User | None:
+        data = self._local_get(key)
+        if data is not None:
+            self.local_hits += 1
+            return self._deserialize(data)
+
+        try:
+            raw = redis_pools.client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : lecture Redis impossible ({str(e)})")
+            raw = None
+        if raw:
+            self.redis_hits += 1
+            data = json.loads(raw)  # pyright: ignore
+            self._local_set(key, data)
+            return self._deserialize(data)
+
+        self.misses += 1
+        user = loader()
+        if user is None:
+            return None
+        self._store(self._serialize(user))
+        return user
+
+    async def _aget(self, key: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        """Équivalent de _get pour les routes async : Redis et Postgres sans bloquer la boucle."""
+        data = self._local_get(key)
+        if data is not None:
+            self.local_hits += 1
+            return self._deserialize(data)
+
+        try:
+            raw = await redis_pools.async_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : lecture Redis impossible ({str(e)})")
+            raw = None
+        if raw:
+            self.redis_hits += 1
+            data = json.loads(raw)
+            self._local_set(key, data)
+            return self._deserialize(data)
+
+        self.misses += 1
+        user = await loader()
+        if user is None:
+            return None
+        await self._astore(self._serialize(user))
+        return user
+
+    def get_by_email(self, email: str, loader: Callable[[], User | None]) -> User | None:
+        """Retourne l'utilisateur depuis le cache, ou via loader() (Postgres) en cas d'absence."""
+        return self._get(self._email_key(email), loader)
+
+    def get_by_id(self, user_id: UUID, loader: Callable[[], User | None]) -> User | None:
+        return self._get(self._id_key(user_id), loader)
+
+    async def aget_by_email(self, email: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        return await self._aget(self._email_key(email), loader)
+
+    async def aget_by_id(self, user_id: UUID, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        return await self._aget(self._id_key(user_id), loader)
+
+    def invalidate(self, user_id: UUID, *emails: str):
+        """Supprime un utilisateur des deux niveaux (toutes ses clés)."""
+        keys = [self._id_key(user_id)] + [self._email_key(email) for email in emails]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        try:
+            redis_pools.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : invalidation Redis impossible ({str(e)})")
+
+    async def ainvalidate(self, user_id: UUID, *emails: str):
+        keys = [self._id_key(user_id)] + [self._email_key(email) for email in emails]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        try:
+            await redis_pools.async_client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning(f"Cache utilisateur : invalidation Redis impossible ({str(e)})")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.redis_hits) / lookups if lookups else None,
+            "local_entries": len(self._local),
+        }
+
+
+user_cache = UserCache(
+    local_size=settings.USER_CACHE_LOCAL_SIZE,
+    local_ttl_seconds=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl_seconds=settings.USER_CACHE_REDIS_TTL_SECONDS,
+)
@@ -1,32 +1,59 @@
-import logging, redis
+import asyncio, base64, logging
+from datetime import datetime
+from decimal import Decimal
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 from fastapi.security import OAuth2PasswordBearer
-from pwdlib import PasswordHash
 from typing import Optional
 
 from backend.core.config import settings
 from backend.models.user_entity import User
-from backend.schema.user import UserCreateDTO, UserUpdateDTO
-from backend.repositories.user_repository import UserRepository
+from backend.schema.user import UserCreateDTO, UserUpdateDTO, UnitsLedgerEntryRead
+from backend.repositories.user_repository import UserRepository, AsyncUserRepository
+from backend.repositories.recharge_repository import AsyncRechargeRepository
+from backend.repositories.usage_settlement_repository import UsageSettlementRepository
+from backend.repositories.units_ledger_repository import AsyncUnitsLedgerRepository
+from backend.schema.recharges import RechargePage, RechargeRead
 from backend.services.wallet_service import WalletService
 from backend.services.auth_service import AuthService
-from backend.services.treasury_service import TreasuryService
+from backend.services.password_hasher import password_hasher
+from backend.services.user_cache import user_cache
+from backend.services.token_revocation import token_revocations
+from backend.services.usage_ingestion import usage_ingestion
+from backend.services.units_balance import units_balance
+from backend.services.price_catalog import price_catalog
 
 # Configuration du logger pour suivre les erreurs en production
 logger = logging.getLogger(__name__)
 
-# Connexion Redis
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token") # It declares that the URL for obtaining the token is /users/token, which corresponds to the login endpoint defined in user.py.
-password_hash = PasswordHash.recommended()
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
+def encode_recharge_cursor(created_at: datetime, recharge_id: UUID) -> str:
+    """Curseur opaque de pagination : position (created_at, id) de la dernière recharge renvoyée."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{recharge_id}".encode()).decode()
+
+
+def decode_recharge_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, recharge_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(recharge_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def revokes_tokens(user: User, update_dict: dict) -> bool:
+    """Un changement de mot de passe ou de rôle invalide les JWT déjà émis."""
+    return "hashed_password" in update_dict or (
+        "role" in update_dict and update_dict["role"] != user.role
+    )
+
+
 class UserService:
     """
     Service contenant la logique métier pour les utilisateurs.
@@ -39,7 +66,6 @@ class UserService:
         self.wallet_service = WalletService(session)
         self.session = session
         self.auth_service = AuthService(session)
-        self.treasury = TreasuryService()
 
     def get_user(self, user_id: UUID) -> User | None:
         """Récupère un utilisateur par son ID."""
@@ -122,11 +148,32 @@ class UserService:
             if self.repository.exists(update_dict["email"]):
                 raise ValueError(f"A user with the email {update_dict['email']} already exists")
 
-        return self.repository.update(user_id, update_dict)
+        existing = self.repository.get_by_id(user_id)
+        if not existing:
+            return None
+        previous_email = existing.email
+        revoke_tokens = revokes_tokens(existing, update_dict)
+        if revoke_tokens:
+            update_dict["token_version"] = existing.token_version + 1
+
+        updated = self.repository.update(user_id, update_dict)
+        if updated:
+            user_cache.invalidate(user_id, previous_email, updated.email)
+            if revoke_tokens:
+                token_revocations.revoke(user_id, updated.token_version)
+        return updated
 
     def delete_user(self, user_id: UUID) -> bool:
         """Supprime un utilisateur par son ID."""
-        return self.repository.delete(user_id)
+        existing = self.repository.get_by_id(user_id)
+        if not existing:
+            return False
+        email, token_version = existing.email, existing.token_version
+        deleted = self.repository.delete(user_id)
+        if deleted:
+            user_cache.invalidate(user_id, email)
+            token_revocations.revoke(user_id, token_version + 1)
+        return deleted
     
 
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
@@ -141,22 +188,136 @@ class UserService:
             return None
         return user
     
-    def bill_user_for_tokens(self, user_id: UUID, tokens_consumed: int, model_name: str, cost_usd: float):
+    def bill_user_for_tokens(self, user_id: UUID, model_name: str, input_tokens: int, output_tokens: int = 0) -> UUID:
+        """
+        Enregistre la consommation dans le registre des charges d'usage.
+        Le coût est calculé ici à partir du catalogue de tarifs en mémoire (UnknownModelError si
+        le modèle n'y est pas). Aucun transfert n'est fait : le worker de règlements prélève le
+        cumul de la fenêtre en un seul transfert on-chain. Retourne l'ID de la charge.
+        """
+        cost_usdc = price_catalog.cost(model_name, input_tokens, output_tokens)
         user = self.repository.get_by_id(user_id)
         if not user:
             raise ValueError(f"User with ID {user_id} not found")
-        user_wallet = user.wallet
-        if not user_wallet:
+        if not user.wallet:
             raise Exception("L'utilisateur n'a pas de wallet.")
 
-        # 2. Effectuer le prélèvement sur la blockchain via Circle
-        transaction_id = self.treasury.charge_user_wallet(
-            user_wallet_id=user_wallet.circle_wallet_id,
-            amount=cost_usd
+        tokens_consumed = input_tokens + output_tokens
+        charge = UsageSettlementRepository(self.session).record_charge(
+            user_id=user_id,
+            model_name=model_name,
+            tokens_consumed=tokens_consumed,
+            amount_usdc=cost_usdc,
         )
+        # Journal token_usage : écrit en différé, par lots
+        usage_ingestion.add([usage_ingestion.row(user_id, model_name, tokens_consumed, cost_usdc)])
+        return charge.id
+
+
+class AsyncUserService:
+    """
+    Pendant asynchrone de UserService pour les routes qui ne touchent que Postgres
+    (lecture, mise à jour, suppression). La création de compte reste synchrone :
+    elle appelle Circle et envoie l'OTP par SMTP.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.repository = AsyncUserRepository(session)
+        self.recharge_repository = AsyncRechargeRepository(session)
+        self.ledger_repository = AsyncUnitsLedgerRepository(session)
+        self.session = session
+
+    async def get_user(self, user_id: UUID) -> User | None:
+        """Récupère un utilisateur par son ID."""
+        return await self.repository.get_by_id(user_id)
+
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        """
+        Authentifie un utilisateur avec email et mot de passe.
+        Si le hash a été produit avec d'anciens paramètres Argon2, il est remplacé au passage.
+        """
+        user = await self.repository.get_by_email(email)
+        if not user:
+            return None
+        valid, updated_hash = await password_hasher.averify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        if updated_hash is not None:
+            user.hashed_password = updated_hash
+            self.session.add(user)
+            await self.session.commit()
+        return user
+
+    async def get_recharge_history(self, user_id: UUID, limit: int, cursor: str | None = None) -> RechargePage:
+        """Page de l'historique des recharges ; lève ValueError si le curseur est invalide."""
+        before = decode_recharge_cursor(cursor) if cursor else None
+        # Une ligne de plus que demandé pour savoir s'il reste une page
+        recharges = await self.recharge_repository.get_page_by_user_id(user_id, limit + 1, before)
+        page = recharges[:limit]
+        next_cursor = encode_recharge_cursor(page[-1].created_at, page[-1].id) if len(recharges) > limit else None
+        return RechargePage(items=[RechargeRead.model_validate(r) for r in page], next_cursor=next_cursor)
+
+    async def adjust_units(self, user_id: UUID, amount: float, reason: str) -> float | None:
+        """
+        Ajustement manuel du solde d'unités : une écriture au grand livre, reportée dans le solde
+        Redis comme un crédit. Retourne le nouveau solde (None si l'utilisateur n'existe pas).
+        """
+        if amount == 0:
+            raise ValueError("Adjustment amount must not be zero")
+        credit_seq = await self.ledger_repository.record_adjustment(user_id, Decimal(str(amount)), reason)
+        if credit_seq is None:
+            return None
+        await asyncio.to_thread(units_balance.credit, user_id, amount, credit_seq)
+        return await units_balance.aget(user_id)
+
+    async def get_units_ledger(self, user_id: UUID, limit: int, before_id: int | None = None) -> list[UnitsLedgerEntryRead]:
+        """Historique des mouvements d'unités d'un utilisateur, plus récents d'abord."""
+        entries = await self.ledger_repository.get_entries(user_id, limit, before_id)
+        return [UnitsLedgerEntryRead.model_validate(entry) for entry in entries]
+
+    async def get_user_for_refresh(self, user_id: UUID, token_version: int) -> User | None:
+        """Utilisateur d'un refresh token, ou None s'il a été supprimé ou ses tokens révoqués."""
+        user = await self.repository.get_by_id(user_id, with_relations=False)
+        if user is None or user.token_version != token_version:
+            return None
+        return user
 
-        # 3. Enregistrer la consommation dans ta table token_usage
-        # (À implémenter avec un repository dédié pour token_usage)
-        # usage_repo.create_usage(...)
-        
-        return transaction_id
\ No newline at end of file
+    async def update_user(self, user_id: UUID, user_data: UserUpdateDTO) -> Optional[User]:
+        """Voir UserService.update_user."""
+        update_dict = user_data.model_dump(exclude_unset=True)
+
+        if "password" in update_dict:
+            # Argon2 est volontairement coûteux en CPU : calculé dans le pool dédié
+            raw_password = update_dict.pop("password")
+            update_dict["hashed_password"] = await password_hasher.ahash(raw_password)
+
+        if "email" in update_dict:
+            if await self.repository.exists(update_dict["email"]):
+                raise ValueError(f"A user with the email {update_dict['email']} already exists")
+
+        existing = await self.repository.get_by_id(user_id)
+        if not existing:
+            return None
+        previous_email = existing.email
+        revoke_tokens = revokes_tokens(existing, update_dict)
+        if revoke_tokens:
+            update_dict["token_version"] = existing.token_version + 1
+
+        updated = await self.repository.update(user_id, update_dict)
+        if updated:
+            await user_cache.ainvalidate(user_id, previous_email, updated.email)
+            if revoke_tokens:
+                await token_revocations.arevoke(user_id, updated.token_version)
+        return updated
+
+    async def delete_user(self, user_id: UUID) -> bool:
+        """Supprime un utilisateur par son ID."""
+        existing = await self.repository.get_by_id(user_id)
+        if not existing:
+            return False
+        email, token_version = existing.email, existing.token_version
+        deleted = await self.repository.delete(user_id)
+        if deleted:
+            await user_cache.ainvalidate(user_id, email)
+            await token_revocations.arevoke(user_id, token_version + 1)
+        return deleted
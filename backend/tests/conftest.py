@@ -0,0 +1,94 @@
+# backend/tests/conftest.py
+"""
+Environnement de test : base SQLite jetable à la place de Postgres, variables d'environnement
+factices pour les réglages obligatoires (aucun appel réseau n'est fait par les tests).
+Le SQL propre à Postgres se teste sur la base de TEST_POSTGRES_URL (fixture postgres_engine),
+les scripts Lua sur le Redis de TEST_REDIS_URL (fixture redis_pools, base vidée à chaque test).
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# L'app s'importe à la fois en `backend.xxx` et, lancée depuis backend/, en `core.xxx`
+sys.path[:0] = [str(BACKEND_DIR.parent), str(BACKEND_DIR)]
+
+DB_PATH = Path(tempfile.mkdtemp()) / "test.db"
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "DB_NAME": "test", "DB_USER": "test", "DB_PASSWORD": "test",
+    "CIRCLE_API_KEY": "test", "WALLET_SET_ID": "test", "HEX_ENCODED_ENTITY_SECRET": "00" * 32,
+    "CIRCLE_MASTER_WALLET_ID": "master", "CIRCLE_USDC_TOKEN_ID": "usdc",
+    "SECRET_KEY": "test-secret-key-long-enough-for-hs256", "STRIPE_SECRET_KEY": "sk_test",
+    "MAIL_HOST": "localhost", "MAIL_USERNAME": "test", "MAIL_PASSWORD": "test", "FROM_MAIL": "test@micropay.local",
+})
+
+import importlib
+import pkgutil
+import pytest
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlmodel import Session, SQLModel, create_engine
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _import_models():
+    import backend.models
+    for module in pkgutil.iter_modules(backend.models.__path__):
+        importlib.import_module(f"backend.models.{module.name}")
+
+
+@pytest.fixture
+def engine():
+    from backend.db.session import engine
+    _import_models()
+    engine.echo = False
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def postgres_engine():
+    """Base Postgres dédiée (TEST_POSTGRES_URL) pour le SQL propre à Postgres ; test ignoré sans elle."""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL non défini")
+    _import_models()
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def redis_pools(monkeypatch):
+    """Pools Redis neufs vers TEST_REDIS_URL (base vidée avant et après) ; test ignoré sans lui."""
+    url = os.environ.get("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL non défini")
+    import redis
+    from backend.core.config import settings
+    from backend.db.redis_pool import RedisPools
+    parsed = urlparse(url)
+    monkeypatch.setattr(settings, "REDIS_HOST", parsed.hostname or "localhost")
+    monkeypatch.setattr(settings, "REDIS_PORT", parsed.port or 6379)
+    monkeypatch.setattr(settings, "REDIS_DB", int(parsed.path.lstrip("/") or 0))
+    client = redis.Redis.from_url(url)
+    client.flushdb()
+    yield RedisPools()
+    client.flushdb()
+    client.close()
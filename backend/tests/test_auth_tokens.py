@@ -0,0 +1,138 @@
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from backend.core.config import settings
+from backend.core.dependencies import get_current_user
+from backend.db.redis_pool import RedisPools
+from backend.models.user_entity import User
+from backend.repositories.user_repository import AsyncUserRepository
+from backend.schema.user import UserUpdateDTO
+from backend.services import token_revocation, user_cache
+from backend.services.auth_service import AuthService
+from backend.services.token_revocation import TokenRevocationList
+from backend.services.user_service import AsyncUserService, UserService
+
+
+def add_user(session) -> User:
+    user = User(email="ada@micropay.local", nom="Lovelace", prenom="Ada", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def make_auth(session) -> AuthService:
+    # Clients Redis inutilisés par la création et le décodage des tokens
+    return AuthService(session, redis_client=object(), async_redis_client=object())  # pyright: ignore
+
+
+def current_user(token: str) -> User:
+    return asyncio.run(get_current_user(token, None))  # pyright: ignore
+
+
+@pytest.fixture
+def revocations(monkeypatch) -> TokenRevocationList:
+    revocations = TokenRevocationList(ttl_seconds=60)
+    monkeypatch.setattr(token_revocation, "token_revocations", revocations)
+    monkeypatch.setattr("backend.core.dependencies.token_revocations", revocations)
+    monkeypatch.setattr("backend.services.user_service.token_revocations", revocations)
+    return revocations
+
+
+def test_access_and_refresh_tokens_are_not_interchangeable(session, monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_PORT", 1)
+    monkeypatch.setattr(token_revocation, "redis_pools", RedisPools())
+    user = add_user(session)
+    auth = make_auth(session)
+    pair = auth.create_token_pair(user)
+
+    claims = auth.decode_refresh_token(pair.refresh_token)
+    assert (claims["uid"], claims["ver"], claims["type"]) == (str(user.id), 0, "refresh")
+    with pytest.raises(HTTPException) as refused:
+        auth.decode_refresh_token(pair.access_token)
+    assert refused.value.status_code == 401
+    with pytest.raises(HTTPException) as refused:
+        current_user(pair.refresh_token)
+    assert refused.value.status_code == 401
+
+
+def test_expired_refresh_token_is_rejected(session):
+    auth = make_auth(session)
+    expired = auth.create_access_token({"uid": str(uuid4()), "ver": 0, "type": "refresh"}, timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException) as refused:
+        auth.decode_refresh_token(expired)
+    assert refused.value.status_code == 401
+
+
+def test_refresh_requires_the_current_token_version(session):
+    user = add_user(session)
+    user.token_version = 1
+    service = AsyncUserService(None)  # pyright: ignore
+    users = {user.id: user}
+
+    async def get_by_id(user_id, with_relations=True):
+        return users.get(user_id)
+
+    service.repository.get_by_id = get_by_id  # pyright: ignore
+
+    assert asyncio.run(service.get_user_for_refresh(user.id, 0)) is None  # révoqué
+    assert asyncio.run(service.get_user_for_refresh(user.id, 1)) is user
+    assert asyncio.run(service.get_user_for_refresh(uuid4(), 1)) is None  # supprimé
+
+
+def test_revocation_check_falls_back_to_postgres_when_redis_is_down(session, monkeypatch, revocations):
+    monkeypatch.setattr(settings, "REDIS_PORT", 1)
+    monkeypatch.setattr(token_revocation, "redis_pools", RedisPools())
+    user = add_user(session)
+    auth = make_auth(session)
+    stale = auth.create_token_pair(user).access_token
+    user.token_version = 1
+    current = auth.create_token_pair(user).access_token
+    versions = {user.id: 1}
+
+    async def get_token_version(self, user_id):
+        return versions.get(user_id)
+
+    monkeypatch.setattr(AsyncUserRepository, "get_token_version", get_token_version)
+
+    with pytest.raises(HTTPException):
+        current_user(stale)
+    assert current_user(current).id == user.id
+    versions.clear()  # utilisateur supprimé
+    with pytest.raises(HTTPException):
+        current_user(current)
+    assert revocations.stats() == {"checks": 3, "rejected": 2, "postgres_fallbacks": 3}
+
+
+def test_password_change_revokes_issued_tokens_through_redis(session, monkeypatch, redis_pools, revocations):
+    monkeypatch.setattr(token_revocation, "redis_pools", redis_pools)
+    monkeypatch.setattr(user_cache, "redis_pools", redis_pools)
+    user = add_user(session)
+    auth = make_auth(session)
+    before = auth.create_token_pair(user)
+
+    async def fallback_unused(self, user_id):
+        raise AssertionError("Redis répond : Postgres ne doit pas être lu")
+
+    monkeypatch.setattr(AsyncUserRepository, "get_token_version", fallback_unused)
+    users = UserService(session)
+
+    async def scenario():
+        assert (await get_current_user(before.access_token, None)).id == user.id  # pyright: ignore
+        # Changement de nom : les tokens restent valides
+        users.update_user(user.id, UserUpdateDTO(nom="King"))
+        assert (await get_current_user(before.access_token, None)).id == user.id  # pyright: ignore
+
+        users.update_user(user.id, UserUpdateDTO(password="new-password"))
+        with pytest.raises(HTTPException):
+            await get_current_user(before.access_token, None)  # pyright: ignore
+        after = auth.create_token_pair(session.get(User, user.id))  # pyright: ignore
+        assert (await get_current_user(after.access_token, None)).token_version == 1  # pyright: ignore
+
+    asyncio.run(scenario())
+    assert revocations.stats()["rejected"] == 1
@@ -0,0 +1,53 @@
+import asyncio
+import smtplib
+
+from backend.models.email_outbox_entity import EmailOutbox, EmailStatus
+from backend.services.smtp_pool import smtp_pool
+from backend.workers.email_worker import EmailWorker
+
+
+def make_worker() -> EmailWorker:
+    return EmailWorker(batch_size=10, poll_seconds=0.1, lease_seconds=120, max_attempts=3, retry_base_seconds=10)
+
+
+def test_run_once_sends_claimed_emails_and_clears_their_body(session, monkeypatch):
+    emails = [EmailOutbox(to_email=f"user{i}@micropay.local", subject="OTP", body=f"<p>{i}</p>") for i in range(4)]
+    session.add_all(emails)
+    session.commit()
+    sent = []
+
+    def send_many(messages):
+        sent.extend(message["To"] for message in messages)
+        return [None] * len(messages)
+
+    monkeypatch.setattr(smtp_pool, "send_many", send_many)
+    worker = make_worker()
+
+    assert asyncio.run(worker.run_once()) == 4
+
+    assert sorted(sent) == [f"user{i}@micropay.local" for i in range(4)]
+    session.expire_all()
+    for email in emails:
+        row = session.get(EmailOutbox, email.id)
+        assert (row.status, row.body, row.attempts) == (EmailStatus.SENT, "", 1)
+    assert worker.sent == 4
+
+
+def test_transient_error_is_retried_and_permanent_error_abandoned(session, monkeypatch):
+    transient = EmailOutbox(to_email="busy@micropay.local", subject="OTP", body="<p>1</p>")
+    permanent = EmailOutbox(to_email="unknown@micropay.local", subject="OTP", body="<p>2</p>")
+    session.add_all([transient, permanent])
+    session.commit()
+    errors = {
+        "busy@micropay.local": smtplib.SMTPResponseException(451, b"try later"),
+        "unknown@micropay.local": smtplib.SMTPResponseException(550, b"no such user"),
+    }
+    monkeypatch.setattr(smtp_pool, "send_many", lambda messages: [errors[message["To"]] for message in messages])
+    worker = make_worker()
+
+    asyncio.run(worker.run_once())
+
+    session.expire_all()
+    assert session.get(EmailOutbox, transient.id).status == EmailStatus.PENDING
+    assert session.get(EmailOutbox, permanent.id).status == EmailStatus.FAILED
+    assert (worker.retried, worker.failed, worker.sent) == (1, 1, 0)
@@ -0,0 +1,20 @@
+from backend.services import password_hasher
+from backend.services.password_hasher import PasswordHasherPool, benchmark
+
+
+def test_benchmark_verifies_through_the_bounded_pool(monkeypatch):
+    monkeypatch.setattr(password_hasher.settings, "ARGON2_TIME_COST", 1)
+    monkeypatch.setattr(password_hasher.settings, "ARGON2_MEMORY_COST", 1024)
+    monkeypatch.setattr(password_hasher.settings, "ARGON2_PARALLELISM", 1)
+    submitted = []
+    submit = PasswordHasherPool._submit
+    monkeypatch.setattr(PasswordHasherPool, "_submit", lambda pool, fn, *args: submitted.append(fn) or submit(pool, fn, *args))
+
+    result = benchmark(workers=2, seconds=0.2)
+
+    # Le hash de départ, puis chaque vérification, passent par les créneaux du pool
+    assert len(submitted) > 1
+    assert all(fn.__name__ == "verify" for fn in submitted[1:])
+    assert result["rejected"] == 0
+    assert result["logins_per_second_per_core"] > 0
+    assert result["ms_per_login"] > 0
@@ -0,0 +1,65 @@
+import asyncio
+from uuid import uuid4
+
+from backend.models.payout_job_entity import PayoutJob, PayoutJobStatus
+from backend.workers.payout_worker import PayoutWorker
+
+
+class FakeTreasury:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.transfers = []
+
+    async def execute_transfer_to_user(self, address, amount, idempotency_key):
+        self.transfers.append((address, amount, idempotency_key))
+        if self.error:
+            raise self.error
+        return "tx_1"
+
+
+def make_worker() -> PayoutWorker:
+    return PayoutWorker(concurrency=5, poll_seconds=0.1, lease_seconds=120, max_attempts=3, retry_base_seconds=10)
+
+
+def add_job(session) -> PayoutJob:
+    job = PayoutJob(recharge_id=uuid4(), destination_address="0xabc", amount_usdc=12.5)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def test_claim_and_process_transfers_with_job_id_as_idempotency_key(session, monkeypatch):
+    job = add_job(session)
+    worker = make_worker()
+    completed = []
+    monkeypatch.setattr(worker, "_complete", lambda claimed, tx_id: completed.append((claimed.recharge_id, tx_id)))
+    treasury = FakeTreasury()
+
+    [claimed] = worker._claim()
+    asyncio.run(worker.process(claimed, treasury))
+
+    assert treasury.transfers == [("0xabc", 12.5, str(job.id))]
+    assert completed == [(job.recharge_id, "tx_1")]
+    assert worker.succeeded == 1
+    session.expire_all()
+    row = session.get(PayoutJob, job.id)
+    assert (row.status, row.attempts) == (PayoutJobStatus.PROCESSING, 1)
+
+
+def test_failed_transfer_is_rescheduled_then_abandoned(session):
+    job = add_job(session)
+    worker = make_worker()
+    treasury = FakeTreasury(error=RuntimeError("circle down"))
+
+    [claimed] = worker._claim()
+    asyncio.run(worker.process(claimed, treasury))
+    session.expire_all()
+    row = session.get(PayoutJob, job.id)
+    assert (row.status, row.last_error, worker.retried) == (PayoutJobStatus.PENDING, "circle down", 1)
+
+    claimed.attempts = worker.max_attempts
+    asyncio.run(worker.process(claimed, treasury))
+    session.expire_all()
+    assert session.get(PayoutJob, job.id).status == PayoutJobStatus.FAILED
+    assert worker.failed == 1
@@ -0,0 +1,96 @@
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core import rate_limit
+from backend.core.config import settings
+from backend.core.rate_limit import RateLimitCounters, RateLimitMiddleware
+from backend.db.redis_pool import RedisPools
+
+ROUTE = "/auth/login"
+
+
+def make_client(budgets: dict, fail_open: bool = True) -> TestClient:
+    app = FastAPI()
+    app.post(ROUTE)(lambda: {"ok": True})
+    app.add_middleware(RateLimitMiddleware, budgets={ROUTE: budgets}, fail_open=fail_open, trust_forwarded_for=True)
+    return TestClient(app)
+
+
+def bearer(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {jwt.encode({'sub': user_id}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)}"}
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    counters = RateLimitCounters()
+    monkeypatch.setattr(rate_limit, "rate_limit_counters", counters)
+    return counters
+
+
+@pytest.fixture
+def pools(redis_pools, monkeypatch):
+    monkeypatch.setattr(rate_limit, "redis_pools", redis_pools)
+    return redis_pools
+
+
+def test_burst_then_429_with_retry_after(pools, counters):
+    with make_client({"ip": [60, 2]}) as client:
+        statuses = [client.post(ROUTE).status_code for _ in range(3)]
+        response = client.post(ROUTE)
+
+    assert statuses == [200, 200, 429]
+    # 1 jeton/s : le prochain est disponible en moins d'une seconde
+    assert response.headers["retry-after"] == "1"
+    assert counters.allowed[ROUTE] == 2
+    assert counters.limited[f"{ROUTE}:ip"] == 2
+
+
+def test_buckets_are_per_client_ip(pools, counters):
+    with make_client({"ip": [60, 1]}) as client:
+        first = client.post(ROUTE, headers={"X-Forwarded-For": "203.0.113.1"}).status_code
+        same_ip = client.post(ROUTE, headers={"X-Forwarded-For": "203.0.113.1"}).status_code
+        other_ip = client.post(ROUTE, headers={"X-Forwarded-For": "203.0.113.2"}).status_code
+
+    assert (first, same_ip, other_ip) == (200, 429, 200)
+
+
+def test_a_request_refused_by_one_bucket_consumes_no_token_from_the_others(pools, counters):
+    with make_client({"ip": [60, 3], "user": [60, 1]}) as client:
+        statuses = [
+            client.post(ROUTE, headers=bearer("u1")).status_code,
+            client.post(ROUTE, headers=bearer("u1")).status_code,  # budget utilisateur vide
+            client.post(ROUTE).status_code,  # sans token : IP et global seulement
+            client.post(ROUTE).status_code,
+            client.post(ROUTE).status_code,
+        ]
+
+    # Le refus par utilisateur n'a rien pris au budget IP : 3 requêtes passent sur 3 jetons
+    assert statuses == [200, 429, 200, 200, 429]
+    assert counters.limited == {f"{ROUTE}:user": 1, f"{ROUTE}:ip": 1}
+
+
+def unreachable_redis(monkeypatch) -> RedisPools:
+    monkeypatch.setattr(settings, "REDIS_PORT", 1)
+    pools = RedisPools()
+    monkeypatch.setattr(rate_limit, "redis_pools", pools)
+    return pools
+
+
+def test_redis_down_fails_open_by_default(monkeypatch, counters):
+    unreachable_redis(monkeypatch)
+    with make_client({"ip": [60, 1]}) as client:
+        statuses = [client.post(ROUTE).status_code for _ in range(2)]
+
+    assert statuses == [200, 200]
+    assert counters.redis_errors == 2
+
+
+def test_redis_down_fails_closed_when_configured(monkeypatch, counters):
+    unreachable_redis(monkeypatch)
+    with make_client({"ip": [60, 1]}, fail_open=False) as client:
+        response = client.post(ROUTE)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import select
+
+from backend.models.inventory_entity import InventoryReservation
+from backend.models.recharge_entity import Recharges, RechargeStatus
+from backend.models.user_entity import User
+from backend.services import reaper_service
+from backend.services.reaper_service import ReaperService
+
+
+def add_expired_recharge(session, intent_id: str) -> Recharges:
+    user = User(email=f"{intent_id}@micropay.local", nom="Lovelace", prenom="Ada", hashed_password="x")
+    session.add(user)
+    session.flush()
+    recharge = Recharges(
+        user_id=user.id, units_granted=10, amount_usdc_value=1, amount_base_eur=1, service_fee_eur=0.1,
+        vat_amount_eur=0.02, total_paid_eur=1.12, stripe_payment_intent_id=intent_id,
+    )
+    session.add(recharge)
+    session.add(InventoryReservation(
+        amount_usdc=1, recharge_id=recharge.id, expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+    ))
+    session.commit()
+    return recharge
+
+
+def test_stripe_is_called_outside_any_transaction(session, monkeypatch):
+    cancelled = add_expired_recharge(session, "pi_cancelled")
+    paid = add_expired_recharge(session, "pi_paid")
+    in_transaction = []
+
+    def cancel_payment_intent(intent_id):
+        in_transaction.append(session.in_transaction())
+        return intent_id == "pi_cancelled"
+
+    monkeypatch.setattr(reaper_service, "cancel_payment_intent", cancel_payment_intent)
+    ReaperService(batch_size=10, max_batches=1, pending_timeout_minutes=60)._reap(session)
+
+    assert in_transaction == [False, False]
+    assert session.get(Recharges, cancelled.id).status == RechargeStatus.CANCELLED
+    assert session.get(Recharges, paid.id).status == RechargeStatus.PENDING
+    # Intent payé entre-temps : la réservation est prolongée, pas libérée
+    [reservation] = session.exec(select(InventoryReservation)).all()
+    assert reservation.recharge_id == paid.id
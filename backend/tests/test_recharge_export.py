@@ -0,0 +1,55 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+
+from backend.core.dependencies import get_current_admin
+from backend.models.recharge_entity import Recharges
+from backend.models.user_entity import User
+from backend.routers import recharge
+from backend.services import export_service
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(recharge.router)
+    app.dependency_overrides[get_current_admin] = lambda: None
+    with TestClient(app) as client:
+        yield client
+
+
+def test_export_answers_503_when_the_database_is_down_before_the_first_batch(client, monkeypatch):
+    monkeypatch.setattr(export_service, "async_engine", create_async_engine("postgresql+asyncpg://x:y@127.0.0.1:1/z"))
+
+    response = client.get("/recharges/export?format=csv")
+
+    # Pas d'en-tête CSV suivi d'un flux tronqué sous un 200
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_export_streams_header_and_rows(client, monkeypatch, postgres_engine):
+    url = postgres_engine.url.set(drivername="postgresql+asyncpg")
+    monkeypatch.setattr(export_service, "async_engine", create_async_engine(url))
+    monkeypatch.setattr(export_service.settings, "EXPORT_BATCH_SIZE", 1)
+    with Session(postgres_engine) as session:
+        user = User(email="ada@micropay.local", nom="Lovelace", prenom="Ada", hashed_password="x")
+        session.add(user)
+        session.flush()
+        session.add_all(
+            Recharges(
+                user_id=user.id, units_granted=units, amount_usdc_value=1, amount_base_eur=1, service_fee_eur=0.1,
+                vat_amount_eur=0.02, total_paid_eur=1.12, stripe_payment_intent_id=f"pi_{units}",
+            )
+            for units in (10, 20)
+        )
+        session.commit()
+
+    response = client.get("/recharges/export?format=csv")
+
+    assert response.status_code == 200
+    header, *rows = response.text.splitlines()
+    assert header == ",".join(export_service.FIELDNAMES)
+    assert len(rows) == 2
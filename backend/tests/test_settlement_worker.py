@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from backend.models.usage_settlement_entity import UsageSettlement, UsageSettlementStatus
+from backend.workers.settlement_worker import SettlementWorker
+
+
+class FakeTreasury:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.charges = []
+
+    async def charge_user_wallet(self, wallet_id, amount, idempotency_key):
+        self.charges.append((wallet_id, amount, idempotency_key))
+        if self.error:
+            raise self.error
+        return "tx_1"
+
+
+def make_worker() -> SettlementWorker:
+    return SettlementWorker(
+        concurrency=5, poll_seconds=0.1, lease_seconds=120, max_attempts=3, retry_base_seconds=30,
+        threshold_usdc=1, window_seconds=3600, min_amount_usdc=0.01, close_batch_size=100,
+    )
+
+
+def add_settlement(session) -> UsageSettlement:
+    now = datetime.now(timezone.utc)
+    settlement = UsageSettlement(
+        user_id=uuid4(), circle_wallet_id="wallet-1", amount_usdc=Decimal("1.250000"), charge_count=3,
+        window_start=now, window_end=now,
+    )
+    session.add(settlement)
+    session.commit()
+    session.refresh(settlement)
+    return settlement
+
+
+def test_claim_and_process_charges_wallet_with_settlement_id_as_idempotency_key(session):
+    settlement = add_settlement(session)
+    worker = make_worker()
+    treasury = FakeTreasury()
+
+    [claimed] = worker._claim()
+    asyncio.run(worker.process(claimed, treasury))
+
+    assert treasury.charges == [("wallet-1", Decimal("1.250000"), str(settlement.id))]
+    session.expire_all()
+    row = session.get(UsageSettlement, settlement.id)
+    assert (row.status, row.tx_id, row.attempts) == (UsageSettlementStatus.SUCCEEDED, "tx_1", 1)
+
+
+def test_failed_charge_is_rescheduled_then_abandoned(session):
+    settlement = add_settlement(session)
+    worker = make_worker()
+    treasury = FakeTreasury(error=RuntimeError("insufficient funds"))
+
+    [claimed] = worker._claim()
+    asyncio.run(worker.process(claimed, treasury))
+    session.expire_all()
+    assert session.get(UsageSettlement, settlement.id).status == UsageSettlementStatus.PENDING
+
+    claimed.attempts = worker.max_attempts
+    asyncio.run(worker.process(claimed, treasury))
+    session.expire_all()
+    row = session.get(UsageSettlement, settlement.id)
+    assert (row.status, row.last_error) == (UsageSettlementStatus.FAILED, "insufficient funds")
+    assert (worker.retried, worker.failed) == (1, 1)
@@ -0,0 +1,72 @@
+import asyncio
+import inspect
+from decimal import Decimal
+
+from backend.services import treasury_service
+from backend.services.treasury_service import AsyncTreasuryService, TreasuryService
+
+
+def public_methods(cls) -> dict:
+    return {name: member for name, member in vars(cls).items() if callable(member) and not name.startswith("_")}
+
+
+def test_async_treasury_is_a_separate_class_with_the_same_operations_as_coroutines():
+    assert not issubclass(AsyncTreasuryService, TreasuryService)
+    assert public_methods(AsyncTreasuryService).keys() == public_methods(TreasuryService).keys()
+    assert all(inspect.iscoroutinefunction(method) for method in public_methods(AsyncTreasuryService).values())
+
+
+class FakeAsyncConnector:
+    def __init__(self):
+        self.gets = []
+
+    async def get(self, endpoint):
+        self.gets.append(endpoint)
+        return {"data": {"wallet": {"address": "0xmaster"}}}
+
+
+def test_master_address_is_fetched_once_and_shared(monkeypatch):
+    monkeypatch.setattr(treasury_service, "master_addresses", {})
+    treasury = AsyncTreasuryService.__new__(AsyncTreasuryService)
+    treasury.master_wallet_id, treasury.connector = "master", FakeAsyncConnector()
+
+    assert asyncio.run(treasury.get_master_address()) == "0xmaster"
+    assert asyncio.run(treasury.get_master_address()) == "0xmaster"
+    assert treasury.connector.gets == ["/w3s/wallets/master"]
+    assert treasury_service.master_addresses == {"master": "0xmaster"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_local_debit_survives_a_refresh_until_circle_can_reflect_it(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(treasury_service.time, "monotonic", clock)
+    cache = treasury_service.MasterBalanceCache(ttl_seconds=5, settle_seconds=60)
+
+    assert cache.get(lambda: Decimal("100")) == Decimal("100")
+    cache.debit(Decimal("30"))
+    assert cache.get(lambda: Decimal("100")) == Decimal("70")
+
+    # Rafraîchi avant que Circle n'ait débité : le transfert reste décompté
+    clock.now += 10
+    assert cache.get(lambda: Decimal("100")) == Decimal("70")
+
+    # Débit pendant la lecture : la valeur lue ne peut pas encore le refléter
+    clock.now += 10
+
+    def fetch_during_transfer():
+        cache.debit(Decimal("5"))
+        return Decimal("100")
+
+    assert cache.get(fetch_during_transfer) == Decimal("65")
+
+    # Lecture partie settle_seconds après les transferts : Circle les reflète
+    clock.now += 61
+    assert cache.get(lambda: Decimal("65")) == Decimal("65")
+    assert cache.stats()["pending_debits"] == 0
@@ -0,0 +1,62 @@
+from uuid import UUID
+
+from sqlmodel import Session, func, select, text
+
+from backend.models.recharge_entity import Recharges
+from backend.models.units_ledger_entity import UnitsLedgerEntry
+from backend.models.user_entity import User
+from backend.repositories.units_ledger_repository import BALANCE_STATE_SQL, UnitsLedgerRepository
+
+
+def _user_with_recharges(session: Session, email: str, *units: int) -> tuple[UUID, list[UUID]]:
+    user = User(email=email, nom="Test", prenom="Test", hashed_password="x")
+    session.add(user)
+    session.flush()
+    recharges = [
+        Recharges(
+            user_id=user.id, units_granted=granted, amount_usdc_value=1, amount_base_eur=1, service_fee_eur=0.1,
+            vat_amount_eur=0.02, total_paid_eur=1.12, stripe_payment_intent_id=f"pi_{email}_{i}",
+        )
+        for i, granted in enumerate(units)
+    ]
+    session.add_all(recharges)
+    session.commit()
+    return user.id, [recharge.id for recharge in recharges]
+
+
+def _balance_state(session: Session, user_id: UUID) -> tuple:
+    return tuple(session.execute(text(BALANCE_STATE_SQL), {"user_id": user_id}).one())
+
+
+def test_replayed_recharge_credit_is_not_reported_twice(postgres_engine):
+    with Session(postgres_engine) as session:
+        user_id, (recharge_id,) = _user_with_recharges(session, "ada@micropay.local", 10)
+        repository = UnitsLedgerRepository(session)
+
+        assert repository.record_recharge(recharge_id) == (user_id, 10, 1)
+        # Job de virement rejoué après un crash : ni nouvelle écriture, ni crédit Redis, ni numéro consommé
+        assert repository.record_recharge(recharge_id) is None
+
+        assert session.exec(select(func.count()).select_from(UnitsLedgerEntry)).one() == 2
+        assert _balance_state(session, user_id) == (10, 1)
+
+
+def test_snapshot_pass_stops_at_the_oldest_open_transaction(postgres_engine):
+    with Session(postgres_engine) as setup:
+        slow_user_id, (slow_recharge_id,) = _user_with_recharges(setup, "slow@micropay.local", 10)
+        fast_user_id, (fast_recharge_id,) = _user_with_recharges(setup, "fast@micropay.local", 20)
+
+    with Session(postgres_engine) as slow, Session(postgres_engine) as fast, Session(postgres_engine) as reader:
+        # Écritures de la transaction lente : ID plus petit, visibles après celles de la rapide
+        UnitsLedgerRepository(slow).record_recharge(slow_recharge_id, commit=False)
+        UnitsLedgerRepository(fast).record_recharge(fast_recharge_id)
+
+        assert UnitsLedgerRepository(reader).take_snapshots() == 0
+
+        slow.commit()
+        assert UnitsLedgerRepository(reader).take_snapshots() == 2
+        assert UnitsLedgerRepository(reader).take_snapshots() == 0
+
+        assert _balance_state(reader, slow_user_id) == (10, 1)
+        assert _balance_state(reader, fast_user_id) == (20, 1)
+        assert UnitsLedgerRepository(reader).find_snapshot_drift(limit=10) == (2, [])
@@ -0,0 +1,112 @@
+import csv
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from backend.repositories.token_usage_repository import month_start
+from backend.schema.usage import UsageEventIn
+from backend.services.usage_ingestion import UsageIngestionBuffer
+
+POISON_MODEL = "poison"
+
+
+def make_buffer(tmp_path, max_flush_attempts: int = 3) -> UsageIngestionBuffer:
+    return UsageIngestionBuffer(
+        flush_rows=100, flush_seconds=0, max_buffered=10,
+        max_flush_attempts=max_flush_attempts, dead_letter_dir=tmp_path,
+    )
+
+
+def rows(count: int, model_name: str = "gpt-test") -> list[tuple]:
+    return [UsageIngestionBuffer.row(uuid4(), model_name, 10, Decimal("0.000100")) for _ in range(count)]
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Remplace le COPY : un lot contenant une ligne du modèle POISON_MODEL échoue."""
+    batches: list[list[tuple]] = []
+
+    def write(self, batch):
+        if any(row[3] == POISON_MODEL for row in batch):
+            raise ValueError("invalid input syntax")
+        self._known_months |= {month_start(row[1]) for row in batch}
+        batches.append(batch)
+
+    monkeypatch.setattr(UsageIngestionBuffer, "_write", write)
+    return batches
+
+
+def test_failed_batch_is_set_aside_and_does_not_block_later_rows(tmp_path, written):
+    buffer = make_buffer(tmp_path)
+    poison = rows(1, POISON_MODEL)
+    assert buffer.add(poison)
+    assert buffer.flush() == 0
+
+    good = rows(2)
+    assert buffer.add(good)
+    assert buffer.flush() == 2
+    assert written == [good]
+    assert buffer.stats()["failed_rows"] == 1
+    # Les lignes mises de côté comptent dans la limite du tampon
+    assert not buffer.add(rows(10))
+
+
+def test_batch_is_dead_lettered_after_max_attempts(tmp_path, written):
+    buffer = make_buffer(tmp_path, max_flush_attempts=3)
+    poison = rows(2, POISON_MODEL)
+    buffer.add(poison)
+
+    for _ in range(3):
+        buffer.flush()
+
+    [path] = tmp_path.glob("token_usage-*.csv")
+    with path.open(newline="") as file:
+        assert [row[0] for row in csv.reader(file)] == [str(row[0]) for row in poison]
+    stats = buffer.stats()
+    assert (stats["failed_rows"], stats["dead_lettered"], stats["failed_flushes"]) == (0, 2, 3)
+    assert buffer.add(rows(10))
+
+
+def test_final_flush_dead_letters_instead_of_keeping_in_memory(tmp_path, written):
+    buffer = make_buffer(tmp_path, max_flush_attempts=5)
+    buffer.add(rows(1, POISON_MODEL))
+
+    buffer.flush(final=True)
+
+    assert len(list(tmp_path.glob("token_usage-*.csv"))) == 1
+    assert buffer.stats()["failed_rows"] == 0
+
+
+def test_failed_copy_forgets_partition_months(tmp_path, monkeypatch):
+    buffer = make_buffer(tmp_path)
+    month = month_start(datetime.utcnow())
+    buffer._known_months.add(month)
+
+    def write(self, batch):
+        raise ValueError('no partition of relation "token_usage" found for row')
+
+    monkeypatch.setattr(UsageIngestionBuffer, "_write", write)
+    buffer.add(rows(1))
+    buffer.flush()
+
+    assert month not in buffer._known_months
+
+
+def event(occurred_at: datetime | None) -> UsageEventIn:
+    return UsageEventIn(user_id=uuid4(), model_name="gpt-test", input_tokens=1, occurred_at=occurred_at)
+
+
+def test_occurred_at_is_bounded_to_the_retention_window():
+    now = datetime.now(timezone.utc)
+    assert event(None).occurred_at is None
+    assert event(now - timedelta(days=30)).occurred_at == now - timedelta(days=30)
+
+    with pytest.raises(ValidationError, match="retention"):
+        event(datetime(2000, 1, 1))
+    with pytest.raises(ValidationError, match="future"):
+        event(now + timedelta(days=1))
+    with pytest.raises(ValidationError, match="retention"):
+        event(datetime.combine(date.today().replace(day=1), datetime.min.time()) - timedelta(days=14 * 31))
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from backend.models.webhook_event_entity import WebhookEvent, WebhookEventStatus
+from backend.workers import webhook_worker as module
+from backend.workers.webhook_worker import WebhookWorker
+
+
+def make_worker() -> WebhookWorker:
+    return WebhookWorker(
+        batch_size=10, concurrency=2, poll_seconds=0.1, lease_seconds=300, max_attempts=3, retry_base_seconds=5
+    )
+
+
+def test_claim_batch_leases_due_events_and_returns_readable_rows(session):
+    session.add(WebhookEvent(id="evt_due", type="payment_intent.succeeded", payload={"id": "evt_due"}))
+    session.add(WebhookEvent(
+        id="evt_later", type="payment_intent.succeeded", payload={"id": "evt_later"},
+        next_attempt_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    ))
+    session.commit()
+
+    events = make_worker()._claim()
+
+    # Lignes lues après la fermeture de la session de réservation
+    assert [(event.id, event.payload, event.attempts) for event in events] == [("evt_due", {"id": "evt_due"}, 1)]
+    session.expire_all()
+    claimed = session.get(WebhookEvent, "evt_due")
+    assert claimed.status == WebhookEventStatus.PROCESSING
+    assert make_worker()._claim() == []
+
+
+def test_process_dispatches_payload_and_marks_processed(session, monkeypatch):
+    session.add(WebhookEvent(id="evt_1", type="payment_intent.succeeded", payload={"type": "payment_intent.succeeded"}))
+    session.commit()
+    dispatched = []
+
+    async def dispatch_event(payload, db_session):
+        dispatched.append(payload)
+
+    monkeypatch.setattr(module, "dispatch_event", dispatch_event)
+    worker = make_worker()
+
+    assert asyncio.run(worker.run_once()) == 1
+
+    assert dispatched == [{"type": "payment_intent.succeeded"}]
+    session.expire_all()
+    assert session.get(WebhookEvent, "evt_1").status == WebhookEventStatus.PROCESSED
+    assert worker.processed == 1
+
+
+def test_process_failure_reschedules_then_gives_up(session, monkeypatch):
+    session.add(WebhookEvent(id="evt_1", type="payment_intent.succeeded", payload={}))
+    session.commit()
+
+    async def dispatch_event(payload, db_session):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(module, "dispatch_event", dispatch_event)
+    worker = make_worker()
+    [event] = worker._claim()
+    asyncio.run(worker.process(event))
+
+    session.expire_all()
+    row = session.get(WebhookEvent, "evt_1")
+    assert (row.status, row.last_error, worker.retried) == (WebhookEventStatus.PENDING, "boom", 1)
+
+    event.attempts = worker.max_attempts
+    asyncio.run(worker.process(event))
+    session.expire_all()
+    assert session.get(WebhookEvent, "evt_1").status == WebhookEventStatus.FAILED
+    assert worker.failed == 1
@@ -0,0 +1,123 @@
+# backend/workers/email_worker.py
+"""
+Worker qui envoie les emails en attente dans email_outbox via le pool de connexions SMTP.
+
+Tourne dans le lifespan de l'app (EMAIL_WORKER_IN_PROCESS=true) ou en process dédié :
+    python -m backend.workers.email_worker
+
+Mesure du débit contre un serveur SMTP local (mailpit, voir docker-compose) :
+    python -m backend.workers.email_worker --bench 1000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.models.email_outbox_entity import EmailOutbox
+from backend.repositories.email_outbox_repository import EmailOutboxRepository
+from backend.services.smtp_pool import smtp_pool, build_message, is_transient
+from backend.workers.lease_worker import LeaseWorker
+
+logger = logging.getLogger(__name__)
+
+
+class EmailWorker(LeaseWorker):
+    repository = EmailOutboxRepository
+    name = "emails"
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+    ):
+        super().__init__(poll_seconds, lease_seconds, max_attempts, retry_base_seconds)
+        self.batch_size = batch_size
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def claim_limit(self) -> int:
+        return self.batch_size
+
+    def _record(self, emails: list[EmailOutbox], errors: list[Exception | None]):
+        with Session(engine) as session:
+            repository = EmailOutboxRepository(session)
+            repository.mark_sent([email.id for email, error in zip(emails, errors) if error is None])
+            for email, error in zip(emails, errors):
+                if error is None:
+                    continue
+                retry_in = self._retry_delay(email.attempts) if is_transient(error) else None
+                if retry_in is None:
+                    self.failed += 1
+                    logger.error(f"Email {email.id} abandonné après {email.attempts} tentatives : {str(error)}")
+                else:
+                    self.retried += 1
+                    logger.warning(f"Email {email.id} en échec (tentative {email.attempts}), nouvel essai dans {retry_in:.0f}s : {str(error)}")
+                repository.mark_failed(email.id, str(error), retry_in)
+        self.sent += errors.count(None)
+
+    async def run_once(self) -> int:
+        """Réserve un lot et le répartit sur les connexions du pool SMTP."""
+        emails = await asyncio.to_thread(self._claim)
+        if not emails:
+            return 0
+        chunks = [emails[i::smtp_pool.size] for i in range(min(smtp_pool.size, len(emails)))]
+        results = await asyncio.gather(*(
+            asyncio.to_thread(smtp_pool.send_many, [build_message(e.to_email, e.subject, e.body) for e in chunk])
+            for chunk in chunks
+        ))
+        claimed = [email for chunk in chunks for email in chunk]
+        errors = [error for chunk_errors in results for error in chunk_errors]
+        await asyncio.to_thread(self._record, claimed, errors)
+        return len(emails)
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed, "smtp": smtp_pool.stats()}
+
+
+email_worker = EmailWorker(
+    batch_size=settings.EMAIL_WORKER_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_WORKER_POLL_SECONDS,
+    lease_seconds=settings.EMAIL_WORKER_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+)
+
+
+async def benchmark(count: int) -> dict:
+    """Envoie `count` messages via le pool (sans passer par la base) et mesure le débit."""
+    messages = [build_message("bench@micropay.local", f"Benchmark {i}", "<p>benchmark</p>") for i in range(count)]
+    chunk_size = max(count // (smtp_pool.size * 4), 1)
+    chunks = [messages[i:i + chunk_size] for i in range(0, count, chunk_size)]
+    started = time.monotonic()
+    results = await asyncio.gather(*(asyncio.to_thread(smtp_pool.send_many, chunk) for chunk in chunks))
+    elapsed = time.monotonic() - started
+    errors = sum(1 for chunk in results for error in chunk if error is not None)
+    return {
+        "messages": count,
+        "errors": errors,
+        "seconds": elapsed,
+        "messages_per_second": (count - errors) / elapsed,
+        **smtp_pool.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker d'envoi des emails (email_outbox)")
+    parser.add_argument("--bench", type=int, metavar="N", help="envoie N messages de test et affiche le débit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.bench:
+        for key, value in asyncio.run(benchmark(args.bench)).items():
+            print(f"{key}: {value}")
+        smtp_pool.close()
+    else:
+        asyncio.run(email_worker.run_forever())
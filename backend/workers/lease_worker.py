@@ -0,0 +1,76 @@
+# backend/workers/lease_worker.py
+"""
+Base des workers qui vident une file en table (backend.repositories.lease_queue_repository) :
+réservation d'un lot, replanification avec backoff, réveil et boucle de polling.
+"""
+import asyncio
+import logging
+import random
+from typing import Any
+from sqlmodel import Session
+
+from backend.db.session import engine
+from backend.repositories.lease_queue_repository import LeaseQueueRepository
+
+
+class LeaseWorker:
+    # Repository de la file, et nom du worker dans les logs
+    repository: type[LeaseQueueRepository]
+    name: str
+
+    def __init__(self, poll_seconds: float, lease_seconds: float, max_attempts: int, retry_base_seconds: float):
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._wakeup = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.logger = logging.getLogger(type(self).__module__)
+
+    @property
+    def claim_limit(self) -> int:
+        """Lignes réservées par passage."""
+        raise NotImplementedError
+
+    def notify(self):
+        """
+        Réveille le worker in-process dès qu'une ligne est mise en file.
+        Appelable depuis la boucle comme depuis un thread de route synchrone.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _claim(self) -> list:
+        with Session(engine) as session:
+            return self.repository(session).claim_batch(self.claim_limit, self.lease_seconds)
+
+    def _mark_failed(self, row_id: Any, error: str, retry_in_seconds: float | None):
+        with Session(engine) as session:
+            self.repository(session).mark_failed(row_id, error, retry_in_seconds)
+
+    def _retry_delay(self, attempts: int) -> float | None:
+        """Backoff exponentiel avec jitter ; None quand les tentatives sont épuisées."""
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.retry_base_seconds * (2 ** (attempts - 1)), 3600)
+        return delay + random.uniform(0, delay / 2)
+
+    async def run_once(self) -> int:
+        """Traite un lot. Retourne le nombre de lignes réservées."""
+        raise NotImplementedError
+
+    async def run_forever(self):
+        self._loop = asyncio.get_running_loop()
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                self.logger.error(f"Erreur du worker de {self.name} : {str(e)}", exc_info=True)
+                claimed = 0
+            if claimed < self.claim_limit:
+                # File vide : on attend une nouvelle ligne ou le prochain poll (retries planifiés)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
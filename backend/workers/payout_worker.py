@@ -0,0 +1,115 @@
+# backend/workers/payout_worker.py
+"""
+Worker qui exécute les virements USDC en file dans payout_jobs.
+
+Chaque process traite jusqu'à N virements en parallèle ; plusieurs process (ou machines) peuvent
+tourner en même temps, les jobs étant réservés avec FOR UPDATE SKIP LOCKED.
+    python -m backend.workers.payout_worker --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.models.payout_job_entity import PayoutJob
+from backend.models.recharge_entity import RechargeStatus
+from backend.repositories.inventory_repository import InventoryRepository
+from backend.repositories.payout_job_repository import PayoutJobRepository
+from backend.repositories.recharge_repository import RechargeRepository
+from backend.repositories.units_ledger_repository import UnitsLedgerRepository
+from backend.services.treasury_service import AsyncTreasuryService
+from backend.services.units_balance import units_balance
+from backend.workers.lease_worker import LeaseWorker
+
+logger = logging.getLogger(__name__)
+
+
+class PayoutWorker(LeaseWorker):
+    repository = PayoutJobRepository
+    name = "virements"
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+    ):
+        super().__init__(poll_seconds, lease_seconds, max_attempts, retry_base_seconds)
+        self.concurrency = concurrency
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def claim_limit(self) -> int:
+        return self.concurrency
+
+    def _complete(self, job: PayoutJob, tx_id: str):
+        """
+        Job, recharge, crédit d'unités et réservation de stock sont mis à jour dans une seule transaction.
+        Le crédit n'est reporté dans le solde Redis qu'après le commit.
+        """
+        with Session(engine) as session:
+            PayoutJobRepository(session).mark_succeeded(job.id, tx_id, commit=False)
+            completed = RechargeRepository(session).transition_status(
+                job.recharge_id, RechargeStatus.COMPLETED, {"tx_id": tx_id}, commit=False
+            )
+            credit = UnitsLedgerRepository(session).record_recharge(job.recharge_id, commit=False) if completed else None
+            InventoryRepository(session).delete_reservation_by_recharge_id(job.recharge_id, commit=False)
+            session.commit()
+        if credit:
+            units_balance.credit(*credit)
+
+    async def process(self, job: PayoutJob, treasury: AsyncTreasuryService):
+        try:
+            # L'ID du job est la clé d'idempotence Circle : une reprise après crash ne double pas le virement
+            tx_id = await treasury.execute_transfer_to_user(
+                job.destination_address, float(job.amount_usdc), idempotency_key=str(job.id)
+            )
+            print(f" Virement USDC effectué ! TX: {tx_id}")
+        except Exception as e:
+            retry_in = self._retry_delay(job.attempts)
+            if retry_in is None:
+                self.failed += 1
+                logger.error(f"Virement {job.id} (recharge {job.recharge_id}) abandonné après {job.attempts} tentatives : {str(e)}")
+            else:
+                self.retried += 1
+                logger.warning(f"Virement {job.id} en échec (tentative {job.attempts}), nouvel essai dans {retry_in:.0f}s : {str(e)}")
+            await asyncio.to_thread(self._mark_failed, job.id, str(e), retry_in)
+            return
+        await asyncio.to_thread(self._complete, job, tx_id)
+        self.succeeded += 1
+
+    async def run_once(self) -> int:
+        """Réserve et exécute jusqu'à `concurrency` virements en parallèle."""
+        jobs = await asyncio.to_thread(self._claim)
+        if jobs:
+            treasury = AsyncTreasuryService()
+            await asyncio.gather(*(self.process(job, treasury) for job in jobs))
+        return len(jobs)
+
+    def stats(self) -> dict:
+        return {"succeeded": self.succeeded, "retried": self.retried, "failed": self.failed, "concurrency": self.concurrency}
+
+
+payout_worker = PayoutWorker(
+    concurrency=settings.PAYOUT_WORKER_CONCURRENCY,
+    poll_seconds=settings.PAYOUT_WORKER_POLL_SECONDS,
+    lease_seconds=settings.PAYOUT_WORKER_LEASE_SECONDS,
+    max_attempts=settings.PAYOUT_MAX_ATTEMPTS,
+    retry_base_seconds=settings.PAYOUT_RETRY_BASE_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de virements USDC (payout_jobs)")
+    parser.add_argument("--concurrency", type=int, default=settings.PAYOUT_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    payout_worker.concurrency = args.concurrency
+    asyncio.run(payout_worker.run_forever())
@@ -0,0 +1,141 @@
+# backend/workers/settlement_worker.py
+"""
+Worker qui règle on-chain les charges d'usage cumulées dans usage_charges.
+
+À chaque passage : clôture des fenêtres dues (seuil atteint ou durée écoulée) en un règlement
+par utilisateur, puis exécution des règlements en file (un transfert USDC wallet utilisateur ->
+Master Wallet chacun). Plusieurs process peuvent tourner en même temps :
+    python -m backend.workers.settlement_worker --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+from decimal import Decimal
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.models.usage_settlement_entity import UsageSettlement
+from backend.repositories.usage_settlement_repository import UsageSettlementRepository
+from backend.services.treasury_service import AsyncTreasuryService
+from backend.workers.lease_worker import LeaseWorker
+
+logger = logging.getLogger(__name__)
+
+
+class SettlementWorker(LeaseWorker):
+    repository = UsageSettlementRepository
+    name = "règlements"
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        threshold_usdc: float,
+        window_seconds: float,
+        min_amount_usdc: float,
+        close_batch_size: int,
+    ):
+        super().__init__(poll_seconds, lease_seconds, max_attempts, retry_base_seconds)
+        self.concurrency = concurrency
+        self.threshold = Decimal(str(threshold_usdc))
+        self.window_seconds = window_seconds
+        self.min_amount = Decimal(str(min_amount_usdc))
+        self.close_batch_size = close_batch_size
+        self.settlements_created = 0
+        self.charges_settled = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def claim_limit(self) -> int:
+        return self.concurrency
+
+    def _close_windows(self) -> int:
+        """Crée les règlements dus, par lots, jusqu'à épuisement. Retourne le nombre de règlements créés."""
+        created = 0
+        while True:
+            with Session(engine) as session:
+                result = UsageSettlementRepository(session).close_windows(
+                    self.threshold, self.window_seconds, self.min_amount, self.close_batch_size
+                )
+            if result is None:
+                return created
+            settlements, charges = result
+            created += settlements
+            self.settlements_created += settlements
+            self.charges_settled += charges
+            if settlements < self.close_batch_size:
+                return created
+
+    def _mark_succeeded(self, settlement: UsageSettlement, tx_id: str):
+        with Session(engine) as session:
+            UsageSettlementRepository(session).mark_succeeded(settlement.id, tx_id)
+
+    async def process(self, settlement: UsageSettlement, treasury: AsyncTreasuryService):
+        try:
+            # L'ID du règlement est la clé d'idempotence Circle : une reprise après crash ne double pas le prélèvement
+            tx_id = await treasury.charge_user_wallet(
+                settlement.circle_wallet_id, settlement.amount_usdc, idempotency_key=str(settlement.id)
+            )
+        except Exception as e:
+            retry_in = self._retry_delay(settlement.attempts)
+            if retry_in is None:
+                self.failed += 1
+                logger.error(
+                    f"Règlement {settlement.id} ({settlement.amount_usdc} USDC, utilisateur {settlement.user_id}) "
+                    f"abandonné après {settlement.attempts} tentatives : {str(e)}"
+                )
+            else:
+                self.retried += 1
+                logger.warning(f"Règlement {settlement.id} en échec (tentative {settlement.attempts}), nouvel essai dans {retry_in:.0f}s : {str(e)}")
+            await asyncio.to_thread(self._mark_failed, settlement.id, str(e), retry_in)
+            return
+        await asyncio.to_thread(self._mark_succeeded, settlement, tx_id)
+        self.succeeded += 1
+
+    async def run_once(self) -> int:
+        """Clôture les fenêtres dues puis exécute jusqu'à `concurrency` règlements en parallèle."""
+        await asyncio.to_thread(self._close_windows)
+        settlements = await asyncio.to_thread(self._claim)
+        if settlements:
+            treasury = AsyncTreasuryService()
+            await asyncio.gather(*(self.process(settlement, treasury) for settlement in settlements))
+        return len(settlements)
+
+    def stats(self) -> dict:
+        return {
+            "settlements_created": self.settlements_created,
+            "charges_settled": self.charges_settled,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "concurrency": self.concurrency,
+        }
+
+
+settlement_worker = SettlementWorker(
+    concurrency=settings.SETTLEMENT_WORKER_CONCURRENCY,
+    poll_seconds=settings.SETTLEMENT_WORKER_POLL_SECONDS,
+    lease_seconds=settings.SETTLEMENT_WORKER_LEASE_SECONDS,
+    max_attempts=settings.SETTLEMENT_MAX_ATTEMPTS,
+    retry_base_seconds=settings.SETTLEMENT_RETRY_BASE_SECONDS,
+    threshold_usdc=settings.USAGE_SETTLEMENT_THRESHOLD_USDC,
+    window_seconds=settings.USAGE_SETTLEMENT_WINDOW_SECONDS,
+    min_amount_usdc=settings.USAGE_SETTLEMENT_MIN_AMOUNT_USDC,
+    close_batch_size=settings.SETTLEMENT_CLOSE_BATCH_SIZE,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de règlement on-chain des charges d'usage")
+    parser.add_argument("--concurrency", type=int, default=settings.SETTLEMENT_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settlement_worker.concurrency = args.concurrency
+    asyncio.run(settlement_worker.run_forever())
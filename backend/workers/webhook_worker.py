@@ -0,0 +1,95 @@
+# backend/workers/webhook_worker.py
+"""
+Worker qui vide le journal webhook_events et exécute les traitements de paiement.
+
+Tourne dans le lifespan de l'app (WEBHOOK_WORKER_IN_PROCESS=true) ou en process dédié :
+    python -m backend.workers.webhook_worker
+"""
+import asyncio
+import logging
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.db.session import engine
+from backend.models.webhook_event_entity import WebhookEvent
+from backend.repositories.webhook_event_repository import WebhookEventRepository
+from backend.services.payment_service import dispatch_event
+from backend.workers.lease_worker import LeaseWorker
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookWorker(LeaseWorker):
+    repository = WebhookEventRepository
+    name = "webhooks"
+
+    def __init__(
+        self,
+        batch_size: int,
+        concurrency: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+    ):
+        super().__init__(poll_seconds, lease_seconds, max_attempts, retry_base_seconds)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def claim_limit(self) -> int:
+        return self.batch_size
+
+    def _mark_processed(self, event_id: str):
+        with Session(engine) as session:
+            WebhookEventRepository(session).mark_processed(event_id)
+
+    async def process(self, event: WebhookEvent):
+        try:
+            with Session(engine) as session:
+                await dispatch_event(event.payload, session)
+        except Exception as e:
+            retry_in = self._retry_delay(event.attempts)
+            if retry_in is None:
+                self.failed += 1
+                logger.error(f"Webhook {event.id} abandonné après {event.attempts} tentatives : {str(e)}")
+            else:
+                self.retried += 1
+                logger.warning(f"Webhook {event.id} en échec (tentative {event.attempts}), nouvel essai dans {retry_in:.0f}s : {str(e)}")
+            await asyncio.to_thread(self._mark_failed, event.id, str(e), retry_in)
+            return
+        await asyncio.to_thread(self._mark_processed, event.id)
+        self.processed += 1
+
+    async def run_once(self) -> int:
+        """Traite un lot d'événements. Retourne le nombre d'événements réservés."""
+        events = await asyncio.to_thread(self._claim)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(event: WebhookEvent):
+            async with semaphore:
+                await self.process(event)
+
+        await asyncio.gather(*(bounded(event) for event in events))
+        return len(events)
+
+    def stats(self) -> dict:
+        return {"processed": self.processed, "retried": self.retried, "failed": self.failed}
+
+
+webhook_worker = WebhookWorker(
+    batch_size=settings.WEBHOOK_WORKER_BATCH_SIZE,
+    concurrency=settings.WEBHOOK_WORKER_CONCURRENCY,
+    poll_seconds=settings.WEBHOOK_WORKER_POLL_SECONDS,
+    lease_seconds=settings.WEBHOOK_WORKER_LEASE_SECONDS,
+    max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+    retry_base_seconds=settings.WEBHOOK_RETRY_BASE_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(webhook_worker.run_forever())